@@ -0,0 +1,103 @@
+"""
+Binary tree files (ast_format) against pickle on a large and a deeply nested tree:
+file size, dump time, time to load, to load and read one statement, and to load and walk
+everything
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.node_visitor import NodeVisitor
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer import ast_format
+from syntax_analyzer.flat_tree import lazy
+from syntax_analyzer.parser import Parser
+
+STATEMENT = "    x = a + 1 * b - c;\n"
+STATEMENTS = 500_000 // 9
+DEPTH = 20_000
+
+
+class Count(NodeVisitor):
+    """ Nodes of 'x = ...' statements, nested expressions are walked with an explicit stack """
+
+    def visit_program(self, node):
+        return 1 + self.visit(node.main_function)
+
+    def visit_mainfunction(self, node):
+        return 1 + self.visit(node.compound_statement)
+
+    def visit_compound(self, node):
+        return 1 + sum(self.visit(child) for child in node.children)
+
+    def visit_assign(self, node):
+        count = 0
+        stack = [node.left, node.right]
+        while stack:
+            node = stack.pop()
+            count += 1
+            if type(node).__name__ == 'BinOp':
+                stack.append(node.left)
+                stack.append(node.right)
+        return 1 + count
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def unpickle(path: str):
+    with open(path, 'rb') as file:
+        return pickle.load(file)
+
+
+def first_statement(tree):
+    return tree.main_function.compound_statement.children[0].left.value
+
+
+def compare(name: str, tree, directory: str) -> None:
+    print(f"{name}:")
+    pickle_path = os.path.join(directory, "tree.pickle")
+    format_path = os.path.join(directory, "tree.ast")
+    try:
+        data, dump = timed(lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+    except RecursionError:
+        print(f"{'pickle':>8}: RecursionError")
+    else:
+        with open(pickle_path, 'wb') as file:
+            file.write(data)
+        _, load = timed(lambda: unpickle(pickle_path))
+        _, one = timed(lambda: first_statement(unpickle(pickle_path)))
+        _, walk = timed(lambda: Count().visit(unpickle(pickle_path)))
+        print(f"{'pickle':>8}: {len(data) / 2 ** 20:6.1f} MiB, dump {dump * 1000:8.1f} ms, load {load * 1000:8.1f} ms,"
+              f" first statement {one * 1000:8.1f} ms, walk {walk * 1000:8.1f} ms")
+
+    data, dump = timed(lambda: ast_format.dumps(tree))
+    with open(format_path, 'wb') as file:
+        file.write(data)
+    _, load = timed(lambda: lazy(ast_format.load(format_path)))
+    _, one = timed(lambda: first_statement(lazy(ast_format.load(format_path))))
+    _, walk = timed(lambda: Count().visit(lazy(ast_format.load(format_path))))
+    print(f"{'binary':>8}: {len(data) / 2 ** 20:6.1f} MiB, dump {dump * 1000:8.1f} ms, load {load * 1000:8.1f} ms,"
+          f" first statement {one * 1000:8.1f} ms, walk {walk * 1000:8.1f} ms")
+
+
+def main():
+    large = "int main() {\n" + STATEMENT * STATEMENTS + "}\n"
+    deep = "int main() {\n    x = " + "(1 + " * DEPTH + "1" + ")" * DEPTH + ";\n}\n"
+    with tempfile.TemporaryDirectory() as directory:
+        for name, code in ((f"{STATEMENTS} statements", large), (f"expression nested {DEPTH} deep", deep)):
+            tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+            compare(name, tree, directory)
+
+
+if __name__ == '__main__':
+    main()
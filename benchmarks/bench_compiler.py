@@ -0,0 +1,108 @@
+"""
+Loop heavy programs run by the tree walking Interpreter against the Compiler backend,
+the compiler is timed with and without compiling
+"""
+import io
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.compiler import Compiler
+from interpreter.interpreter import Interpreter
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+#  'last' keeps the sum of a range from being computed at once (see interpreter.loops.CountedLoop),
+#  the loop is what is timed
+PROGRAMS = {
+    "sum of a range": """
+int main() {
+    int sum = 0;
+    int last = 0;
+    for (int i = 0; i < 100000; i++) {
+        sum += i * 3 - 1;
+        last = i;
+    }
+    cout << sum << " " << last << endl;
+    return 0;
+}
+""",
+    "nested loops": """
+int main() {
+    int count = 0;
+    for (int i = 0; i < 300; i++) {
+        for (int j = 0; j < 300; j++) {
+            if ((i + j) % 3 == 0) {
+                count++;
+            }
+        }
+    }
+    cout << count << endl;
+    return 0;
+}
+""",
+    "collatz": """
+int main() {
+    int longest = 0, start = 0;
+    for (int n = 1; n < 2000; n++) {
+        int x = n, steps = 0;
+        while (x != 1) {
+            if (x % 2 == 0) {
+                x = x / 2;
+            } else {
+                x = 3 * x + 1;
+            }
+            steps++;
+        }
+        if (steps > longest) {
+            longest = steps;
+            start = n;
+        }
+    }
+    cout << start << " " << longest << endl;
+    return 0;
+}
+""",
+    "doubles and switch": """
+int main() {
+    double total = 0.0;
+    int i = 0;
+    while (i < 100000) {
+        switch (i % 4) {
+            case 0: { total += 0.5; break; }
+            case 1: { total -= 0.25; break; }
+            default: { total = total * 1.0; }
+        }
+        i++;
+    }
+    cout << total << endl;
+    return 0;
+}
+""",
+}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    for name, code in PROGRAMS.items():
+        tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+        walk_output, compiled_output = io.StringIO(), io.StringIO()
+        _, walk = timed(lambda: Interpreter(walk_output).interpret(tree))
+        program, compile_time = timed(lambda: Compiler(compiled_output).compile(tree))
+        _, run = timed(program)
+        assert walk_output.getvalue() == compiled_output.getvalue()
+        print(f"{name:>18}: walk {walk * 1000:8.1f} ms, compile {compile_time * 1000:6.2f} ms,"
+              f" run {run * 1000:8.1f} ms, {walk / (compile_time + run):5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+Counted for loops (see interpreter.loops.counted_loop) against the same loops written
+as while loops, which take the general path, run by the Compiler, the Transpiler and
+the register VM
+"""
+import io
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.bytecode import BytecodeCompiler
+from interpreter.compiler import Compiler
+from interpreter.transpiler import Transpiler
+from interpreter.vm import VM
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+#  name -> (program with a counted for loop, the same program with a while loop)
+PROGRAMS = {
+    "accumulation": ("""
+int main() {
+    int sum = 0;
+    int n = 200000;
+    for (int i = 0; i < n; i++) {
+        sum += i * 3 - 1;
+    }
+    cout << sum << endl;
+    return 0;
+}
+""", """
+int main() {
+    int sum = 0;
+    int n = 200000;
+    int i = 0;
+    while (i < n) {
+        sum += i * 3 - 1;
+        i++;
+    }
+    cout << sum << endl;
+    return 0;
+}
+"""),
+    "range with a body": ("""
+int main() {
+    int count = 0;
+    for (int i = 0; i < 200000; i++) {
+        if (i % 7 == 0) {
+            continue;
+        }
+        count += i & 3;
+    }
+    cout << count << endl;
+    return 0;
+}
+""", """
+int main() {
+    int count = 0;
+    int i = 0;
+    while (i < 200000) {
+        if (i % 7 != 0) {
+            count += i & 3;
+        }
+        i++;
+    }
+    cout << count << endl;
+    return 0;
+}
+"""),
+    "nested, inclusive": ("""
+int main() {
+    int count = 0;
+    for (int i = 1; i <= 400; i++) {
+        for (int j = i; j <= 400; ++j) {
+            if ((i ^ j) % 5 == 0) {
+                count++;
+            }
+        }
+    }
+    cout << count << endl;
+    return 0;
+}
+""", """
+int main() {
+    int count = 0;
+    int i = 1;
+    while (i <= 400) {
+        int j = i;
+        while (j <= 400) {
+            if ((i ^ j) % 5 == 0) {
+                count++;
+            }
+            j++;
+        }
+        i++;
+    }
+    cout << count << endl;
+    return 0;
+}
+"""),
+}
+BACKENDS = {
+    "closures": lambda tree, output: Compiler(output).compile(tree),
+    "python": lambda tree, output: Transpiler(output).compile(tree),
+    "vm": lambda tree, output: VM(BytecodeCompiler().compile(tree), output).run,
+}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    for name, codes in PROGRAMS.items():
+        trees = [Parser(TokenTable.from_lexer(Lexer(code))).parse() for code in codes]
+        outputs = set()
+        times = []
+        for backend in BACKENDS.values():
+            for tree in trees:
+                output = io.StringIO()
+                run = backend(tree, output)
+                _, elapsed = timed(run)
+                outputs.add(output.getvalue())
+                times.append(elapsed)
+        assert len(outputs) == 1
+        print(f"{name:>18}: " + ", ".join(
+            f"{backend} {times[2 * index + 1] * 1000:6.1f} -> {times[2 * index] * 1000:6.1f} ms"
+            f" ({times[2 * index + 1] / times[2 * index]:6.1f}x)" for index, backend in enumerate(BACKENDS)))
+
+
+if __name__ == '__main__':
+    main()
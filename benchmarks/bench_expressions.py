@@ -0,0 +1,56 @@
+"""
+Expression parsing throughput and Python stack depth at an operand
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from lexical_analyzer.token_types_simple import SEMI
+from syntax_analyzer.parser import Parser
+
+EXPRESSION = "a + b * (c - 4) / 2 == d || e && f != -g ? h % 3 : i << 1 ^ j"
+COUNT = 5000
+
+
+def stack_depth() -> int:
+    """ Frames between Parser.expr and the parsing of its first operand """
+    parser = Parser(TokenTable.from_lexer(Lexer("a")))
+    variable = parser.variable
+    depths = []
+
+    def measured_variable():
+        frame, depth = sys._getframe(1), 0
+        while frame.f_code.co_name != 'expr':
+            depth += 1
+            frame = frame.f_back
+        depths.append(depth)
+        return variable()
+
+    parser.variable = measured_variable
+    parser.expr()
+    return depths[0]
+
+
+def main():
+    table = TokenTable.from_lexer(Lexer(f"{EXPRESSION};" * COUNT))
+    best = None
+    for _ in range(5):
+        table.cursor = 0
+        parser = Parser(table)
+        start = time.perf_counter()
+        for _ in range(COUNT):
+            parser.expr()
+            parser.eat(SEMI)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"expressions/s: {COUNT / best:>10.0f}")
+    print(f"frames from expr to an operand: {stack_depth()}")
+
+
+if __name__ == '__main__':
+    main()
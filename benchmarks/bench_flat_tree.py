@@ -0,0 +1,99 @@
+"""
+Object tree against FlatTree on a tree of about a million nodes: conversion, a full walk
+with a visitor, a full garbage collection while the tree is alive and a pickle round trip
+"""
+import gc
+import os
+import pickle
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.node_visitor import NodeVisitor, FlatNodeVisitor
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.flat_tree import to_flat, from_flat
+from syntax_analyzer.parser import Parser
+
+STATEMENT = "    x = a + 1 * b - c;\n"
+STATEMENTS = 1_000_000 // 9
+
+
+class Sum(NodeVisitor):
+    """ Sum of the numbers in 'x = ...' statements """
+
+    def visit_program(self, node):
+        return self.visit(node.main_function)
+
+    def visit_mainfunction(self, node):
+        return self.visit(node.compound_statement)
+
+    def visit_compound(self, node):
+        return sum(self.visit(child) for child in node.children)
+
+    def visit_assign(self, node):
+        return self.visit(node.right)
+
+    def visit_binop(self, node):
+        return self.visit(node.left) + self.visit(node.right)
+
+    def visit_variable(self, node):
+        return 0
+
+    def visit_num(self, node):
+        return node.value
+
+
+class FlatSum(FlatNodeVisitor):
+    def visit_program(self, index):
+        return self.visit(self.flat.child(index, 'main_function'))
+
+    def visit_mainfunction(self, index):
+        return self.visit(self.flat.child(index, 'compound_statement'))
+
+    def visit_compound(self, index):
+        return sum(self.visit(child) for child in self.flat.children(index, 'children'))
+
+    def visit_assign(self, index):
+        return self.visit(self.flat.child(index, 'right'))
+
+    def visit_binop(self, index):
+        return self.visit(self.flat.child(index, 'left')) + self.visit(self.flat.child(index, 'right'))
+
+    def visit_variable(self, index):
+        return 0
+
+    def visit_num(self, index):
+        return self.flat.value(index)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def report(name: str, tree, visitor, root) -> None:
+    total, walk = timed(lambda: visitor.visit(root))
+    _, collect = timed(gc.collect)
+    data, dump = timed(lambda: pickle.dumps(tree, pickle.HIGHEST_PROTOCOL))
+    _, load = timed(lambda: pickle.loads(data))
+    print(f"{name:>7}: walk {walk * 1000:7.1f} ms, gc.collect {collect * 1000:6.1f} ms,"
+          f" pickle {len(data) / 2 ** 20:5.1f} MiB dump {dump * 1000:7.1f} ms load {load * 1000:7.1f} ms (sum {total})")
+
+
+def main():
+    code = "int main() {\n" + STATEMENT * STATEMENTS + "}\n"
+    tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+    flat, convert = timed(lambda: to_flat(tree))
+    back = timed(lambda: from_flat(flat))[1]
+    print(f"{len(flat)} nodes, to_flat {convert * 1000:.1f} ms, from_flat {back * 1000:.1f} ms")
+    report("objects", tree, Sum(), tree)
+    del tree
+    report("flat", flat, FlatSum(flat), 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Memory kept by the tree of a literal-heavy generated source, with Num/String/Bool/Type
+nodes shared by Parser.leaf against a new node for every occurrence
+Tokens come from a stream, so only the ones the tree holds stay alive
+"""
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from syntax_analyzer.parser import Parser
+
+STATEMENTS = 20_000
+
+
+class UnsharedParser(Parser):
+    def leaf(self, cls, token):
+        return cls(token)
+
+
+def source() -> str:
+    random.seed(0)
+    lines = []
+    for _ in range(STATEMENTS):
+        numbers = [str(random.randrange(16)) for _ in range(4)]
+        lines.append(random.choice([
+            f"    int a = {numbers[0]}, b = {numbers[1]} * {numbers[2]} + {numbers[3]};",
+            f"    double d = {numbers[0]}.5 + {numbers[1]}.25;",
+            f"    cout << \"value\" << {numbers[0]} << true << endl;",
+            f"    bool f = false; char c = 'x';",
+        ]))
+    return "int main() {\n" + "\n".join(lines) + "\n}\n"
+
+
+def measure(parser_class, code: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    tree = parser_class(Lexer(code)).parse()
+    elapsed = time.perf_counter() - start
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return kept / 2 ** 20, elapsed
+
+
+def main():
+    code = source()
+    print(f"{STATEMENTS} statements")
+    for name, parser_class in (("new nodes", UnsharedParser), ("shared", Parser)):
+        kept, elapsed = measure(parser_class, code)
+        print(f"{name:>10}: tree {kept:6.1f} MiB, parsed in {elapsed:.2f} s (under tracemalloc)")
+
+
+if __name__ == '__main__':
+    main()
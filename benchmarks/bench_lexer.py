@@ -0,0 +1,42 @@
+"""
+Lexing time against source size
+Each block contains 'const char *' and '#include' patterns which need lookahead,
+time per token should stay flat as the source grows
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_types import EOF
+
+BLOCK = """#include <iostream>
+const char * s = "text";
+int a = 5, b = a + 3 * (a - 1);
+cout << s << a << b;
+"""
+
+
+def lex(code: str) -> int:
+    lexer = Lexer(code)
+    count = 0
+    while lexer.get_next_token().type != EOF:
+        count += 1
+    return count
+
+
+def main():
+    print(f"{'blocks':>8} {'tokens':>8} {'seconds':>9} {'us/token':>9}")
+    for blocks in (250, 500, 1000, 2000, 4000):
+        code = BLOCK * blocks
+        start = time.perf_counter()
+        count = lex(code)
+        elapsed = time.perf_counter() - start
+        print(f"{blocks:>8} {count:>8} {elapsed:>9.3f} {elapsed / count * 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Peak Python heap while lexing generated sources of growing size
+usage: python benchmarks/bench_mapped_lexer.py [size_mb ...]
+Lexer(code) needs the whole text in memory, Lexer.from_path stays flat
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_types import EOF
+
+BLOCK = """int a = 5, b = a + 3 * (a - 1); // comment
+const char * s = "text";
+cout << s << a << b;
+"""
+
+
+def generate(file_path: str, size_mb: float) -> None:
+    with open(file_path, 'w') as f:
+        chunk = BLOCK * 1000
+        for _ in range(max(1, int(size_mb * (1 << 20) / len(chunk)))):
+            f.write(chunk)
+
+
+def peak_kb(make_lexer) -> int:
+    tracemalloc.start()
+    lexer = make_lexer()
+    while lexer.get_next_token().type != EOF:
+        pass
+    lexer.close()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak // 1024
+
+
+def main():
+    sizes = [float(size) for size in sys.argv[1:]] or [0.5, 1, 2]
+    print(f"{'size MB':>8} {'str peak KB':>12} {'mmap peak KB':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, 'generated.cpp')
+        for size in sizes:
+            generate(file_path, size)
+            in_memory = peak_kb(lambda: Lexer(open(file_path).read()))
+            mapped = peak_kb(lambda: Lexer.from_path(file_path))
+            print(f"{size:>8} {in_memory:>12} {mapped:>13}")
+
+
+if __name__ == '__main__':
+    main()
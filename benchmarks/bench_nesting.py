@@ -0,0 +1,61 @@
+"""
+Parsing code nested exactly as deep as the limits allow: time and peak memory per
+nesting shape, and the SyntaxError a few levels past the limit
+Usage: python benchmarks/bench_nesting.py [depth]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser, SyntaxError
+
+DEPTH = 100_000
+
+#  depth -> program nested that deep, main's body and the innermost statement are statement levels too
+SHAPES = {
+    "parentheses": lambda n: "int main() { x = " + "(" * n + "a" + ")" * n + "; }",
+    "unary chain": lambda n: "int main() { x = " + "- " * n + "a; }",
+    "prefix chain": lambda n: "int main() { x = " + "-- " * n + "a; }",
+    "casts": lambda n: "int main() { x = " + "(int)" * n + "a; }",
+    "ternaries": lambda n: "int main() { x = " + "a ? b : " * n + "c; }",
+    "blocks": lambda n: "int main() " + "{" * n + "}" * n,
+    "if": lambda n: "int main() { " + "if (a) " * (n - 2) + "x = 1; }",
+    "while": lambda n: "int main() { " + "while (a) " * (n - 2) + "x = 1; }",
+}
+
+
+def parse(code: str, depth: int):
+    table = TokenTable.from_lexer(Lexer(code))
+    return Parser(table, max_statement_depth=depth, max_expression_depth=depth).parse()
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else DEPTH
+    for name, shape in SHAPES.items():
+        code = shape(depth)
+        start = time.perf_counter()
+        parse(code, depth)
+        elapsed = time.perf_counter() - start
+
+        # traced separately, tracemalloc slows parsing down several times
+        tracemalloc.start()
+        parse(code, depth)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        try:
+            parse(shape(depth + 10), depth)
+            result = "no error"
+        except SyntaxError as e:
+            result = e.message
+        print(f"{name:>15}: {elapsed:6.2f} s {peak / 2 ** 20:8.1f} MiB  over the limit: {result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Bytes per node of a parsed tree with about a million nodes
+Sizes are summed with sys.getsizeof over every node (with its __dict__ if it has one),
+every token and every list of children reachable from the Program
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token import Token
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+from syntax_analyzer.tree import AST
+
+STATEMENT = "    x = a + 1 * b - c;\n"
+NODES = 1_000_000
+NODES_PER_STATEMENT = 9
+
+
+def attributes(node) -> list:
+    if hasattr(node, '__dict__'):
+        return list(vars(node).values())
+    return [getattr(node, name) for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ())
+            if hasattr(node, name)]
+
+
+def measure(tree: AST):
+    """ (nodes, node bytes, tokens, token bytes, list bytes) of everything reachable from 'tree' """
+    nodes = node_bytes = tokens = token_bytes = list_bytes = 0
+    seen = set()
+    stack = [tree]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        if isinstance(item, AST):
+            nodes += 1
+            node_bytes += sys.getsizeof(item)
+            if hasattr(item, '__dict__'):
+                node_bytes += sys.getsizeof(vars(item))
+            stack.extend(attributes(item))
+        elif isinstance(item, Token):
+            tokens += 1
+            token_bytes += sys.getsizeof(item)
+            if hasattr(item, '__dict__'):
+                token_bytes += sys.getsizeof(vars(item))
+        elif isinstance(item, list):
+            list_bytes += sys.getsizeof(item)
+            stack.extend(item)
+    return nodes, node_bytes, tokens, token_bytes, list_bytes
+
+
+def main():
+    code = "int main() {\n" + STATEMENT * (NODES // NODES_PER_STATEMENT) + "}\n"
+    table = TokenTable.from_lexer(Lexer(code))
+    start = time.perf_counter()
+    tree = Parser(table).parse()
+    elapsed = time.perf_counter() - start
+    nodes, node_bytes, tokens, token_bytes, list_bytes = measure(tree)
+    print(f"nodes: {nodes}, parsed in {elapsed:.2f} s")
+    print(f"bytes per node:  {node_bytes / nodes:6.1f}")
+    print(f"bytes per token: {token_bytes / max(tokens, 1):6.1f} ({tokens} tokens)")
+    print(f"total per node:  {(node_bytes + token_bytes + list_bytes) / nodes:6.1f} (nodes, tokens and child lists)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Tokens per second on operator-heavy sources
+'before' replays the old simple_token, which scanned every name in token_types_simple
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token import Token
+from lexical_analyzer.token_types import EOF
+import lexical_analyzer.token_types_simple as tokens_simple
+
+LINE = "a+=b*c-(d/e)%f^g|h&i; x=y<=z>=w==v!=u&&t||s>>r<q>p?o:n; ~m+!l-++k--;\n"
+
+
+class LinearScanLexer(Lexer):
+    names = {k: v for k, v in vars(tokens_simple).items() if not k.startswith('__') and not k.endswith('_V')}
+    values = {k: v for k, v in vars(tokens_simple).items() if not k.startswith('__') and k.endswith('_V')}
+
+    def simple_token(self):
+        for name in self.names:
+            val = self.values.get(name + "_V")
+            if len(val) == 1:
+                if self.current_char == val:
+                    self.move()
+                    return Token(name, val)
+            if len(val) == 2:
+                if self.current_char == val[0] and self.peek() == val[1]:
+                    self.move()
+                    self.move()
+                    return Token(name, val)
+        return None
+
+
+def tokens_per_second(lexer_class, code: str) -> float:
+    lexer = lexer_class(code)
+    count = 0
+    start = time.perf_counter()
+    while lexer.get_next_token().type != EOF:
+        count += 1
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    code = LINE * 3000
+    before = tokens_per_second(LinearScanLexer, code)
+    after = tokens_per_second(Lexer, code)
+    print(f"before: {before:>10.0f} tokens/s")
+    print(f"after:  {after:>10.0f} tokens/s")
+    print(f"speedup: {after / before:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Programs with constant expressions, identities and guarded debug blocks in their loops
+run as parsed and as optimised (ConstantFolder and DeadCodeEliminator, see optimize),
+by the tree walking Interpreter and by the Compiler backend
+"""
+import io
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.compiler import Compiler
+from interpreter.interpreter import Interpreter
+from interpreter.optimizer import optimize
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+PROGRAMS = {
+    "constant arithmetic": """
+int main() {
+    int sum = 0;
+    for (int i = 0; i < 50000; i++) {
+        sum += 4 - 2 * (-5 >> (-2) + 9) + (1 == 1 + 1 - (3 % 2)) * 7 - 1000 / 7;
+    }
+    cout << sum << endl;
+    return 0;
+}
+""",
+    "identities": """
+int main() {
+    int sum = 0;
+    char c = 'a';
+    for (int i = 0; i < 50000; i++) {
+        sum += (i * 1 + 0) - (c + 0) / 1 + (!!(i % 3) ? 1 : 0);
+        sum = sum ^ 0;
+    }
+    cout << sum << endl;
+    return 0;
+}
+""",
+    "ternaries": """
+int main() {
+    double total = 0.0;
+    bool debug = false;
+    for (int i = 0; i < 50000; i++) {
+        total += (true ? 0.5 : 1) * (i > 3 ? 2 : 2) - (debug && false ? 1.0 : 0.25);
+    }
+    cout << total << endl;
+    return 0;
+}
+""",
+    "debug blocks": """
+int main() {
+    int sum = 0, i = 0;
+    int trace = 0;
+    while (1) {
+        if (0) {
+            trace = sum;
+            cout << "sum " << sum << endl;
+        }
+        switch (1) {
+            case 0: { trace++; break; }
+            case 1: { sum += i; break; }
+            default: { trace--; }
+        }
+        do {
+            if (false || 0) { cout << "i " << i << endl; }
+            i++;
+        } while (false);
+        if (i == 50000) {
+            break;
+        }
+    }
+    cout << sum << endl;
+    return 0;
+}
+""",
+}
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    for name, code in PROGRAMS.items():
+        tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+        optimised, optimise = timed(lambda: optimize(tree))
+        outputs = [io.StringIO() for _ in range(4)]
+        _, walk = timed(lambda: Interpreter(outputs[0]).interpret(tree))
+        _, walk_optimised = timed(lambda: Interpreter(outputs[1]).interpret(optimised))
+        _, closures = timed(lambda: Compiler(outputs[2]).compile(tree)())
+        _, closures_optimised = timed(lambda: Compiler(outputs[3]).compile(optimised)())
+        assert len({output.getvalue() for output in outputs}) == 1
+        print(f"{name:>20}: optimise {optimise * 1000:5.2f} ms, walk {walk * 1000:7.1f} -> {walk_optimised * 1000:7.1f} ms"
+              f" ({walk / walk_optimised:4.1f}x), closures {closures * 1000:6.1f} -> {closures_optimised * 1000:6.1f} ms"
+              f" ({closures / closures_optimised:4.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Adversarial nesting of parentheses, casts and unary operators: time per token should stay
+flat as inputs grow, memo hits/misses show how often is_main was asked again
+"""
+import os
+import random
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+SHAPES = {
+    "((((int)x))))": lambda n: "(" * n + "(int)x" + ")" * n,
+    "(int)(int)(x)": lambda n: "(int)" * n + "(x)",
+    "int(int(x))": lambda n: "int(" * n + "x" + ")" * n,
+    "-(-(-x))": lambda n: "-(" * n + "x" + ")" * n,
+}
+
+
+def fuzz(n: int) -> str:
+    """ Random mix of every nesting construct, 'n' levels deep """
+    opening, closing = [], []
+    for _ in range(n):
+        opening.append(random.choice(["(", "(int)", "double(", "- ", "!(", "(a + "]))
+        closing.append({"(": ")", "double(": ")", "!(": ")", "(a + ": ")"}.get(opening[-1], ""))
+    return "".join(opening) + "x" + "".join(reversed(closing))
+
+
+def measure(expression: str):
+    table = TokenTable.from_lexer(Lexer(f"int main() {{ y = {expression}; }}"))
+    parser = Parser(table, max_expression_depth=1 << 20)
+    start = time.perf_counter()
+    parser.parse()
+    elapsed = time.perf_counter() - start
+    hits = sum(parser.memo_hits.values())
+    misses = sum(parser.memo_misses.values())
+    return elapsed / len(table) * 1e6, hits, misses
+
+
+def main():
+    random.seed(0)
+    shapes = dict(SHAPES, fuzz=fuzz)
+    sizes = (1000, 4000, 16000, 64000)
+    print(f"{'shape':>15} " + " ".join(f"{f'{n} us/token':>15}" for n in sizes) + f" {'hits/misses':>14}")
+    for name, shape in shapes.items():
+        row = []
+        for n in sizes:
+            per_token, hits, misses = measure(shape(n))
+            row.append(per_token)
+        print(f"{name:>15} " + " ".join(f"{value:>15.2f}" for value in row) + f" {f'{hits}/{misses}':>14}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""
+Parse time against source size
+Statements mix assignments, casts and nested expressions, so every speculative
+check of the parser is exercised, time per token should stay flat
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+STATEMENTS = """  int a = 5, b = (int)a + 3 * (a - 1);
+  double d = double(b) / 2.5;
+  a += b << 2 | (a ^ 7);
+  if (a == b && b != 0) { cout << a << b; } else { b = a ? -a : ++b; }
+"""
+
+
+def program(blocks: int) -> str:
+    return "#include <iostream>\nusing namespace std;\nint main() {\n" + STATEMENTS * blocks + "}\n"
+
+
+def main():
+    print(f"{'blocks':>8} {'tokens':>8} {'seconds':>9} {'us/token':>9}")
+    for blocks in (50, 100, 200, 400, 800):
+        table = TokenTable.from_lexer(Lexer(program(blocks)))
+        start = time.perf_counter()
+        Parser(table).parse()
+        elapsed = time.perf_counter() - start
+        print(f"{blocks:>8} {len(table):>8} {elapsed:>9.3f} {elapsed / len(table) * 1e6:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Linting a corpus with many syntax errors: one pass with error recovery against stopping at
+the first error, fixing it and running again (the broken line is dropped as the "fix")
+"""
+import os
+import random
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from syntax_analyzer.parser import Parser, SyntaxError
+
+GOOD = [
+    "    int a = 5, b = a + 3 * (a - 1);",
+    "    if (a == b) { x = x + 1; } else { x = x - 1; }",
+    "    cout << a << b << endl;",
+    "    while (x < 10) { x++; }",
+]
+BAD = [
+    "    int c = ;",
+    "    x = (1 + 2;",
+    "    cout << ;",
+    "    y = a +* b;",
+]
+FILES = 200
+LINES = 200
+ERROR_RATE = 0.05
+
+
+def corpus():
+    random.seed(0)
+    files = []
+    for _ in range(FILES):
+        lines = [random.choice(BAD if random.random() < ERROR_RATE else GOOD) for _ in range(LINES)]
+        files.append(["int main() {", *lines, "}"])
+    return files
+
+
+def lint_with_recovery(files) -> int:
+    found = 0
+    for lines in files:
+        parser = Parser(Lexer("\n".join(lines)), recover=True)
+        parser.parse()
+        found += len(parser.diagnostics)
+    return found
+
+
+def lint_first_error(files) -> int:
+    found = 0
+    for lines in files:
+        lines = list(lines)
+        while True:
+            try:
+                Parser(Lexer("\n".join(lines))).parse()
+                break
+            except SyntaxError as e:
+                found += 1
+                del lines[e.line_num - 1]
+    return found
+
+
+def main():
+    files = corpus()
+    print(f"{FILES} files, {LINES} lines each, {ERROR_RATE:.0%} broken lines")
+    for name, lint in (("first error, rerun", lint_first_error), ("recovery, one pass", lint_with_recovery)):
+        start = time.perf_counter()
+        found = lint(files)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>20}: {found:>5} errors {elapsed:>7.2f} s {found / elapsed:>8.0f} errors/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Latency of one keystroke: TokenTable.relex against lexing the whole file again
+Edits type and delete characters around a cursor in the middle of the file
+"""
+import os
+import random
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+
+BLOCK = """int a = 5, b = a + 3 * (a - 1); /* comment */
+const char * s = "text";
+cout << s << a << b;
+"""
+EDITS = 200
+
+
+def main():
+    random.seed(0)
+    print(f"{'lines':>8} {'full lex ms':>12} {'relex ms':>10}")
+    for blocks in (300, 3000, 30000):
+        code = BLOCK * blocks
+        start = time.perf_counter()
+        table = TokenTable.from_lexer(Lexer(code))
+        full = time.perf_counter() - start
+
+        cursor = table.code.find('(', len(code) // 2) + 1
+        start = time.perf_counter()
+        for _ in range(EDITS):
+            if random.random() < 0.7:
+                table.relex(cursor, 0, random.choice('abc123+ '))
+                cursor += 1
+            else:
+                table.relex(cursor - 1, 1, '')
+                cursor -= 1
+            cursor += random.choice((-1, 0, 0, 1))
+        relex = (time.perf_counter() - start) / EDITS
+        print(f"{blocks * 3:>8} {full * 1000:>12.2f} {relex * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
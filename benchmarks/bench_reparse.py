@@ -0,0 +1,83 @@
+"""
+Latency of a one-line edit in a 50k-line file: TokenTable.relex with IncrementalParser.reparse
+against lexing and parsing the whole file again
+Edits land a few lines around a cursor in the middle of the file, like typing does
+"""
+import os
+import random
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.incremental import IncrementalParser
+from syntax_analyzer.parser import Parser
+
+BLOCK = """    while (x < 10) {
+        int a = 5, b = a + 3 * (a - 1);
+        if (a == b) {
+            x = x + 1;
+        } else {
+            x = x - 1;
+        }
+        cout << a << b << endl;
+        y = a > b ? a : b;
+    }
+"""
+LINES = 50_000
+COUNT = 50
+STATEMENT = "        x = 2;\n"
+
+
+def change_number(code: str, offset: int):
+    return code.find("a + 3", offset) + 4, 1, random.choice("123456789")
+
+
+def add_statement(code: str, offset: int):
+    return code.find("\n", offset) + 1, 0, STATEMENT
+
+
+def remove_statement(code: str, offset: int):
+    position = code.find(STATEMENT, offset)
+    if position == -1:
+        position = code.find(STATEMENT)
+    return position, len(STATEMENT), ""
+
+
+#  statements removed are the ones added before
+EDITS = {
+    "change a number": change_number,
+    "add a statement": add_statement,
+    "remove a statement": remove_statement,
+}
+
+
+def main():
+    random.seed(0)
+    blocks = LINES // BLOCK.count("\n")
+    code = "int x = 0, y;\nint main() {\n" + BLOCK * blocks + "}\nint z = 1;\n"
+
+    start = time.perf_counter()
+    table = TokenTable.from_lexer(Lexer(code))
+    tree = Parser(table).parse()
+    full = time.perf_counter() - start
+
+    print(f"lines: {code.count(chr(10))}, full lex and parse: {full * 1000:.1f} ms")
+    cursor = len(code) // 2
+    for name, edit in EDITS.items():
+        elapsed = 0
+        for _ in range(COUNT):
+            cursor += random.randrange(-1000, 1000)
+            offset = max(0, cursor)
+            start = time.perf_counter()
+            first, old_stop, new_stop = table.relex(*edit(table.code, offset))
+            tree = IncrementalParser(table).reparse(tree, first, old_stop, new_stop)
+            elapsed += time.perf_counter() - start
+        print(f"{name:>20}: {elapsed / COUNT * 1000:8.3f} ms per edit")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Peak memory and time to the first statement: Parser.parse against Parser.iter_program
+on generated programs with a growing main
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from syntax_analyzer.parser import Parser, MAIN_STATEMENTS
+
+STATEMENTS = """    int a = 5, b = a + 3 * (a - 1);
+    if (a == b) { x = x + 1; } else { x = x - 1; }
+    cout << a << b << endl;
+"""
+
+
+def peak(function) -> float:
+    tracemalloc.start()
+    function()
+    result = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result / 2 ** 20
+
+
+def stream(code: str) -> None:
+    for _ in Parser(Lexer(code)).iter_program():
+        pass
+
+
+def first_statement(code: str) -> float:
+    start = time.perf_counter()
+    for section, _ in Parser(Lexer(code)).iter_program():
+        if section == MAIN_STATEMENTS:
+            return time.perf_counter() - start
+
+
+def main():
+    print(f"{'lines':>8} {'parse MiB':>10} {'stream MiB':>11} {'parse s':>8} {'first statement ms':>19}")
+    for count in (1000, 5000, 20000):
+        code = "int x = 0;\nint main() {\n" + STATEMENTS * count + "}\n"
+        start = time.perf_counter()
+        Parser(Lexer(code)).parse()
+        elapsed = time.perf_counter() - start
+        print(f"{count * 3:>8} {peak(lambda: Parser(Lexer(code)).parse()):>10.1f} {peak(lambda: stream(code)):>11.2f}"
+              f" {elapsed:>8.2f} {first_statement(code) * 1000:>19.2f}")
+
+
+if __name__ == '__main__':
+    main()
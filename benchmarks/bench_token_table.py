@@ -0,0 +1,51 @@
+"""
+Retained memory per token with positions:
+a list of (Token, position) pairs against a TokenTable
+"""
+import os
+import sys
+import tracemalloc
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from lexical_analyzer.token_types import EOF
+
+BLOCK = """int alpha = 5, beta = alpha + 3 * (alpha - 1);
+const char * s = "text";
+cout << s << alpha << beta << 2.5;
+"""
+
+
+def token_list(code: str) -> list:
+    lexer = Lexer(code)
+    tokens = []
+    while True:
+        token = lexer.get_next_token()
+        tokens.append((token, lexer.token_position))
+        if token.type == EOF:
+            return tokens
+
+
+def retained(build, code: str) -> int:
+    tracemalloc.start()
+    result = build(code)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, len(result)
+
+
+def main():
+    code = BLOCK * 5000
+    list_size, count = retained(token_list, code)
+    table_size, _ = retained(lambda c: TokenTable.from_lexer(Lexer(c)), code)
+    print(f"tokens: {count}")
+    print(f"list:       {list_size / count:>7.1f} bytes/token")
+    print(f"table:      {table_size / count:>7.1f} bytes/token")
+    print(f"ratio: {list_size / table_size:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+The loop heavy programs of bench_compiler run by the tree walking Interpreter, the
+closure Compiler and as Python transpiled by Transpiler: time to transpile and compile
+the module, to load it back from CodeCache and to run it
+"""
+import io
+import os
+import sys
+import tempfile
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from bench_compiler import PROGRAMS
+from interpreter.code_cache import CodeCache
+from interpreter.compiler import Compiler
+from interpreter.interpreter import Interpreter
+from interpreter.transpiler import Transpiler
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def transpiled(tree, cache: CodeCache, key: str):
+    cache.put(key, Transpiler().transpile(tree))
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CodeCache(directory)
+        for name, code in PROGRAMS.items():
+            tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+            key = cache.key(code)
+            outputs = [io.StringIO() for _ in range(3)]
+            _, walk = timed(lambda: Interpreter(outputs[0]).interpret(tree))
+            _, closures = timed(lambda: Compiler(outputs[1]).compile(tree)())
+            _, transpile = timed(lambda: transpiled(tree, cache, key))
+            python, load = timed(lambda: Transpiler(outputs[2]).load(cache.get(key)))
+            _, run = timed(python)
+            assert outputs[0].getvalue() == outputs[1].getvalue() == outputs[2].getvalue()
+            print(f"{name:>18}: walk {walk * 1000:8.1f} ms, closures {closures * 1000:7.1f} ms,"
+                  f" python: transpile {transpile * 1000:5.2f} ms, cached load {load * 1000:5.2f} ms,"
+                  f" run {run * 1000:6.1f} ms, {walk / run:5.1f}x the walker")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Full-tree walks with NodeVisitor: dispatch through the per-class table against building
+'visit_' + class name and calling getattr for every node
+"""
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.node_visitor import NodeVisitor
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.flat_tree import FIELDS, LIST
+from syntax_analyzer.parser import Parser
+
+BLOCK = """    while (x < 10) {
+        int a = 5, b = a + 3 * (a - 1);
+        if (a == b) {
+            x = x + 1;
+        } else {
+            x = -x - 1;
+        }
+        cout << a << b << endl;
+        y = a > b ? a : b;
+        for (int i = 0; i < 3; i++) { y += i; }
+    }
+"""
+BLOCKS = 5000
+RUNS = 5
+
+
+def walk(self, node):
+    """ Visits every child of 'node', counts the nodes """
+    count = 1
+    for name, shape in FIELDS[type(node)]:
+        value = getattr(node, name)
+        if shape == LIST:
+            for item in value:
+                count += self.visit(item)
+        elif value is not None:
+            count += self.visit(value)
+    return count
+
+
+Walk = type("Walk", (NodeVisitor,), {'visit_' + cls.__name__.lower(): walk for cls in FIELDS})
+
+
+class GetattrWalk(Walk):
+    """ Dispatch as it was before the table """
+
+    def visit(self, node):
+        method_name = 'visit_' + type(node).__name__.lower()
+        visitor = getattr(self, method_name, self.generic_visit)
+        return visitor(node)
+
+
+def main():
+    code = "int x = 0, y;\nint main() {\n" + BLOCK * BLOCKS + "}\n"
+    tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+    for name, visitor in (("getattr", GetattrWalk()), ("table", Walk())):
+        best = float("inf")
+        for _ in range(RUNS):
+            start = time.perf_counter()
+            nodes = visitor.visit(tree)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>8}: {best * 1000:7.1f} ms per walk, {best / nodes * 1e9:6.0f} ns per node ({nodes} nodes)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+The loop heavy programs of bench_compiler run by the tree walking Interpreter and by the
+register VM: time to compile the bytecode, to run it, instructions run per second,
+then the profile of one program
+"""
+import io
+import os
+import sys
+import time
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from bench_compiler import PROGRAMS
+from interpreter.bytecode import WIDTH, BytecodeCompiler
+from interpreter.interpreter import Interpreter
+from interpreter.vm import VM, Profiler
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+
+PROFILED = "collatz"
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    profiles = {}
+    for name, code in PROGRAMS.items():
+        tree = Parser(TokenTable.from_lexer(Lexer(code))).parse()
+        walk_output, vm_output = io.StringIO(), io.StringIO()
+        _, walk = timed(lambda: Interpreter(walk_output).interpret(tree))
+        bytecode, compile_time = timed(lambda: BytecodeCompiler().compile(tree))
+        _, run = timed(lambda: VM(bytecode, vm_output).run())
+        assert walk_output.getvalue() == vm_output.getvalue()
+        profiler = profiles[name] = Profiler(bytecode)
+        VM(bytecode, io.StringIO()).profile(profiler)
+        instructions = sum(profiler.counts)
+        print(f"{name:>18}: walk {walk * 1000:8.1f} ms, compile {compile_time * 1000:5.2f} ms"
+              f" ({len(bytecode.code) // WIDTH} instructions), run {run * 1000:7.1f} ms,"
+              f" {instructions / run / 1e6:5.1f} M instructions/s, {walk / run:4.1f}x the walker")
+    print()
+    print(f"profile of {PROFILED}:")
+    print(profiles[PROFILED].report())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,639 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from interpreter.compiler import Slot
+from interpreter.loops import CountedLoop, counted_loop
+from interpreter.node_visitor import NodeVisitor
+from interpreter.runtime import *
+from syntax_analyzer.tree import *
+
+#  Instruction set of the register VM (see vm.VM)
+#  An instruction is WIDTH ints of 'code': opcode and operands a, b, c; r[x] is register x
+#  Constants live in registers of their own, loaded once before the program runs
+(
+    MOVE,                                   # r[a] = r[b]
+    ADD_INT, SUB_INT, MUL_INT, DIV_INT, MOD_INT,
+    SHL_INT, SHR_INT, AND_INT, OR_INT, XOR_INT,     # r[a] = r[b] op r[c] wrapped at 32 bits
+    NEG_INT, INV_INT, NOT_BOOL,             # r[a] = op r[b]
+    ADD_DOUBLE, SUB_DOUBLE, MUL_DOUBLE, DIV_DOUBLE,  # r[a] = r[b] op r[c]
+    NEG_DOUBLE,                             # r[a] = -r[b]
+    TEST_EQ, TEST_NE, TEST_LT, TEST_GT, TEST_LE, TEST_GE,   # r[a] = r[b] op r[c]
+    TO_DOUBLE, TO_BOOL, TO_INT, BOOL_TO_INT, TO_CHAR, DOUBLE_TO_CHAR,   # r[a] = r[b] converted
+    INC_INT, INC_CHAR, INC_BOOL, INC_DOUBLE,         # r[a] += b, the immediate b is the sum of ++ and --
+    JUMP,                                   # go to a
+    JUMP_IF, JUMP_UNLESS,                   # go to b if r[a] is true (false)
+    JUMP_EQ, JUMP_NE, JUMP_LT, JUMP_GT, JUMP_LE, JUMP_GE,   # go to c if r[a] op r[b]
+    JUMP_TABLE,                             # go to tables[b][r[a]], to c if it is not there
+    LOOP_LT, LOOP_LE,                       # r[a] += 1 wrapped at 32 bits, go to c if r[a] op r[b]
+    WRITE,                                  # print r[a] as a value of type TYPES[b]
+    EXIT,                                   # main returns r[a]
+    HALT,                                   # main returns 0
+) = range(50)
+OPCODE_NAMES = [
+    'MOVE',
+    'ADD_INT', 'SUB_INT', 'MUL_INT', 'DIV_INT', 'MOD_INT',
+    'SHL_INT', 'SHR_INT', 'AND_INT', 'OR_INT', 'XOR_INT',
+    'NEG_INT', 'INV_INT', 'NOT_BOOL',
+    'ADD_DOUBLE', 'SUB_DOUBLE', 'MUL_DOUBLE', 'DIV_DOUBLE',
+    'NEG_DOUBLE',
+    'TEST_EQ', 'TEST_NE', 'TEST_LT', 'TEST_GT', 'TEST_LE', 'TEST_GE',
+    'TO_DOUBLE', 'TO_BOOL', 'TO_INT', 'BOOL_TO_INT', 'TO_CHAR', 'DOUBLE_TO_CHAR',
+    'INC_INT', 'INC_CHAR', 'INC_BOOL', 'INC_DOUBLE',
+    'JUMP',
+    'JUMP_IF', 'JUMP_UNLESS',
+    'JUMP_EQ', 'JUMP_NE', 'JUMP_LT', 'JUMP_GT', 'JUMP_LE', 'JUMP_GE',
+    'JUMP_TABLE',
+    'LOOP_LT', 'LOOP_LE',
+    'WRITE',
+    'EXIT',
+    'HALT',
+]
+WIDTH = 4
+#  Operands of every opcode, for the disassembler: r register, i immediate, j jump target,
+#  t jump table, f type printed
+OPERANDS = (
+    ['rr'] + ['rrr'] * 10 + ['rr'] * 3 + ['rrr'] * 4 + ['rr'] + ['rrr'] * 6 + ['rr'] * 6 + ['ri'] * 4
+    + ['j'] + ['rj'] * 2 + ['rrj'] * 6 + ['rtj'] + ['rrj'] * 2 + ['rf'] + ['r'] + ['']
+)
+#  Operand holding the target of a jump
+JUMP_FIELDS = {JUMP: 1, JUMP_IF: 2, JUMP_UNLESS: 2, JUMP_EQ: 3, JUMP_NE: 3, JUMP_LT: 3, JUMP_GT: 3,
+               JUMP_LE: 3, JUMP_GE: 3, JUMP_TABLE: 3, LOOP_LT: 3, LOOP_LE: 3}
+#  Instructions setting r[a] from other registers only, their result can be retargeted
+WRITES_A = set(range(MOVE, INC_INT))
+
+TYPES = (INTEGER, CHAR, BOOL, DOUBLE, STRING)
+INT_OPCODES = {PLUS: ADD_INT, MINUS: SUB_INT, ASTERIKS: MUL_INT, DIVIDE: DIV_INT, MOD: MOD_INT,
+               LEFT_OP: SHL_INT, RIGHT_OP: SHR_INT, AND_OP: AND_INT, OR_OP: OR_INT, XOR_OP: XOR_INT}
+DOUBLE_OPCODES = {PLUS: ADD_DOUBLE, MINUS: SUB_DOUBLE, ASTERIKS: MUL_DOUBLE, DIVIDE: DIV_DOUBLE}
+TEST_OPCODES = {EQUAL: TEST_EQ, NOT_EQUAL: TEST_NE, LESS: TEST_LT, GREATER: TEST_GT, LE_OP: TEST_LE, GE_OP: TEST_GE}
+JUMP_OPCODES = {EQUAL: JUMP_EQ, NOT_EQUAL: JUMP_NE, LESS: JUMP_LT, GREATER: JUMP_GT, LE_OP: JUMP_LE, GE_OP: JUMP_GE}
+#  comparison true exactly when the other one is false, for operands that are not nan
+NEGATED = {EQUAL: NOT_EQUAL, NOT_EQUAL: EQUAL, LESS: GE_OP, GREATER: LE_OP, LE_OP: GREATER, GE_OP: LESS}
+INCREMENT_OPCODES = {INTEGER: INC_INT, CHAR: INC_CHAR, BOOL: INC_BOOL, DOUBLE: INC_DOUBLE}
+
+#  (type, register, True if the register is a temporary to release once it is read)
+Value = Tuple[str, int, bool]
+
+
+class Bytecode:
+    """
+    A compiled Program: 'code' holds the instructions, 'registers' is the size of the
+    register file, constants[i] is loaded into register constant_registers[i] before
+    the program runs, 'tables' are the jump tables of switches (label value -> target)
+    """
+    __slots__ = ('code', 'registers', 'constants', 'constant_registers', 'tables')
+
+    def __init__(self, code: array, registers: int, constants: list, constant_registers: array,
+                 tables: List[Dict[object, int]]):
+        self.code = code
+        self.registers = registers
+        self.constants = constants
+        self.constant_registers = constant_registers
+        self.tables = tables
+
+
+class Target:
+    """ Loop or switch being compiled, the jumps of its break (and continue) statements to patch """
+    __slots__ = ('loop', 'breaks', 'continues')
+
+    def __init__(self, loop: bool):
+        self.loop = loop
+        self.breaks = []
+        self.continues = []
+
+
+class BytecodeCompiler(NodeVisitor):
+    """
+    Compiles a Program into Bytecode for the register VM
+    Semantics come from 'runtime', shared with the tree walking Interpreter
+    Every declaration gets a register of its own, so block scoping costs nothing;
+    temporaries are released once read and reused
+    Loops are compiled with the condition after the body, one conditional jump per
+    iteration; comparisons in conditions become a single compare-and-jump, && || and !
+    become jumps; a counted for loop (see loops.counted_loop) increments and tests its
+    counter with one instruction
+    Expressions are visited into a Value, statements append instructions
+    """
+
+    def __init__(self):
+        self.code = array('i')
+        self.registers = 0
+        self.free = []
+        self.constants = []
+        self.constant_registers = array('i')
+        self.constant_indices = {}
+        self.tables = []
+        self.scope = Scope()
+        self.targets = []
+        self.in_main = False
+        self.label = -1
+        self.effects = {}
+
+    def compile(self, tree: Program) -> Bytecode:
+        try:
+            self.visit(tree)
+        except RecursionError:
+            raise InterpreterError("Program nested too deep to compile")
+        return Bytecode(self.code, self.registers, self.constants, self.constant_registers, self.tables)
+
+    # registers and instructions
+
+    def register(self) -> int:
+        self.registers += 1
+        return self.registers - 1
+
+    def temporary(self) -> int:
+        return self.free.pop() if self.free else self.register()
+
+    def release(self, value: Value) -> None:
+        if value[2]:
+            self.free.append(value[1])
+
+    def constant(self, value) -> int:
+        """ Register holding constant 'value' """
+        # repr keeps 0.0 and -0.0 apart
+        key = (type(value), repr(value))
+        register = self.constant_indices.get(key)
+        if register is None:
+            register = self.constant_indices[key] = self.register()
+            self.constants.append(value)
+            self.constant_registers.append(register)
+        return register
+
+    def emit(self, opcode: int, a: int = 0, b: int = 0, c: int = 0) -> int:
+        """ :return: position of the instruction """
+        position = len(self.code)
+        self.code.extend((opcode, a, b, c))
+        return position
+
+    def here(self) -> int:
+        """ Position of the next instruction, as the target of a jump """
+        self.label = len(self.code)
+        return self.label
+
+    def patch(self, positions: List[int], target: int) -> None:
+        code = self.code
+        for position in positions:
+            code[position + JUMP_FIELDS[code[position]]] = target
+
+    def into(self, register: int, value: Value) -> None:
+        """ Stores 'value' in 'register' """
+        code = self.code
+        last = len(code) - WIDTH
+        if value[2] and last >= 0 and self.label != len(code) and code[last] in WRITES_A and code[last + 1] == value[1]:
+            # the instruction computing the value writes it where it belongs
+            code[last + 1] = register
+        elif value[1] != register:
+            self.emit(MOVE, register, value[1])
+        self.release(value)
+
+    def slot(self, node: Variable) -> Slot:
+        slot = self.scope.lookup(node.value)
+        if slot is None:
+            raise InterpreterError(f"Undeclared variable {node.value}")
+        return slot
+
+    def statement(self, node: AST) -> None:
+        """ Compiles a statement, an expression is evaluated for its side effects """
+        if isinstance(node, PostfixOp):
+            # the value is not used, only the variable is updated
+            self.increment(node.expr, INCREMENTS[node.token.type])
+            return
+        value = self.visit(node)
+        if isinstance(value, tuple):
+            self.release(value)
+
+    def expression(self, node: AST) -> Value:
+        value = self.visit(node)
+        if not isinstance(value, tuple):
+            raise InterpreterError(f"{type(node).__name__} is not an expression")
+        return value
+
+    def has_effects(self, node: AST) -> bool:
+        """ True if evaluating expression 'node' changes a variable """
+        key = id(node)
+        result = self.effects.get(key)
+        if result is None:
+            if isinstance(node, (PrefixOp, PostfixOp)):
+                result = True
+            elif isinstance(node, (BinOp, ConditionLoop)):
+                result = self.has_effects(node.left) or self.has_effects(node.right)
+            elif isinstance(node, UnaryOp):
+                result = self.has_effects(node.expr)
+            elif isinstance(node, TernaryOp):
+                result = any(self.has_effects(child) for child in (node.condition, node.first_expr, node.second_expr))
+            else:
+                result = False
+            self.effects[key] = result
+        return result
+
+    def operands(self, node: AST) -> Tuple[Value, Value]:
+        """ Values of both operands of a binary operator, the left one read before the right one runs """
+        left = self.expression(node.left)
+        if not left[2] and self.has_effects(node.right):
+            register = self.temporary()
+            self.emit(MOVE, register, left[1])
+            left = (left[0], register, True)
+        return left, self.expression(node.right)
+
+    def converted(self, target: str, value: Value) -> Value:
+        source = value[0]
+        if converter(target, source) is None:
+            return target, value[1], value[2]
+        if target == DOUBLE:
+            opcode = TO_DOUBLE
+        elif target == BOOL:
+            opcode = TO_BOOL
+        elif target == INTEGER:
+            opcode = TO_INT if source == DOUBLE else BOOL_TO_INT
+        else:
+            opcode = DOUBLE_TO_CHAR if source == DOUBLE else TO_CHAR
+        self.release(value)
+        register = self.temporary()
+        self.emit(opcode, register, value[1])
+        return target, register, True
+
+    def branch(self, node: AST, when: bool) -> List[int]:
+        """
+        Compiles a condition jumping when it is 'when', execution goes on after it otherwise
+        :return: positions of the jumps to patch
+        """
+        if isinstance(node, NoOp):
+            # condition of a loop that only a break or return ends, it is always true
+            return [self.emit(JUMP)] if when else []
+        if isinstance(node, (BinOp, ConditionLoop)) and node.token.type in LOGICAL_OPS:
+            if (node.token.type == LOG_AND) == when:
+                # both operands must be 'when' to jump
+                skip = self.branch(node.left, not when)
+                jumps = self.branch(node.right, when)
+                self.patch(skip, self.here())
+                return jumps
+            return self.branch(node.left, when) + self.branch(node.right, when)
+        if isinstance(node, UnaryOp) and node.token.type == LOG_NOT:
+            return self.branch(node.expr, not when)
+        if isinstance(node, (BinOp, ConditionLoop)) and node.token.type in COMPARISON_OPS:
+            op = node.token.type
+            left, right = self.operands(node)
+            binary_type(op, left[0], right[0])
+            if not when and DOUBLE not in (left[0], right[0]):
+                op, when = NEGATED[op], True
+            if when:
+                self.release(left)
+                self.release(right)
+                return [self.emit(JUMP_OPCODES[op], left[1], right[1])]
+            value = self.test(op, left, right)
+        else:
+            value = self.expression(node)
+            check_condition(value[0])
+        self.release(value)
+        return [self.emit(JUMP_IF if when else JUMP_UNLESS, value[1])]
+
+    def test(self, op: str, left: Value, right: Value) -> Value:
+        """ Value of 'left op right' (not for && and ||) """
+        type = binary_type(op, left[0], right[0])
+        if op in COMPARISON_OPS:
+            opcode = TEST_OPCODES[op]
+        elif type == DOUBLE:
+            opcode = DOUBLE_OPCODES[op]
+        else:
+            opcode = INT_OPCODES[op]
+        self.release(left)
+        self.release(right)
+        register = self.temporary()
+        self.emit(opcode, register, left[1], right[1])
+        return type, register, True
+
+    def increment(self, node: AST, delta: int) -> Slot:
+        """ Applies 'delta' to variable 'node' """
+        slot = self.slot(node)
+        check_condition(slot.type)
+        self.emit(INCREMENT_OPCODES[slot.type], slot.index, delta)
+        return slot
+
+    def type_of(self, node: AST) -> str:
+        """ Type of expression 'node', found without compiling it """
+        if isinstance(node, (Num, String, Bool)):
+            return LITERAL_TYPES[node.token.type]
+        if isinstance(node, Variable):
+            return self.slot(node).type
+        if isinstance(node, (PrefixOp, PostfixOp)):
+            while not isinstance(node, Variable):
+                node = node.expr
+            return self.slot(node).type
+        if isinstance(node, (BinOp, ConditionLoop)):
+            return binary_type(node.token.type, self.type_of(node.left), self.type_of(node.right))
+        if isinstance(node, UnaryOp):
+            return unary_type(node.token.type, self.type_of(node.expr))
+        if isinstance(node, TernaryOp):
+            return common_type(self.type_of(node.first_expr), self.type_of(node.second_expr))
+        raise InterpreterError(f"{type(node).__name__} is not an expression")
+
+    # statements
+
+    def visit_program(self, node: Program):
+        for declaration in node.declarations_before:
+            self.statement(declaration)
+        # globals declared after main are initialised before it runs, like in the Interpreter main does not see them
+        after = self.emit(JUMP) if node.declarations_after else None
+        main = self.here()
+        self.in_main = True
+        self.visit(node.main_function)
+        self.in_main = False
+        self.emit(HALT)
+        if after is not None:
+            self.patch([after], self.here())
+            for declaration in node.declarations_after:
+                self.statement(declaration)
+            self.emit(JUMP, main)
+
+    def visit_imports(self, node: Imports):
+        pass
+
+    def visit_mainfunction(self, node: MainFunction):
+        self.visit(node.compound_statement)
+
+    def visit_compound(self, node: Compound):
+        self.scope = Scope(self.scope)
+        for child in node.children:
+            self.statement(child)
+        self.scope = self.scope.parent
+
+    def visit_vardecl(self, node: VarDecl):
+        type = TYPE_OF_SPEC[node.type_node.token.type]
+        register = self.register()
+        self.scope.declare(node.var_node.value, Slot(type, register))
+        self.emit(MOVE, register, self.constant(DEFAULT_VALUES[type]))
+
+    def visit_assign(self, node: Assign):
+        slot = self.slot(node.left)
+        value = self.expression(node.right)
+        op = node.op.type
+        if op != ASSIGN:
+            # the variable is read after the right operand ran
+            value = self.test(ASSIGN_BINARY_OPS[op], (slot.type, slot.index, False), value)
+        self.into(slot.index, self.converted(slot.type, value))
+
+    def visit_print(self, node: Print):
+        # every part is evaluated before anything is written, a failing part prints nothing
+        parts = []
+        text = ""
+        for index, child in enumerate(node.children):
+            if isinstance(child, Variable) and child.value == ENDL_V and self.scope.lookup(ENDL_V) is None:
+                text += "\n"
+            elif isinstance(child, String):
+                text += literal(STRING, child.value)
+            else:
+                if text:
+                    parts.append((STRING, self.constant(text), False))
+                    text = ""
+                value = self.expression(child)
+                if not value[2] and any(self.has_effects(later) for later in node.children[index + 1:]):
+                    register = self.temporary()
+                    self.emit(MOVE, register, value[1])
+                    value = (value[0], register, True)
+                parts.append(value)
+        if text:
+            parts.append((STRING, self.constant(text), False))
+        for value in parts:
+            self.emit(WRITE, value[1], TYPES.index(value[0]))
+            self.release(value)
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        skip = self.branch(node.condition, False)
+        self.statement(node.if_body)
+        if isinstance(node.else_body, NoOp):
+            self.patch(skip, self.here())
+            return
+        end = self.emit(JUMP)
+        self.patch(skip, self.here())
+        self.statement(node.else_body)
+        self.patch([end], self.here())
+
+    def loop(self, body: AST) -> Target:
+        target = Target(loop=True)
+        self.targets.append(target)
+        self.statement(body)
+        self.targets.pop()
+        return target
+
+    def visit_whilestatement(self, node: WhileStatement):
+        enter = self.emit(JUMP)
+        body = self.here()
+        target = self.loop(node.body)
+        test = self.here()
+        self.patch([enter] + target.continues, test)
+        self.patch(self.branch(node.condition, True), body)
+        self.patch(target.breaks, self.here())
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        body = self.here()
+        target = self.loop(node.body)
+        self.patch(target.continues, self.here())
+        self.patch(self.branch(node.condition, True), body)
+        self.patch(target.breaks, self.here())
+
+    def visit_forstatement(self, node: ForStatement):
+        self.scope = Scope(self.scope)
+        if isinstance(node.init, Compound):
+            for declaration in node.init.children:
+                self.statement(declaration)
+        else:
+            self.statement(node.init)
+        counted = counted_loop(node)
+        if counted is not None and self.counted(counted, node.body):
+            self.scope = self.scope.parent
+            return
+        enter = self.emit(JUMP)
+        body = self.here()
+        target = self.loop(node.body)
+        self.patch(target.continues, self.here())
+        self.statement(node.action)
+        self.patch([enter], self.here())
+        self.patch(self.branch(node.condition, True), body)
+        self.patch(target.breaks, self.here())
+        self.scope = self.scope.parent
+
+    def counted(self, counted: CountedLoop, node: AST) -> bool:
+        """
+        Compiles a loop that is a CountedLoop with body 'node', its stop evaluated once
+        into a register, False if the types do not allow it
+        """
+        slot = self.scope.lookup(counted.variable)
+        if slot.type != INTEGER or self.type_of(counted.stop) not in INTEGRAL:
+            return False
+        stop = self.expression(counted.stop)
+        op = LE_OP if counted.inclusive else LESS
+        skip = self.emit(JUMP_OPCODES[NEGATED[op]], slot.index, stop[1])
+        body = self.here()
+        target = self.loop(node)
+        self.patch(target.continues, self.here())
+        self.emit(LOOP_LE if counted.inclusive else LOOP_LT, slot.index, stop[1], body)
+        self.patch([skip] + target.breaks, self.here())
+        # a temporary holding the stop is kept until the loop ends
+        self.release(stop)
+        return True
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        value = self.expression(node.condition)
+        if value[0] not in INTEGRAL:
+            raise InterpreterError(f"Switch on {value[0]}")
+        cases = node.case_statements
+        if all(isinstance(case.condition, (Num, Bool)) for case in cases):
+            table = {}
+            for index, case in enumerate(cases):
+                table.setdefault(literal(LITERAL_TYPES[case.condition.token.type], case.condition.value), index)
+            self.release(value)
+            self.tables.append(table)
+            jumps = [self.emit(JUMP_TABLE, value[1], len(self.tables) - 1)]
+        else:
+            table = None
+            jumps = []
+            for case in cases:
+                label = self.expression(case.condition)
+                self.release(label)
+                jumps.append(self.emit(JUMP_EQ, value[1], label[1]))
+            self.release(value)
+            jumps.append(self.emit(JUMP))
+
+        bodies = [case.body for case in cases]
+        if not isinstance(node.default_statement, NoOp):
+            bodies.append(node.default_statement.body)
+        target = Target(loop=False)
+        self.targets.append(target)
+        starts = []
+        for body in bodies:
+            starts.append(self.here())
+            self.statement(body)
+        self.targets.pop()
+        end = self.here()
+        default = starts[len(cases)] if len(bodies) > len(cases) else end
+        if table is not None:
+            for label, index in table.items():
+                table[label] = starts[index]
+            self.patch(jumps, default)
+        else:
+            for jump, start in zip(jumps, starts[:len(cases)] + [default]):
+                self.patch([jump], start)
+        self.patch(target.breaks, end)
+
+    def visit_breakstatement(self, node: BreakStatement):
+        if not self.targets:
+            raise InterpreterError("break outside of a loop or switch")
+        self.targets[-1].breaks.append(self.emit(JUMP))
+
+    def visit_continuestatement(self, node: ContinueStatement):
+        for target in reversed(self.targets):
+            if target.loop:
+                target.continues.append(self.emit(JUMP))
+                return
+        raise InterpreterError("continue outside of a loop")
+
+    def visit_returnstatement(self, node: ReturnStatement):
+        if not self.in_main:
+            raise InterpreterError("return outside of main")
+        if isinstance(node.expr, NoOp):
+            self.emit(HALT)
+            return
+        value = self.converted(INTEGER, self.expression(node.expr))
+        self.release(value)
+        self.emit(EXIT, value[1])
+
+    def visit_noop(self, node: NoOp):
+        pass
+
+    def visit_errornode(self, node: ErrorNode):
+        raise InterpreterError(f"Can not run a program with syntax errors: {node.error}")
+
+    # expressions
+
+    def visit_num(self, node: Num) -> Value:
+        type = LITERAL_TYPES[node.token.type]
+        return type, self.constant(literal(type, node.value)), False
+
+    visit_string = visit_num
+    visit_bool = visit_num
+
+    def visit_variable(self, node: Variable) -> Value:
+        slot = self.slot(node)
+        return slot.type, slot.index, False
+
+    def visit_binop(self, node: BinOp) -> Value:
+        if node.token.type in LOGICAL_OPS:
+            register = self.temporary()
+            jumps = self.branch(node, False)
+            self.emit(MOVE, register, self.constant(True))
+            end = self.emit(JUMP)
+            self.patch(jumps, self.here())
+            self.emit(MOVE, register, self.constant(False))
+            self.patch([end], self.here())
+            return BOOL, register, True
+        left, right = self.operands(node)
+        return self.test(node.token.type, left, right)
+
+    visit_conditionloop = visit_binop
+
+    def visit_unaryop(self, node: UnaryOp) -> Value:
+        op = node.token.type
+        value = self.expression(node.expr)
+        type = unary_type(op, value[0])
+        if op in TYPE_OF_SPEC:
+            return self.converted(type, value)
+        if op == LOG_NOT:
+            opcode = NOT_BOOL
+        elif op == NOT_OP:
+            opcode = INV_INT
+        elif op == MINUS:
+            opcode = NEG_DOUBLE if type == DOUBLE else NEG_INT
+        elif value[0] == BOOL:
+            opcode = BOOL_TO_INT
+        else:
+            return type, value[1], value[2]
+        self.release(value)
+        register = self.temporary()
+        self.emit(opcode, register, value[1])
+        return type, register, True
+
+    def visit_prefixop(self, node: PrefixOp) -> Value:
+        delta = 0
+        while isinstance(node, PrefixOp):
+            delta += INCREMENTS[node.token.type]
+            node = node.expr
+        slot = self.increment(node, delta)
+        return slot.type, slot.index, False
+
+    def visit_postfixop(self, node: PostfixOp) -> Value:
+        slot = self.slot(node.expr)
+        register = self.temporary()
+        self.emit(MOVE, register, slot.index)
+        self.increment(node.expr, INCREMENTS[node.token.type])
+        return slot.type, register, True
+
+    def visit_ternaryop(self, node: TernaryOp) -> Value:
+        type = common_type(self.type_of(node.first_expr), self.type_of(node.second_expr))
+        register = self.temporary()
+        skip = self.branch(node.condition, False)
+        self.into(register, self.converted(type, self.expression(node.first_expr)))
+        end = self.emit(JUMP)
+        self.patch(skip, self.here())
+        self.into(register, self.converted(type, self.expression(node.second_expr)))
+        self.patch([end], self.here())
+        return type, register, True
+
+
+def disassemble(bytecode: Bytecode, position: Optional[int] = None) -> str:
+    """ Text of the instruction at 'position', of all of them if it is None """
+    if position is None:
+        return "\n".join(disassemble(bytecode, position) for position in range(0, len(bytecode.code), WIDTH))
+    constants = dict(zip(bytecode.constant_registers, bytecode.constants))
+    opcode = bytecode.code[position]
+    operands = []
+    for kind, operand in zip(OPERANDS[opcode], bytecode.code[position + 1:position + WIDTH]):
+        if kind == 'r':
+            operands.append(f"r{operand}" + (f"={constants[operand]!r}" if operand in constants else ""))
+        elif kind == 'f':
+            operands.append(TYPES[operand])
+        elif kind == 't':
+            operands.append(repr(bytecode.tables[operand]))
+        else:
+            operands.append(str(operand))
+    return f"{position:6d}  {OPCODE_NAMES[opcode]:<14}{', '.join(operands)}"
@@ -0,0 +1,85 @@
+import hashlib
+import importlib.util
+import marshal
+import os
+from types import CodeType
+from typing import Optional, Union
+
+from interpreter.transpiler import TRANSPILER_VERSION, compile_source
+from lexical_analyzer.source import MappedSource
+from syntax_analyzer.ast_cache import ASTCache, FileCache
+
+DEFAULT_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "pythoncpp", "code",
+)
+DEFAULT_MAX_SIZE = 64 << 20
+#  flags of a .pyc checked by the hash of its source (PEP 552), the hash is not checked on load
+UNCHECKED_HASH = 0b01
+
+
+class CodeCache(FileCache):
+    """
+    On-disk cache of programs transpiled to Python (see transpiler.Transpiler)
+    An entry is a .py file with the generated module and a .pyc file next to it with the
+    code compiled from it, in the layout CPython uses; a hit only unmarshals the .pyc
+    Keys hash the transpiler version and the C++ source (see ASTCache.key), the .pyc
+    header holds the magic number of the Python that wrote it, a different Python misses
+    Files are written, touched and evicted as FileCache describes
+    """
+    SUFFIX = ".pyc"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_size: int = DEFAULT_MAX_SIZE):
+        super().__init__(directory, max_size)
+
+    @staticmethod
+    def key(code: Union[str, bytes, MappedSource]) -> str:
+        """ Cache key of a source text """
+        digest = hashlib.sha256(f"transpiler {TRANSPILER_VERSION}\n".encode())
+        digest.update(ASTCache.key(code).encode())
+        return digest.hexdigest()
+
+    def source_path(self, key: str) -> str:
+        """ Path of the generated module, the file name of the code put compiles from it """
+        return os.path.join(self.directory, key + ".py")
+
+    def get(self, key: str) -> Optional[CodeType]:
+        """ Cached code for 'key', None on a miss """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        except OSError:
+            self.remove(path)
+            return None
+        try:
+            if data[:4] != importlib.util.MAGIC_NUMBER:
+                raise ValueError("written by another Python")
+            code = marshal.loads(data[16:])
+        except (ValueError, EOFError, TypeError):
+            self.remove(path)
+            return None
+        for touched in (path, self.source_path(key)):
+            try:
+                os.utime(touched)
+            except OSError:
+                pass
+        return code
+
+    def put(self, key: str, source: str) -> bool:
+        """
+        Store the generated module 'source' and the code compiled from it under 'key', the
+        code gets source_path(key) as its file name
+        InterpreterError if 'source' can not be compiled (see transpiler.compile_source)
+        :return: False if they could not be stored
+        """
+        code = compile_source(source, self.source_path(key))
+        data = source.encode('utf-8')
+        header = importlib.util.MAGIC_NUMBER + UNCHECKED_HASH.to_bytes(4, 'little') + importlib.util.source_hash(data)
+        # the source goes first, a .pyc is not written without it
+        if not (self.write(self.source_path(key), data) and self.write(self.path(key), header + marshal.dumps(code))):
+            return False
+        self.evict()
+        return True
@@ -0,0 +1,660 @@
+import sys
+from typing import Callable, List, Optional, TextIO
+
+from interpreter.loops import CountedLoop, counted_loop
+from interpreter.node_visitor import NodeVisitor
+from interpreter.runtime import *
+from syntax_analyzer.tree import *
+
+#  Operators compiled into closures that compute them inline, one factory per shape of
+#  operands: (any, any), (any, constant), (variable, constant), (variable, variable)
+#  Variables are read straight from their slot, int results wrap at 32 bits
+INT_CODE = {
+    PLUS: (
+        lambda left, right: lambda env: (left(env) + right(env) + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda left, c: lambda env: (left(env) + c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, c: lambda env: (env[i] + c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, j: lambda env: (env[i] + env[j] + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+    ),
+    MINUS: (
+        lambda left, right: lambda env: (left(env) - right(env) + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda left, c: lambda env: (left(env) - c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, c: lambda env: (env[i] - c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, j: lambda env: (env[i] - env[j] + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+    ),
+    ASTERIKS: (
+        lambda left, right: lambda env: (left(env) * right(env) + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda left, c: lambda env: (left(env) * c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, c: lambda env: (env[i] * c + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+        lambda i, j: lambda env: (env[i] * env[j] + 0x80000000 & 0xFFFFFFFF) - 0x80000000,
+    ),
+}
+DOUBLE_CODE = {
+    PLUS: (
+        lambda left, right: lambda env: left(env) + right(env),
+        lambda left, c: lambda env: left(env) + c,
+        lambda i, c: lambda env: env[i] + c,
+        lambda i, j: lambda env: env[i] + env[j],
+    ),
+    MINUS: (
+        lambda left, right: lambda env: left(env) - right(env),
+        lambda left, c: lambda env: left(env) - c,
+        lambda i, c: lambda env: env[i] - c,
+        lambda i, j: lambda env: env[i] - env[j],
+    ),
+    ASTERIKS: (
+        lambda left, right: lambda env: left(env) * right(env),
+        lambda left, c: lambda env: left(env) * c,
+        lambda i, c: lambda env: env[i] * c,
+        lambda i, j: lambda env: env[i] * env[j],
+    ),
+}
+COMPARISON_CODE = {
+    EQUAL: (
+        lambda left, right: lambda env: left(env) == right(env),
+        lambda left, c: lambda env: left(env) == c,
+        lambda i, c: lambda env: env[i] == c,
+        lambda i, j: lambda env: env[i] == env[j],
+    ),
+    NOT_EQUAL: (
+        lambda left, right: lambda env: left(env) != right(env),
+        lambda left, c: lambda env: left(env) != c,
+        lambda i, c: lambda env: env[i] != c,
+        lambda i, j: lambda env: env[i] != env[j],
+    ),
+    LESS: (
+        lambda left, right: lambda env: left(env) < right(env),
+        lambda left, c: lambda env: left(env) < c,
+        lambda i, c: lambda env: env[i] < c,
+        lambda i, j: lambda env: env[i] < env[j],
+    ),
+    GREATER: (
+        lambda left, right: lambda env: left(env) > right(env),
+        lambda left, c: lambda env: left(env) > c,
+        lambda i, c: lambda env: env[i] > c,
+        lambda i, j: lambda env: env[i] > env[j],
+    ),
+    LE_OP: (
+        lambda left, right: lambda env: left(env) <= right(env),
+        lambda left, c: lambda env: left(env) <= c,
+        lambda i, c: lambda env: env[i] <= c,
+        lambda i, j: lambda env: env[i] <= env[j],
+    ),
+    GE_OP: (
+        lambda left, right: lambda env: left(env) >= right(env),
+        lambda left, c: lambda env: left(env) >= c,
+        lambda i, c: lambda env: env[i] >= c,
+        lambda i, j: lambda env: env[i] >= env[j],
+    ),
+}
+ANY_ANY, ANY_CONSTANT, VARIABLE_CONSTANT, VARIABLE_VARIABLE = range(4)
+
+
+def nothing(env):
+    pass
+
+
+def always(env):
+    return True
+
+
+def break_statement(env):
+    return BREAK
+
+
+def continue_statement(env):
+    return CONTINUE
+
+
+def return_statement(env):
+    return RETURN
+
+
+class Slot:
+    """ Index in 'env' of a declared variable """
+    __slots__ = ('type', 'index')
+
+    def __init__(self, type: str, index: int):
+        self.type = type
+        self.index = index
+
+
+class Compiler(NodeVisitor):
+    """
+    Compiles a Program once into nested Python closures taking 'env', the list of all
+    variables of the program, and runs it by calling them: no visitor dispatch or tree
+    attribute lookups happen while it runs
+    Semantics come from 'runtime', shared with the tree walking Interpreter
+    Names are resolved while compiling, every declaration gets a slot of its own in 'env'
+    (env[0] holds the value main returns), so block scoping costs nothing at run time
+    Expressions are visited into (type, code), code returns the value
+    Statements are visited into code returning None or a signal of 'runtime' (BREAK,
+    CONTINUE, RETURN) for the enclosing loop, switch or main
+    """
+
+    def __init__(self, output: TextIO = sys.stdout):
+        self.output = output
+        self.scope = Scope()
+        self.slots = 1
+        self.loops = 0
+        self.breakable = 0
+        self.jumps = 0
+        self.in_main = False
+
+    def compile(self, tree: Program) -> Callable[[], int]:
+        """ :return: function running the program, it returns the value main returns """
+        try:
+            run = self.visit(tree)
+        except RecursionError:
+            raise InterpreterError("Program nested too deep to compile")
+        size = self.slots
+
+        def program() -> int:
+            env = [0] * size
+            try:
+                run(env)
+            except RecursionError:
+                raise InterpreterError("Program nested too deep to run")
+            return env[0]
+        return program
+
+    def slot(self, node: Variable) -> Slot:
+        slot = self.scope.lookup(node.value)
+        if slot is None:
+            raise InterpreterError(f"Undeclared variable {node.value}")
+        return slot
+
+    def statement(self, node: AST) -> Callable:
+        """ Code of a statement, an expression is evaluated for its side effects """
+        code = self.visit(node)
+        if isinstance(code, tuple):
+            expression = code[1]
+
+            def statement(env):
+                expression(env)
+            return statement
+        return code
+
+    def expression(self, node: AST):
+        result = self.visit(node)
+        if not isinstance(result, tuple):
+            raise InterpreterError(f"{type(node).__name__} is not an expression")
+        return result
+
+    def condition(self, node: AST) -> Callable:
+        type, code = self.expression(node)
+        check_condition(type)
+        return code
+
+    def operand(self, node: AST):
+        """ (variable slot index, None) or (None, constant value) or (None, None) for other operands """
+        if isinstance(node, Variable):
+            return self.slot(node).index, None
+        if isinstance(node, (Num, Bool)):
+            return None, literal(LITERAL_TYPES[node.token.type], node.value)
+        return None, None
+
+    @staticmethod
+    def converted(target: str, source: str, code: Callable) -> Callable:
+        function = converter(target, source)
+        if function is None:
+            return code
+        return lambda env: function(code(env))
+
+    @staticmethod
+    def block(codes: List[Callable]) -> Callable:
+        codes = tuple(code for code in codes if code is not nothing)
+        if not codes:
+            return nothing
+        if len(codes) == 1:
+            return codes[0]
+
+        def block(env):
+            for code in codes:
+                signal = code(env)
+                if signal is not None:
+                    return signal
+        return block
+
+    def loop_body(self, node: AST):
+        """ (code of the body of a loop, True if it can break, continue or return) """
+        self.loops += 1
+        self.breakable += 1
+        jumps = self.jumps
+        body = self.statement(node)
+        self.loops -= 1
+        self.breakable -= 1
+        return body, self.jumps != jumps
+
+    # statements
+
+    def visit_program(self, node: Program):
+        codes = [self.statement(declaration) for declaration in node.declarations_before]
+        self.in_main = True
+        main = self.visit(node.main_function)
+        self.in_main = False
+        codes.extend(self.statement(declaration) for declaration in node.declarations_after)
+        codes.append(main)
+        return self.block(codes)
+
+    def visit_imports(self, node: Imports):
+        return nothing
+
+    def visit_mainfunction(self, node: MainFunction):
+        return self.visit(node.compound_statement)
+
+    def visit_compound(self, node: Compound):
+        self.scope = Scope(self.scope)
+        codes = [self.statement(child) for child in node.children]
+        self.scope = self.scope.parent
+        return self.block(codes)
+
+    def visit_vardecl(self, node: VarDecl):
+        type = TYPE_OF_SPEC[node.type_node.token.type]
+        index = self.slots
+        self.slots += 1
+        self.scope.declare(node.var_node.value, Slot(type, index))
+        default = DEFAULT_VALUES[type]
+
+        def declare(env):
+            env[index] = default
+        return declare
+
+    def visit_assign(self, node: Assign):
+        slot = self.slot(node.left)
+        index = slot.index
+        type, right = self.expression(node.right)
+        op = node.op.type
+        if op == ASSIGN:
+            right = self.converted(slot.type, type, right)
+
+            def assign(env):
+                env[index] = right(env)
+            return assign
+
+        op = ASSIGN_BINARY_OPS[op]
+        result = binary_type(op, slot.type, type)
+        # the right operand is evaluated before the variable is read, it may change it
+        variable, constant = self.operand(node.right)
+        if slot.type == INTEGER and result == INTEGER and op in INT_CODE:
+            if variable is not None:
+                value = INT_CODE[op][VARIABLE_VARIABLE](index, variable)
+            elif constant is not None:
+                value = INT_CODE[op][VARIABLE_CONSTANT](index, constant)
+            else:
+                function = INT_FUNCTIONS[op]
+
+                def assign(env):
+                    right_value = right(env)
+                    env[index] = function(env[index], right_value)
+                return assign
+        else:
+            function = binary_function(op, slot.type, type)
+            convert = converter(slot.type, result)
+
+            def assign(env):
+                right_value = right(env)
+                value = function(env[index], right_value)
+                env[index] = value if convert is None else convert(value)
+            return assign
+
+        def assign(env):
+            env[index] = value(env)
+        return assign
+
+    def visit_print(self, node: Print):
+        write = self.output.write
+        parts = []
+        for child in node.children:
+            if isinstance(child, Variable) and child.value == ENDL_V and self.scope.lookup(ENDL_V) is None:
+                text = "\n"
+            elif isinstance(child, String):
+                text = literal(STRING, child.value)
+            else:
+                type, code = self.expression(child)
+                function = formatter(type)
+                parts.append(lambda env, function=function, code=code: function(code(env)))
+                continue
+            if parts and isinstance(parts[-1], str):
+                parts[-1] += text
+            else:
+                parts.append(text)
+        if all(isinstance(part, str) for part in parts):
+            text = "".join(parts)
+
+            def print_statement(env):
+                write(text)
+            return print_statement
+        parts = tuple((lambda env, text=part: text) if isinstance(part, str) else part for part in parts)
+
+        def print_statement(env):
+            write("".join([part(env) for part in parts]))
+        return print_statement
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        condition = self.condition(node.condition)
+        if_body = self.statement(node.if_body)
+        else_body = self.statement(node.else_body)
+        if else_body is nothing:
+            def if_statement(env):
+                if condition(env):
+                    return if_body(env)
+            return if_statement
+
+        def if_statement(env):
+            if condition(env):
+                return if_body(env)
+            return else_body(env)
+        return if_statement
+
+    def visit_whilestatement(self, node: WhileStatement):
+        if isinstance(node.condition, NoOp):
+            return self.forever(node.body)
+        condition = self.condition(node.condition)
+        body, jumps = self.loop_body(node.body)
+        if not jumps:
+            def loop(env):
+                while condition(env):
+                    body(env)
+            return loop
+
+        def loop(env):
+            while condition(env):
+                signal = body(env)
+                if signal is not None:
+                    if signal == BREAK:
+                        break
+                    if signal == RETURN:
+                        return RETURN
+        return loop
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        if isinstance(node.condition, NoOp):
+            return self.forever(node.body)
+        body, jumps = self.loop_body(node.body)
+        condition = self.condition(node.condition)
+
+        def loop(env):
+            while True:
+                signal = body(env)
+                if signal is not None:
+                    if signal == BREAK:
+                        break
+                    if signal == RETURN:
+                        return RETURN
+                if not condition(env):
+                    break
+        return loop
+
+    def forever(self, node: AST) -> Callable:
+        """ Code of a loop without a condition (see optimizer), only a break or return ends it """
+        body, _ = self.loop_body(node)
+
+        def loop(env):
+            while True:
+                signal = body(env)
+                if signal is not None:
+                    if signal == BREAK:
+                        break
+                    if signal == RETURN:
+                        return RETURN
+        return loop
+
+    def visit_forstatement(self, node: ForStatement):
+        self.scope = Scope(self.scope)
+        if isinstance(node.init, Compound):
+            init = self.block([self.statement(declaration) for declaration in node.init.children])
+        else:
+            init = self.statement(node.init)
+        condition = always if isinstance(node.condition, NoOp) else self.condition(node.condition)
+        action = self.statement(node.action)
+        counted = counted_loop(node)
+        loop = None if counted is None else self.counted(counted, init, node.body)
+        if loop is not None:
+            self.scope = self.scope.parent
+            return loop
+        body, jumps = self.loop_body(node.body)
+        self.scope = self.scope.parent
+        if not jumps:
+            def loop(env):
+                init(env)
+                while condition(env):
+                    body(env)
+                    action(env)
+            return loop
+
+        def loop(env):
+            init(env)
+            while condition(env):
+                signal = body(env)
+                if signal is not None:
+                    if signal == BREAK:
+                        break
+                    if signal == RETURN:
+                        return RETURN
+                action(env)
+        return loop
+
+    def counted(self, counted: CountedLoop, init: Callable, node: AST) -> Optional[Callable]:
+        """
+        Code of a loop that is a CountedLoop with body 'node': a for over a range, or the
+        sum of all the terms added at once, None if the types do not allow it
+        """
+        stop_type, stop = self.expression(counted.stop)
+        if stop_type not in INTEGRAL:
+            return None
+        index = self.scope.lookup(counted.variable).index
+        inclusive = counted.inclusive
+        if counted.accumulator is not None:
+            accumulator = self.slot(counted.accumulator)
+            term_type, term = self.expression(counted.term)
+            if accumulator.type == INTEGER and term_type == INTEGER:
+                target = accumulator.index
+                sign = 1 if counted.op == PLUS else -1
+
+                def loop(env):
+                    init(env)
+
+                    def term_at(value):
+                        env[index] = value
+                        return term(env)
+                    bound = stop(env) + 1 if inclusive else stop(env)
+                    env[target] = wrap_int(env[target] + sign * counted_sum(env[index], bound, term_at))
+                return loop
+
+        body, jumps = self.loop_body(node)
+        if not jumps:
+            def loop(env):
+                init(env)
+                for value in counted_range(env[index], stop(env), inclusive):
+                    env[index] = value
+                    body(env)
+            return loop
+
+        def loop(env):
+            init(env)
+            for value in counted_range(env[index], stop(env), inclusive):
+                env[index] = value
+                signal = body(env)
+                if signal is not None:
+                    if signal == BREAK:
+                        break
+                    if signal == RETURN:
+                        return RETURN
+        return loop
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        type, condition = self.expression(node.condition)
+        if type not in INTEGRAL:
+            raise InterpreterError(f"Switch on {type}")
+        self.breakable += 1
+        labels = [self.expression(case.condition)[1] for case in node.case_statements]
+        bodies = [self.statement(case.body) for case in node.case_statements]
+        if not isinstance(node.default_statement, NoOp):
+            bodies.append(self.statement(node.default_statement.body))
+        self.breakable -= 1
+        default = len(node.case_statements)
+        count = len(bodies)
+
+        def run(env, start: int):
+            for index in range(start, count):
+                signal = bodies[index](env)
+                if signal is not None:
+                    return None if signal == BREAK else signal
+
+        if all(isinstance(case.condition, (Num, Bool)) for case in node.case_statements):
+            table = {}
+            for index, label in enumerate(labels):
+                table.setdefault(label(None), index)
+
+            def switch(env):
+                return run(env, table.get(condition(env), default))
+            return switch
+
+        def switch(env):
+            value = condition(env)
+            for index, label in enumerate(labels):
+                if label(env) == value:
+                    return run(env, index)
+            return run(env, default)
+        return switch
+
+    def visit_breakstatement(self, node: BreakStatement):
+        if not self.breakable:
+            raise InterpreterError("break outside of a loop or switch")
+        self.jumps += 1
+        return break_statement
+
+    def visit_continuestatement(self, node: ContinueStatement):
+        if not self.loops:
+            raise InterpreterError("continue outside of a loop")
+        self.jumps += 1
+        return continue_statement
+
+    def visit_returnstatement(self, node: ReturnStatement):
+        if not self.in_main:
+            raise InterpreterError("return outside of main")
+        self.jumps += 1
+        if isinstance(node.expr, NoOp):
+            return return_statement
+        type, code = self.expression(node.expr)
+        code = self.converted(INTEGER, type, code)
+
+        def return_value(env):
+            env[0] = code(env)
+            return RETURN
+        return return_value
+
+    def visit_noop(self, node: NoOp):
+        return nothing
+
+    def visit_errornode(self, node: ErrorNode):
+        raise InterpreterError(f"Can not run a program with syntax errors: {node.error}")
+
+    # expressions
+
+    def visit_num(self, node: Num):
+        type = LITERAL_TYPES[node.token.type]
+        value = literal(type, node.value)
+        return type, lambda env: value
+
+    visit_string = visit_num
+    visit_bool = visit_num
+
+    def visit_variable(self, node: Variable):
+        slot = self.slot(node)
+        index = slot.index
+        return slot.type, lambda env: env[index]
+
+    def visit_binop(self, node: BinOp):
+        op = node.token.type
+        left_type, left = self.expression(node.left)
+        right_type, right = self.expression(node.right)
+        if op in LOGICAL_OPS:
+            check_condition(left_type)
+            check_condition(right_type)
+            if op == LOG_AND:
+                return BOOL, lambda env: True if left(env) and right(env) else False
+            return BOOL, lambda env: True if left(env) or right(env) else False
+
+        type = binary_type(op, left_type, right_type)
+        if op in COMPARISON_OPS:
+            factories = COMPARISON_CODE[op]
+        elif type == INTEGER:
+            factories = INT_CODE.get(op)
+        else:
+            factories = DOUBLE_CODE.get(op)
+        if factories is None:
+            function = binary_function(op, left_type, right_type)
+            return type, lambda env: function(left(env), right(env))
+
+        left_slot, _ = self.operand(node.left)
+        right_slot, constant = self.operand(node.right)
+        if left_slot is not None and right_slot is not None:
+            return type, factories[VARIABLE_VARIABLE](left_slot, right_slot)
+        if constant is not None:
+            if left_slot is not None:
+                return type, factories[VARIABLE_CONSTANT](left_slot, constant)
+            return type, factories[ANY_CONSTANT](left, constant)
+        return type, factories[ANY_ANY](left, right)
+
+    visit_conditionloop = visit_binop
+
+    def visit_unaryop(self, node: UnaryOp):
+        op = node.token.type
+        type, code = self.expression(node.expr)
+        result = unary_type(op, type)
+        if op == MINUS and result == INTEGER:
+            return result, lambda env: (0x80000000 - code(env) & 0xFFFFFFFF) - 0x80000000
+        if op == LOG_NOT:
+            return result, lambda env: not code(env)
+        function = unary_function(op, type)
+        if function is None:
+            return result, code
+        return result, lambda env: function(code(env))
+
+    def visit_prefixop(self, node: PrefixOp):
+        delta = 0
+        while isinstance(node, PrefixOp):
+            delta += INCREMENTS[node.token.type]
+            node = node.expr
+        slot = self.slot(node)
+        index, type = slot.index, slot.type
+        if type == INTEGER:
+            def prefix(env):
+                value = env[index] = (env[index] + delta + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+                return value
+        else:
+            check_condition(type)
+
+            def prefix(env):
+                value = env[index] = increment(type, env[index], delta)
+                return value
+        return type, prefix
+
+    def visit_postfixop(self, node: PostfixOp):
+        delta = INCREMENTS[node.token.type]
+        slot = self.slot(node.expr)
+        index, type = slot.index, slot.type
+        if type == INTEGER:
+            def postfix(env):
+                value = env[index]
+                env[index] = (value + delta + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+                return value
+        else:
+            check_condition(type)
+
+            def postfix(env):
+                value = env[index]
+                env[index] = increment(type, value, delta)
+                return value
+        return type, postfix
+
+    def visit_ternaryop(self, node: TernaryOp):
+        condition = self.condition(node.condition)
+        first_type, first = self.expression(node.first_expr)
+        second_type, second = self.expression(node.second_expr)
+        type = common_type(first_type, second_type)
+        first = self.converted(type, first_type, first)
+        second = self.converted(type, second_type, second)
+        return type, lambda env: first(env) if condition(env) else second(env)
@@ -1,28 +1,413 @@
-from syntax_analyzer.tree import Program, MainFunction, Compound, BinOp
-from node_visitor import NodeVisitor
+import sys
+from typing import TextIO, Tuple
+
+from interpreter.node_visitor import NodeVisitor
+from interpreter.runtime import *
+from syntax_analyzer.tree import *
+
+
+class Cell:
+    """ Storage of a declared variable """
+    __slots__ = ('type', 'value')
+
+    def __init__(self, type: str, value):
+        self.type = type
+        self.value = value
 
 
 class Interpreter(NodeVisitor):
-    def __init__(self):
+    """
+    Runs a Program by walking the tree, the reference for the Compiler backend: both
+    take their semantics from 'runtime'
+    Expressions are visited into (type, value) pairs, statements into None or a signal
+    of 'runtime' (BREAK, CONTINUE, RETURN) for the enclosing loop, switch or main
+    Globals are initialised in the order they are declared, then main runs; like in C++,
+    main does not see the globals declared after it
+    The whole program is checked (see Checker) before anything runs, what the compiling
+    backends reject is rejected even in code that never runs
+    """
+
+    def __init__(self, output: TextIO = sys.stdout):
+        self.output = output
+        self.scope = Scope()
+        self.exit_code = 0
+
+    def interpret(self, tree: Program) -> int:
+        """ :return: the value main returns """
+        try:
+            Checker().visit(tree)
+            self.visit(tree)
+        except RecursionError:
+            raise InterpreterError("Program nested too deep to run")
+        return self.exit_code
+
+    def enter(self) -> None:
+        self.scope = Scope(self.scope)
+
+    def leave(self) -> None:
+        self.scope = self.scope.parent
+
+    def cell(self, node: Variable) -> Cell:
+        cell = self.scope.lookup(node.value)
+        if cell is None:
+            raise InterpreterError(f"Undeclared variable {node.value}")
+        return cell
+
+    def execute(self, node: AST):
+        """ Runs a statement, an expression is evaluated for its side effects """
+        result = self.visit(node)
+        return None if isinstance(result, tuple) else result
+
+    def condition(self, node: AST) -> bool:
+        type, value = self.visit(node)
+        check_condition(type)
+        return bool(value)
+
+    # statements
+
+    def visit_program(self, node: Program):
+        for declaration in node.declarations_before:
+            self.execute(declaration)
+        # globals declared after main are initialised before it runs, main does not see them
+        seen = dict(self.scope.names)
+        for declaration in node.declarations_after:
+            self.execute(declaration)
+        self.scope.names = seen
+        self.visit(node.main_function)
+
+    def visit_imports(self, node: Imports):
         pass
 
+    def visit_mainfunction(self, node: MainFunction):
+        if self.visit(node.compound_statement) == RETURN:
+            return RETURN
+
+    def visit_compound(self, node: Compound):
+        self.enter()
+        try:
+            for child in node.children:
+                signal = self.execute(child)
+                if signal is not None:
+                    return signal
+        finally:
+            self.leave()
+
+    def visit_vardecl(self, node: VarDecl):
+        type = TYPE_OF_SPEC[node.type_node.token.type]
+        self.scope.declare(node.var_node.value, Cell(type, DEFAULT_VALUES[type]))
+
+    def visit_assign(self, node: Assign):
+        cell = self.cell(node.left)
+        type, value = self.visit(node.right)
+        op = node.op.type
+        if op != ASSIGN:
+            op = ASSIGN_BINARY_OPS[op]
+            result = binary_type(op, cell.type, type)
+            value = binary_function(op, cell.type, type)(cell.value, value)
+            type = result
+        cell.value = convert(cell.type, type, value)
+
+    def visit_print(self, node: Print):
+        parts = []
+        for child in node.children:
+            if isinstance(child, Variable) and child.value == ENDL_V and self.scope.lookup(ENDL_V) is None:
+                parts.append("\n")
+            else:
+                type, value = self.visit(child)
+                parts.append(formatter(type)(value))
+        self.output.write("".join(parts))
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        if self.condition(node.condition):
+            return self.execute(node.if_body)
+        return self.execute(node.else_body)
+
+    def visit_whilestatement(self, node: WhileStatement):
+        forever = isinstance(node.condition, NoOp)
+        while forever or self.condition(node.condition):
+            signal = self.execute(node.body)
+            if signal == BREAK:
+                break
+            if signal == RETURN:
+                return RETURN
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        forever = isinstance(node.condition, NoOp)
+        while True:
+            signal = self.execute(node.body)
+            if signal == BREAK:
+                break
+            if signal == RETURN:
+                return RETURN
+            if not forever and not self.condition(node.condition):
+                break
+
+    def visit_forstatement(self, node: ForStatement):
+        self.enter()
+        try:
+            if isinstance(node.init, Compound):
+                for declaration in node.init.children:
+                    self.execute(declaration)
+            else:
+                self.execute(node.init)
+            while isinstance(node.condition, NoOp) or self.condition(node.condition):
+                signal = self.execute(node.body)
+                if signal == BREAK:
+                    break
+                if signal == RETURN:
+                    return RETURN
+                self.execute(node.action)
+        finally:
+            self.leave()
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        type, value = self.visit(node.condition)
+        if type not in INTEGRAL:
+            raise InterpreterError(f"Switch on {type}")
+        bodies = [case.body for case in node.case_statements]
+        start = None
+        for index, case in enumerate(node.case_statements):
+            if self.visit(case.condition)[1] == value:
+                start = index
+                break
+        if not isinstance(node.default_statement, NoOp):
+            bodies.append(node.default_statement.body)
+        if start is None:
+            start = len(node.case_statements)
+        for body in bodies[start:]:
+            signal = self.execute(body)
+            if signal == BREAK:
+                return None
+            if signal is not None:
+                return signal
+
+    def visit_breakstatement(self, node: BreakStatement):
+        return BREAK
+
+    def visit_continuestatement(self, node: ContinueStatement):
+        return CONTINUE
+
+    def visit_returnstatement(self, node: ReturnStatement):
+        if not isinstance(node.expr, NoOp):
+            type, value = self.visit(node.expr)
+            self.exit_code = convert(INTEGER, type, value)
+        return RETURN
+
+    def visit_noop(self, node: NoOp):
+        pass
+
+    def visit_errornode(self, node: ErrorNode):
+        raise InterpreterError(f"Can not run a program with syntax errors: {node.error}")
+
+    # expressions
+
+    def visit_num(self, node: Num) -> Tuple[str, object]:
+        type = LITERAL_TYPES[node.token.type]
+        return type, literal(type, node.value)
+
+    visit_string = visit_num
+    visit_bool = visit_num
+
+    def visit_variable(self, node: Variable):
+        cell = self.cell(node)
+        return cell.type, cell.value
+
+    def visit_binop(self, node: BinOp):
+        op = node.token.type
+        left_type, left = self.visit(node.left)
+        if op in LOGICAL_OPS:
+            check_condition(left_type)
+            if bool(left) == (op == LOG_OR):
+                return BOOL, bool(left)
+            right_type, right = self.visit(node.right)
+            check_condition(right_type)
+            return BOOL, bool(right)
+        right_type, right = self.visit(node.right)
+        type = binary_type(op, left_type, right_type)
+        return type, binary_function(op, left_type, right_type)(left, right)
+
+    visit_conditionloop = visit_binop
+
+    def visit_unaryop(self, node: UnaryOp):
+        op = node.token.type
+        type, value = self.visit(node.expr)
+        function = unary_function(op, type)
+        return unary_type(op, type), value if function is None else function(value)
+
+    def visit_prefixop(self, node: PrefixOp):
+        delta = 0
+        while isinstance(node, PrefixOp):
+            delta += INCREMENTS[node.token.type]
+            node = node.expr
+        cell = self.cell(node)
+        cell.value = increment(cell.type, cell.value, delta)
+        return cell.type, cell.value
+
+    def visit_postfixop(self, node: PostfixOp):
+        cell = self.cell(node.expr)
+        value = cell.value
+        cell.value = increment(cell.type, value, INCREMENTS[node.token.type])
+        return cell.type, value
+
+    def visit_ternaryop(self, node: TernaryOp):
+        if self.condition(node.condition):
+            chosen, other = node.first_expr, node.second_expr
+        else:
+            chosen, other = node.second_expr, node.first_expr
+        type, value = self.visit(chosen)
+        # the type of the result depends on both branches, the other one is not evaluated
+        result = common_type(type, self.type_of(other))
+        return result, convert(result, type, value)
+
+    def type_of(self, node: AST) -> str:
+        """ Type of expression 'node', found without evaluating it, InterpreterError if it is not valid """
+        if isinstance(node, (Num, String, Bool)):
+            return LITERAL_TYPES[node.token.type]
+        if isinstance(node, Variable):
+            return self.cell(node).type
+        if isinstance(node, (PrefixOp, PostfixOp)):
+            while not isinstance(node, Variable):
+                node = node.expr
+            type = self.cell(node).type
+            if type != INTEGER:
+                check_condition(type)
+            return type
+        if isinstance(node, (BinOp, ConditionLoop)):
+            left, right = self.type_of(node.left), self.type_of(node.right)
+            if node.token.type in LOGICAL_OPS:
+                check_condition(left)
+                check_condition(right)
+                return BOOL
+            return binary_type(node.token.type, left, right)
+        if isinstance(node, UnaryOp):
+            return unary_type(node.token.type, self.type_of(node.expr))
+        if isinstance(node, TernaryOp):
+            check_condition(self.type_of(node.condition))
+            return common_type(self.type_of(node.first_expr), self.type_of(node.second_expr))
+        if isinstance(node, ErrorNode):
+            self.visit_errornode(node)
+        raise InterpreterError(f"{type(node).__name__} is not an expression")
+
+
+class Checker(Interpreter):
+    """
+    Finds, without running it, the first error the compiling backends find while
+    compiling a Program, in the order they compile it: undeclared or redeclared names,
+    operands and conversions of the wrong type, break, continue and return outside of
+    their statement, syntax errors
+    Declarations are Cells without values, expressions are checked by 'type_of'
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.loops = 0
+        self.breakable = 0
+        self.in_main = False
+
+    def execute(self, node: AST):
+        if isinstance(node, (Num, String, Bool, Variable, PrefixOp, PostfixOp, BinOp, ConditionLoop, UnaryOp,
+                             TernaryOp)):
+            self.type_of(node)
+        else:
+            self.visit(node)
+
+    def condition(self, node: AST) -> None:
+        check_condition(self.type_of(node))
+
+    def loop_body(self, node: AST) -> None:
+        self.loops += 1
+        self.breakable += 1
+        self.execute(node)
+        self.loops -= 1
+        self.breakable -= 1
+
     def visit_program(self, node: Program):
-        for import_node in node.imports_node:
-            self.visit(import_node)
-        for statement_node in node.statements_before:
-            self.visit(statement_node)
-        self.visit(node.main_func)
-        for statement_node in node.statements_after:
-            self.visit(statement_node)
+        for declaration in node.declarations_before:
+            self.execute(declaration)
+        self.in_main = True
+        self.visit(node.main_function)
+        self.in_main = False
+        for declaration in node.declarations_after:
+            self.execute(declaration)
 
     def visit_mainfunction(self, node: MainFunction):
         self.visit(node.compound_statement)
 
     def visit_compound(self, node: Compound):
-        for child in node.statements:
-            self.visit(child)
+        self.enter()
+        for child in node.children:
+            self.execute(child)
+        self.leave()
 
-    def visit_binop(self, node: BinOp):
-        self.visit(node.right)
-        self.visit(node.left)
+    def visit_vardecl(self, node: VarDecl):
+        self.scope.declare(node.var_node.value, Cell(TYPE_OF_SPEC[node.type_node.token.type], None))
+
+    def visit_assign(self, node: Assign):
+        cell = self.cell(node.left)
+        type = self.type_of(node.right)
+        op = node.op.type
+        if op != ASSIGN:
+            type = binary_type(ASSIGN_BINARY_OPS[op], cell.type, type)
+        converter(cell.type, type)
+
+    def visit_print(self, node: Print):
+        for child in node.children:
+            if isinstance(child, Variable) and child.value == ENDL_V and self.scope.lookup(ENDL_V) is None:
+                continue
+            if not isinstance(child, String):
+                self.type_of(child)
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        self.condition(node.condition)
+        self.execute(node.if_body)
+        self.execute(node.else_body)
+
+    def visit_whilestatement(self, node: WhileStatement):
+        if not isinstance(node.condition, NoOp):
+            self.condition(node.condition)
+        self.loop_body(node.body)
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        self.loop_body(node.body)
+        if not isinstance(node.condition, NoOp):
+            self.condition(node.condition)
+
+    def visit_forstatement(self, node: ForStatement):
+        self.enter()
+        if isinstance(node.init, Compound):
+            for declaration in node.init.children:
+                self.execute(declaration)
+        else:
+            self.execute(node.init)
+        if not isinstance(node.condition, NoOp):
+            self.condition(node.condition)
+        self.execute(node.action)
+        self.loop_body(node.body)
+        self.leave()
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        type = self.type_of(node.condition)
+        if type not in INTEGRAL:
+            raise InterpreterError(f"Switch on {type}")
+        self.breakable += 1
+        for case in node.case_statements:
+            self.type_of(case.condition)
+        for case in node.case_statements:
+            self.execute(case.body)
+        if not isinstance(node.default_statement, NoOp):
+            self.execute(node.default_statement.body)
+        self.breakable -= 1
+
+    def visit_breakstatement(self, node: BreakStatement):
+        if not self.breakable:
+            raise InterpreterError("break outside of a loop or switch")
+
+    def visit_continuestatement(self, node: ContinueStatement):
+        if not self.loops:
+            raise InterpreterError("continue outside of a loop")
 
+    def visit_returnstatement(self, node: ReturnStatement):
+        if not self.in_main:
+            raise InterpreterError("return outside of main")
+        if not isinstance(node.expr, NoOp):
+            converter(INTEGER, self.type_of(node.expr))
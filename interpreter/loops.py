@@ -0,0 +1,102 @@
+from typing import Iterator, Optional, Set
+
+from interpreter.optimizer import constant_value, is_constant, is_pure
+from interpreter.runtime import *
+from syntax_analyzer.tree import *
+
+
+def walk(node: AST) -> Iterator[AST]:
+    """ 'node' and every node below it """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(children(node))
+
+
+def read(node: AST) -> Set[str]:
+    """ Names of the variables 'node' mentions """
+    return {item.value for item in walk(node) if isinstance(item, Variable)}
+
+
+def written(node: AST) -> Set[str]:
+    """ Names of the variables 'node' assigns, increments or decrements, in any scope """
+    names = set()
+    for item in walk(node):
+        if isinstance(item, Assign):
+            names.add(item.left.value)
+        elif isinstance(item, (PrefixOp, PostfixOp)) and isinstance(item.expr, Variable):
+            names.add(item.expr.value)
+    return names
+
+
+def affine(node: AST, name: str) -> bool:
+    """ True if 'node' is a + b * name, a and b not depending on 'name', computed with + - * only """
+    if isinstance(node, (Num, Bool, Variable)):
+        return True
+    if isinstance(node, UnaryOp):
+        return node.token.type in (PLUS, MINUS) and affine(node.expr, name)
+    if isinstance(node, (BinOp, ConditionLoop)):
+        op = node.token.type
+        if op not in (PLUS, MINUS, ASTERIKS) or not affine(node.left, name) or not affine(node.right, name):
+            return False
+        return op != ASTERIKS or name not in read(node.left) or name not in read(node.right)
+    return False
+
+
+class CountedLoop:
+    """
+    for (int i = start; i < stop; i++) (or i <= stop, ++i) where neither the body
+    nor the action writes i or a variable 'stop' reads, and 'stop' is pure (see
+    optimizer.is_pure): the body runs for the values of counted_range(start, stop,
+    inclusive) of 'runtime', 'stop' can be evaluated once
+    The language has no pointers, references or functions, a variable only changes
+    where it is assigned, incremented or decremented by name
+    accumulator, op, term - set if the body is 'accumulator += term' (op PLUS, or -=, op
+    MINUS) with 'term' affine in i (see affine) and not reading 'accumulator': an int
+    accumulator then gets the sum of the terms at once (see counted_sum), if the terms
+    are of type int too; for i <= stop only if 'stop' is a constant below INT_MAX
+    """
+    __slots__ = ('variable', 'stop', 'inclusive', 'accumulator', 'op', 'term')
+
+    def __init__(self, variable: str, stop: AST, inclusive: bool):
+        self.variable = variable
+        self.stop = stop
+        self.inclusive = inclusive
+        self.accumulator = None
+        self.op = None
+        self.term = None
+
+
+def counted_loop(node: ForStatement) -> Optional[CountedLoop]:
+    """ The CountedLoop 'node' is, None if it is not one """
+    condition = node.condition
+    if not (isinstance(condition, (BinOp, ConditionLoop)) and condition.token.type in (LESS, LE_OP)
+            and isinstance(condition.left, Variable)):
+        return None
+    name = condition.left.value
+    # the counter is declared by the loop, its value is not seen after it
+    if not (isinstance(node.init, Compound) and any(
+            isinstance(item, VarDecl) and item.var_node.value == name and item.type_node.token.type == INTEGER
+            for item in node.init.children)):
+        return None
+    action = node.action
+    if not (isinstance(action, (PostfixOp, PrefixOp)) and action.token.type == INC_OP
+            and isinstance(action.expr, Variable) and action.expr.value == name):
+        return None
+    stop = condition.right
+    stop_names = read(stop)
+    if not is_pure(stop) or name in stop_names or written(node.body) & (stop_names | {name}):
+        return None
+    loop = CountedLoop(name, stop, condition.token.type == LE_OP)
+
+    body = node.body
+    if isinstance(body, Compound) and len(body.children) == 1:
+        body = body.children[0]
+    if (isinstance(body, Assign) and body.op.type in (PLUS_ASSIGN, MINUS_ASSIGN) and body.left.value != name
+            and body.left.value not in read(body.right) and affine(body.right, name)
+            and (not loop.inclusive or is_constant(stop) and constant_value(stop) < INT_MAX)):
+        loop.accumulator = body.left
+        loop.op = ASSIGN_BINARY_OPS[body.op.type]
+        loop.term = body.right
+    return loop
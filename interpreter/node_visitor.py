@@ -1,11 +1,56 @@
+from typing import Callable, Dict, Hashable
+
+from syntax_analyzer.flat_tree import FlatTree, KIND_NAMES
 from syntax_analyzer.tree import AST
 
 
 class NodeVisitor:
+    """
+    Dispatches a node to the visit_<class name in lower case> method, generic_visit if the
+    visitor has none
+    The method is looked up once per visitor class and node class and kept in the class
+    level 'dispatch' table, so visit_* methods are to be defined on the class
+    """
+    dispatch: Dict[Hashable, Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = {}
+
+    @classmethod
+    def resolve(cls, key: Hashable, name: str) -> Callable:
+        """ Method for nodes of class 'name', remembered under 'key' """
+        method = cls.dispatch[key] = getattr(cls, 'visit_' + name.lower(), cls.generic_visit)
+        return method
+
     def visit(self, node: AST):
-        method_name = 'visit_' + type(node).__name__.lower()
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+        try:
+            method = self.dispatch[type(node)]
+        except KeyError:
+            method = self.resolve(type(node), type(node).__name__)
+        return method(self, node)
 
     def generic_visit(self, node):
         raise Exception(f'No visit_{type(node).__name__} method')
+
+
+class FlatNodeVisitor(NodeVisitor):
+    """
+    NodeVisitor over a FlatTree, nodes are indexes into 'flat' and are dispatched to the
+    same visit_<class name> methods, which read attributes with flat.child, flat.children,
+    flat.value and flat.op
+    """
+
+    def __init__(self, flat: FlatTree):
+        self.flat = flat
+
+    def visit(self, index: int):
+        kind = self.flat.kinds[index]
+        try:
+            method = self.dispatch[kind]
+        except KeyError:
+            method = self.resolve(kind, KIND_NAMES[kind])
+        return method(self, index)
+
+    def generic_visit(self, index):
+        raise Exception(f'No visit_{self.flat.kind(index).__name__} method')
@@ -0,0 +1,657 @@
+import math
+from typing import Optional, Tuple
+
+from interpreter.interpreter import Checker
+from interpreter.node_visitor import NodeVisitor
+from interpreter.runtime import *
+from lexical_analyzer.lexer import RESERVED_KEYWORDS, SIMPLE_TOKENS
+from lexical_analyzer.token import Token
+from syntax_analyzer.tree import *
+
+TRUE_TOKEN = RESERVED_KEYWORDS[TRUE_V]
+FALSE_TOKEN = RESERVED_KEYWORDS[FALSE_V]
+PLUS_TOKEN = SIMPLE_TOKENS[PLUS_V]
+MINUS_TOKEN = SIMPLE_TOKENS[MINUS_V]
+LOG_NOT_TOKEN = SIMPLE_TOKENS[LOG_NOT_V]
+#  token of the cast to every type
+CAST_TOKENS = {INTEGER: RESERVED_KEYWORDS[INTEGER_V], DOUBLE: RESERVED_KEYWORDS[DOUBLE_V],
+               CHAR: RESERVED_KEYWORDS[CHAR_V], BOOL: RESERVED_KEYWORDS[BOOL_V]}
+CONSTANT_TOKEN_TYPES = {INTEGER: INTEGER_CONST, DOUBLE: DOUBLE_CONST, CHAR: CHAR_CONST}
+OPERATOR_TOKENS = {token.type: token for token in SIMPLE_TOKENS.values()}
+NEGATED = {EQUAL: NOT_EQUAL, NOT_EQUAL: EQUAL, LESS: GE_OP, GREATER: LE_OP, LE_OP: GREATER, GE_OP: LESS}
+
+#  (type of the expression, None if it is not known or the expression is invalid, node)
+Typed = Tuple[Optional[str], AST]
+
+
+class Declaration:
+    """ Variable declared in the program being optimised, 'reads' counts the expressions reading it """
+    __slots__ = ('type', 'node', 'reads', 'assignments', 'kept')
+
+    def __init__(self, type: str, node: VarDecl):
+        self.type = type
+        self.node = node
+        self.reads = 0
+        # assignments to it, and True if one of them can not be dropped
+        self.assignments = []
+        self.kept = False
+
+
+def is_constant(node: AST) -> bool:
+    return isinstance(node, (Num, Bool))
+
+
+def constant_value(node: AST):
+    return literal(LITERAL_TYPES[node.token.type], node.value)
+
+
+def constant_node(type: str, value) -> Optional[AST]:
+    """ Literal of 'value' of 'type', None if there is no literal for it (inf and nan) """
+    if type == BOOL:
+        return Bool(TRUE_TOKEN if value else FALSE_TOKEN)
+    if type == DOUBLE:
+        value = float(value)
+        if not math.isfinite(value):
+            return None
+    elif type in INTEGRAL:
+        value = int(value)
+    else:
+        return None
+    return Num(Token(CONSTANT_TOKEN_TYPES[type], value))
+
+
+def converted(target: str, source: str, node: AST) -> AST:
+    """ 'node' of type 'source' converted to 'target', char and bool promote with a unary plus """
+    if target == source:
+        return node
+    if target == INTEGER and source in INTEGRAL:
+        return UnaryOp(PLUS_TOKEN, node)
+    return UnaryOp(CAST_TOKENS[target], node)
+
+
+def is_pure(node: AST) -> bool:
+    """ True if evaluating 'node' changes nothing and can not fail, it can be dropped or evaluated again """
+    if isinstance(node, (Num, Bool, String, Variable)):
+        return True
+    if isinstance(node, (BinOp, ConditionLoop)):
+        # int division by a variable may divide by zero, by a constant that is not zero it can not
+        if node.token.type in (DIVIDE, MOD) and not (is_constant(node.right) and constant_value(node.right) != 0):
+            return False
+        return is_pure(node.left) and is_pure(node.right)
+    if isinstance(node, UnaryOp):
+        return is_pure(node.expr)
+    if isinstance(node, TernaryOp):
+        return is_pure(node.condition) and is_pure(node.first_expr) and is_pure(node.second_expr)
+    return False
+
+
+def same(first: AST, second: AST) -> bool:
+    """ True if expressions 'first' and 'second' are written the same """
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, (Num, Bool, String, Variable)):
+        # repr tells 0.0 from -0.0
+        return first.token.type == second.token.type and repr(first.value) == repr(second.value)
+    if isinstance(first, (BinOp, ConditionLoop)):
+        return first.token.type == second.token.type and same(first.left, second.left) and same(first.right, second.right)
+    if isinstance(first, (UnaryOp, PrefixOp, PostfixOp)):
+        return first.token.type == second.token.type and same(first.expr, second.expr)
+    if isinstance(first, TernaryOp):
+        return (same(first.condition, second.condition) and same(first.first_expr, second.first_expr)
+                and same(first.second_expr, second.second_expr))
+    return False
+
+
+class ConstantFolder(NodeVisitor):
+    """
+    Optimisation pass over a Program: computes constant subexpressions once, while
+    compiling, with the semantics of 'runtime' (32 bit int, truncating division, shifts
+    by the low 5 bits), and simplifies identities (x * 1, x + 0, !!x, -(-x), casts to
+    the type the value has) and ternary operators with a constant condition or the same
+    branches
+    The Program it returns runs exactly like the one it is given: folding keeps the type
+    of every expression (char and bool operands stay promoted to int, see converted),
+    operands are dropped only if they are pure (see is_pure), and an expression that
+    would fail is left to fail when it runs: x / 0 and operands of unknown or invalid
+    type are not folded, double results without a literal (inf, nan) neither
+    The given tree is not changed, statements and expressions are rebuilt, leaves shared
+    Expressions are visited into Typed, statements into nodes
+    """
+
+    def __init__(self):
+        self.scope = Scope()
+        # (type, expression) of the expressions built so far by id, leaves are shared and
+        # not kept here, the expression is kept so that its id is not reused
+        self.types = {}
+
+    def fold(self, tree: Program) -> Program:
+        """
+        :return: the optimised Program, 'tree' itself if it is nested too deep to fold or if
+        the executors reject it before running it (see interpreter.Checker), the error they
+        report may be in code that would be removed
+        """
+        try:
+            Checker().visit(tree)
+            return self.visit(tree)
+        except (InterpreterError, RecursionError):
+            return tree
+
+    def statement(self, node: AST) -> AST:
+        result = self.visit(node)
+        return result[1] if isinstance(result, tuple) else result
+
+    def expression(self, node: AST) -> Typed:
+        result = self.visit(node)
+        if not isinstance(result, tuple):
+            return None, result
+        if not isinstance(result[1], (Num, Bool, String, Variable)):
+            self.types[id(result[1])] = result
+        return result
+
+    def type_of(self, node: AST) -> Optional[str]:
+        """ Type of an expression returned by expression() """
+        if isinstance(node, (Num, Bool, String)):
+            return LITERAL_TYPES[node.token.type]
+        if isinstance(node, Variable):
+            declaration = self.scope.lookup(node.value)
+            return declaration and declaration.type
+        return self.types.get(id(node), (None,))[0]
+
+    def constant(self, type: str, function, *values) -> Optional[AST]:
+        """ Literal of function(*values) of 'type', None if it can not be folded """
+        try:
+            value = function(*values)
+        except (InterpreterError, ArithmeticError):
+            return None
+        return constant_node(type, value)
+
+    def converted(self, target: str, source: str, node: AST) -> AST:
+        """ 'node' of type 'source' converted to 'target', a constant is converted right away """
+        if is_constant(node) and target != source:
+            folded = self.constant(target, convert, target, source, constant_value(node))
+            if folded is not None:
+                return folded
+        return converted(target, source, node)
+
+    # statements
+
+    def visit_program(self, node: Program):
+        before = [self.statement(declaration) for declaration in node.declarations_before]
+        main = self.visit(node.main_function)
+        after = [self.statement(declaration) for declaration in node.declarations_after]
+        return Program(node.imports_node, before, main, after)
+
+    def visit_imports(self, node: Imports):
+        return node
+
+    def visit_mainfunction(self, node: MainFunction):
+        return MainFunction(self.visit(node.compound_statement), node.name_node)
+
+    def visit_compound(self, node: Compound):
+        self.scope = Scope(self.scope)
+        compound = Compound()
+        compound.children = [self.statement(child) for child in node.children]
+        self.scope = self.scope.parent
+        return compound
+
+    def visit_vardecl(self, node: VarDecl):
+        self.scope.names[node.var_node.value] = Declaration(TYPE_OF_SPEC[node.type_node.token.type], node)
+        return node
+
+    def visit_assign(self, node: Assign):
+        return Assign(node.left, node.op, self.expression(node.right)[1])
+
+    def visit_print(self, node: Print):
+        output = Print()
+        output.children = [self.expression(child)[1] for child in node.children]
+        return output
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        return ConditionStatement(self.expression(node.condition)[1], self.statement(node.if_body),
+                                  self.statement(node.else_body))
+
+    def visit_whilestatement(self, node: WhileStatement):
+        return WhileStatement(self.expression(node.condition)[1], self.statement(node.body))
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        return DoWhileStatement(self.expression(node.condition)[1], self.statement(node.body))
+
+    def visit_forstatement(self, node: ForStatement):
+        self.scope = Scope(self.scope)
+        if isinstance(node.init, Compound):
+            init = Compound()
+            init.children = [self.statement(declaration) for declaration in node.init.children]
+        else:
+            init = self.statement(node.init)
+        loop = ForStatement(init, self.expression(node.condition)[1], self.statement(node.action),
+                            self.statement(node.body))
+        self.scope = self.scope.parent
+        return loop
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        # case labels are left as written, the executors dispatch on literal labels with a table
+        cases = [SwitchCompound(case.condition, self.statement(case.body)) for case in node.case_statements]
+        default = node.default_statement
+        if not isinstance(default, NoOp):
+            default = SwitchCompound(default.condition, self.statement(default.body))
+        return SwitchStatement(self.expression(node.condition)[1], cases, default)
+
+    def visit_returnstatement(self, node: ReturnStatement):
+        return ReturnStatement(self.expression(node.expr)[1])
+
+    def visit_breakstatement(self, node: BreakStatement):
+        return node
+
+    visit_continuestatement = visit_breakstatement
+    visit_noop = visit_breakstatement
+    visit_errornode = visit_breakstatement
+
+    # expressions
+
+    def visit_num(self, node: Num) -> Typed:
+        return LITERAL_TYPES[node.token.type], node
+
+    visit_string = visit_num
+    visit_bool = visit_num
+
+    def visit_variable(self, node: Variable) -> Typed:
+        declaration = self.scope.lookup(node.value)
+        if declaration is None:
+            return None, node
+        declaration.reads += 1
+        return declaration.type, node
+
+    def visit_binop(self, node: BinOp) -> Typed:
+        op = node.token.type
+        left_type, left = self.expression(node.left)
+        right_type, right = self.expression(node.right)
+        rebuilt = type(node)(left, node.token, right)
+        if left_type not in NUMERIC or right_type not in NUMERIC:
+            return None, rebuilt
+        if op in LOGICAL_OPS:
+            return BOOL, self.logical(op, left_type, left, right_type, right) or rebuilt
+        try:
+            result = binary_type(op, left_type, right_type)
+        except InterpreterError:
+            return None, rebuilt
+        if is_constant(left) and is_constant(right):
+            function = binary_function(op, left_type, right_type)
+            folded = self.constant(result, function, constant_value(left), constant_value(right))
+        elif is_constant(right):
+            folded = self.identity(op, result, left_type, left, constant_value(right), True)
+        elif is_constant(left) and op not in COMPARISON_OPS:
+            folded = self.identity(op, result, right_type, right, constant_value(left), False)
+        else:
+            folded = None
+        return result, folded or rebuilt
+
+    visit_conditionloop = visit_binop
+
+    def logical(self, op: str, left_type: str, left: AST, right_type: str, right: AST) -> Optional[AST]:
+        """ 'left op right' for && and || with a constant operand, None if it stays as it is """
+        # the value deciding the result without looking at the other operand
+        decisive = op == LOG_OR
+        if is_constant(left):
+            if bool(constant_value(left)) == decisive:
+                return constant_node(BOOL, decisive)
+            return self.converted(BOOL, right_type, right)
+        if is_constant(right):
+            if bool(constant_value(right)) != decisive:
+                return self.converted(BOOL, left_type, left)
+            if is_pure(left):
+                return constant_node(BOOL, decisive)
+        return None
+
+    def identity(self, op: str, result: str, type: str, node: AST, value, right: bool) -> Optional[AST]:
+        """
+        'node op value' ('value op node' unless 'right') simplified, None if it is not an identity
+        'node' is of 'type', 'result' the type of the operation
+        """
+        if result == DOUBLE:
+            if type != DOUBLE:
+                return None
+            # x + 0.0 is not x for x = -0.0, x + -0.0 is, x - 0.0 too
+            negative_zero = value == 0 and math.copysign(1.0, value) < 0
+            if (op == ASTERIKS and value == 1 or op == DIVIDE and right and value == 1
+                    or op == PLUS and negative_zero or op == MINUS and right and value == 0 and not negative_zero):
+                return node
+            return None
+        if result != INTEGER:
+            return None
+        if (op in (PLUS, OR_OP, XOR_OP) and value == 0 or op == MINUS and right and value == 0
+                or op == ASTERIKS and value == 1 or op == DIVIDE and right and value == 1
+                or op == AND_OP and value == -1 or op in (LEFT_OP, RIGHT_OP) and right and value & 31 == 0):
+            return self.converted(INTEGER, type, node)
+        if op == ASTERIKS and value == -1 or op == MINUS and not right and value == 0 or op == DIVIDE and right and value == -1:
+            return UnaryOp(MINUS_TOKEN, node)
+        if is_pure(node) and (op in (ASTERIKS, AND_OP) and value == 0 or op == MOD and right and value == 1):
+            return constant_node(INTEGER, 0)
+        return None
+
+    def visit_unaryop(self, node: UnaryOp) -> Typed:
+        op = node.token.type
+        type, expr = self.expression(node.expr)
+        rebuilt = UnaryOp(node.token, expr)
+        if type is None:
+            return None, rebuilt
+        try:
+            result = unary_type(op, type)
+        except InterpreterError:
+            return None, rebuilt
+        if is_constant(expr):
+            function = unary_function(op, type)
+            return result, self.constant(result, function or (lambda value: value), constant_value(expr)) or rebuilt
+        if op in TYPE_OF_SPEC and result == type:
+            return result, expr
+        if op == LOG_NOT and isinstance(expr, UnaryOp) and expr.token.type == LOG_NOT:
+            # !!x, the type of x was checked when its ! was folded
+            return result, self.converted(BOOL, self.type_of(expr.expr), expr.expr)
+        if (op == LOG_NOT and isinstance(expr, (BinOp, ConditionLoop)) and expr.token.type in NEGATED
+                and DOUBLE not in (self.type_of(expr.left), self.type_of(expr.right))):
+            # a comparison with a double is false for nan both ways, it can not be negated
+            return result, expr.__class__(expr.left, OPERATOR_TOKENS[NEGATED[expr.token.type]], expr.right)
+        if op == MINUS and isinstance(expr, UnaryOp) and expr.token.type == MINUS:
+            inner_type = self.type_of(expr.expr)
+            if inner_type in NUMERIC:
+                return result, self.converted(result, inner_type, expr.expr)
+        if op == PLUS and result == type:
+            return result, expr
+        return result, rebuilt
+
+    def visit_prefixop(self, node: PrefixOp) -> Typed:
+        # ++ and -- change a variable, chains of them are summed up by the executors
+        inner = node
+        while isinstance(inner, PrefixOp):
+            inner = inner.expr
+        return self.expression(inner)[0], node
+
+    def visit_postfixop(self, node: PostfixOp) -> Typed:
+        return self.expression(node.expr)[0], node
+
+    def visit_ternaryop(self, node: TernaryOp) -> Typed:
+        condition_type, condition = self.expression(node.condition)
+        first_type, first = self.expression(node.first_expr)
+        second_type, second = self.expression(node.second_expr)
+        rebuilt = TernaryOp(condition, first, second)
+        if condition_type not in NUMERIC or first_type is None or second_type is None:
+            return None, rebuilt
+        try:
+            result = common_type(first_type, second_type)
+        except InterpreterError:
+            return None, rebuilt
+        if is_constant(condition):
+            if constant_value(condition):
+                return result, self.converted(result, first_type, first)
+            return result, self.converted(result, second_type, second)
+        if is_pure(condition):
+            if same(first, second):
+                return result, self.converted(result, first_type, first)
+            if result == BOOL and is_constant(first) and is_constant(second):
+                if constant_value(first) and not constant_value(second):
+                    return result, self.converted(BOOL, condition_type, condition)
+                if not constant_value(first) and constant_value(second):
+                    return result, UnaryOp(LOG_NOT_TOKEN, condition)
+        return result, rebuilt
+
+
+def jumps(node: AST) -> bool:
+    """ True if statement 'node' always ends in a break, continue or return """
+    if isinstance(node, (BreakStatement, ContinueStatement, ReturnStatement)):
+        return True
+    if isinstance(node, Compound):
+        return any(jumps(child) for child in node.children)
+    if isinstance(node, ConditionStatement):
+        return jumps(node.if_body) and jumps(node.else_body)
+    return False
+
+
+def leaves_loop(node: AST) -> bool:
+    """ True if statement 'node' has a break or continue of the loop it is the body of """
+    if isinstance(node, (BreakStatement, ContinueStatement)):
+        return True
+    if isinstance(node, Compound):
+        return any(leaves_loop(child) for child in node.children)
+    if isinstance(node, ConditionStatement):
+        return leaves_loop(node.if_body) or leaves_loop(node.else_body)
+    if isinstance(node, SwitchStatement):
+        # a break leaves the switch, a continue the loop
+        bodies = [case.body for case in node.case_statements]
+        if not isinstance(node.default_statement, NoOp):
+            bodies.append(node.default_statement.body)
+        return any(has_continue(body) for body in bodies)
+    return False
+
+
+def has_continue(node: AST) -> bool:
+    """ True if statement 'node' has a continue of the loop around it """
+    if isinstance(node, ContinueStatement):
+        return True
+    if isinstance(node, Compound):
+        return any(has_continue(child) for child in node.children)
+    if isinstance(node, ConditionStatement):
+        return has_continue(node.if_body) or has_continue(node.else_body)
+    if isinstance(node, SwitchStatement):
+        return leaves_loop(node)
+    return False
+
+
+def is_empty(node: AST) -> bool:
+    return isinstance(node, NoOp) or isinstance(node, Compound) and not node.children
+
+
+class DeadCodeEliminator(ConstantFolder):
+    """
+    ConstantFolder that also removes the statements that never run or change nothing:
+    the branch of an if not taken when its condition folds to a constant, loops whose
+    condition is false from the start, statements after a break, continue or return in a
+    block, cases of a switch that no value enters and no case falls through into, and
+    variables that nothing reads, with their assignments, if these are pure
+    A loop whose condition folds to true gets a NoOp condition, like for (;;), the
+    executors then do not test it at all
+    The Program it returns runs like the given one, only programs that pass the checks
+    done before running (see ConstantFolder.fold) are optimised, so no error is removed
+    Reads are counted by ConstantFolder as expressions are visited, the removed code is
+    not visited, variables read only by code the folding dropped are kept
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.declarations = []
+
+    def eliminate(self, tree: Program) -> Program:
+        """ :return: the optimised Program, 'tree' itself if it is nested too deep to optimise """
+        optimised = self.fold(tree)
+        if optimised is tree:
+            return tree
+        dead = set()
+        for declaration in self.declarations:
+            if not declaration.reads and not declaration.kept:
+                dead.add(id(declaration.node))
+                dead.update(id(assignment) for assignment in declaration.assignments)
+        if dead:
+            try:
+                self.remove(optimised, dead)
+            except RecursionError:
+                return tree
+        return optimised
+
+    def remove(self, node: AST, dead: set) -> AST:
+        """ 'node' with the statements in 'dead' (ids) replaced by NoOp, blocks lose them """
+        if id(node) in dead:
+            return NoOp()
+        if isinstance(node, Program):
+            node.declarations_before = [child for child in node.declarations_before if id(child) not in dead]
+            self.remove(node.main_function.compound_statement, dead)
+        elif isinstance(node, Compound):
+            node.children = [self.remove(child, dead) for child in node.children if id(child) not in dead]
+        elif isinstance(node, ConditionStatement):
+            node.if_body = self.remove(node.if_body, dead)
+            node.else_body = self.remove(node.else_body, dead)
+        elif isinstance(node, (WhileStatement, DoWhileStatement)):
+            node.body = self.remove(node.body, dead)
+        elif isinstance(node, ForStatement):
+            node.init = self.remove(node.init, dead)
+            node.action = self.remove(node.action, dead)
+            node.body = self.remove(node.body, dead)
+        elif isinstance(node, SwitchStatement):
+            for case in node.case_statements:
+                case.body = self.remove(case.body, dead)
+            if not isinstance(node.default_statement, NoOp):
+                node.default_statement.body = self.remove(node.default_statement.body, dead)
+        return node
+
+    def constant_condition(self, node: AST):
+        """ (folded condition, its truth if it is a constant, None otherwise) """
+        type, condition = self.expression(node)
+        if type in NUMERIC and is_constant(condition):
+            return condition, bool(constant_value(condition))
+        return condition, None
+
+    # statements
+
+    def visit_compound(self, node: Compound):
+        self.scope = Scope(self.scope)
+        children = []
+        for index, child in enumerate(node.children):
+            statement = self.statement(child)
+            if is_empty(statement) or is_constant(statement) or isinstance(statement, String):
+                continue
+            if isinstance(statement, Compound) and not any(isinstance(item, VarDecl) for item in statement.children):
+                # a block declaring nothing is a scope of its own for nothing
+                children.extend(statement.children)
+            else:
+                children.append(statement)
+            if jumps(statement):
+                # the rest never runs, a program with syntax errors still does not
+                children.extend(item for item in node.children[index + 1:] if isinstance(item, ErrorNode))
+                break
+        self.scope = self.scope.parent
+        compound = Compound()
+        compound.children = children
+        return compound
+
+    def visit_vardecl(self, node: VarDecl):
+        previous = self.scope.names.get(node.var_node.value)
+        super().visit_vardecl(node)
+        declaration = self.scope.names[node.var_node.value]
+        if previous is not None:
+            # a redeclaration is an error, both declarations stay for the executors to report it
+            previous.kept = declaration.kept = True
+        self.declarations.append(declaration)
+        return node
+
+    def visit_assign(self, node: Assign):
+        assignment = super().visit_assign(node)
+        declaration = self.scope.lookup(node.left.value)
+        if declaration is not None:
+            declaration.assignments.append(assignment)
+            if not self.droppable(declaration.type, assignment):
+                declaration.kept = True
+        return assignment
+
+    def droppable(self, type: str, node: Assign) -> bool:
+        """ True if assignment 'node' to a variable of 'type' changes nothing else and can not fail """
+        right = self.type_of(node.right)
+        if right is None or not is_pure(node.right):
+            return False
+        op = node.op.type
+        try:
+            if op == ASSIGN:
+                converter(type, right)
+                return True
+            if op in (DIVIDE_ASSIGN, MOD_ASSIGN):
+                # x / 0 fails
+                return False
+            binary_type(ASSIGN_BINARY_OPS[op], type, right)
+        except InterpreterError:
+            return False
+        return True
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        condition, truth = self.constant_condition(node.condition)
+        if truth is not None:
+            # only the branch taken is visited, names the other one reads are not read
+            return self.statement(node.if_body if truth else node.else_body)
+        if_body = self.statement(node.if_body)
+        else_body = self.statement(node.else_body)
+        if is_empty(if_body) and is_empty(else_body) and self.type_of(condition) in NUMERIC and is_pure(condition):
+            return NoOp()
+        if is_empty(else_body):
+            else_body = NoOp()
+        return ConditionStatement(condition, if_body, else_body)
+
+    def visit_whilestatement(self, node: WhileStatement):
+        condition, truth = self.constant_condition(node.condition)
+        if truth is False:
+            return NoOp()
+        return WhileStatement(NoOp() if truth else condition, self.statement(node.body))
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        body = self.statement(node.body)
+        condition, truth = self.constant_condition(node.condition)
+        if truth is False and not leaves_loop(body):
+            # do { ... } while (false) runs its body once
+            return body
+        return DoWhileStatement(NoOp() if truth else condition, body)
+
+    def visit_forstatement(self, node: ForStatement):
+        self.scope = Scope(self.scope)
+        if isinstance(node.init, Compound):
+            init = Compound()
+            init.children = [self.statement(declaration) for declaration in node.init.children]
+        else:
+            init = self.statement(node.init)
+        if isinstance(node.condition, NoOp):
+            condition, truth = node.condition, True
+        else:
+            condition, truth = self.constant_condition(node.condition)
+        if truth is False:
+            self.scope = self.scope.parent
+            # only the init runs, in a block of its own for the names it declares
+            if isinstance(init, (Compound, NoOp)):
+                return init
+            block = Compound()
+            block.children = [init]
+            return block
+        loop = ForStatement(init, NoOp() if truth else condition, self.statement(node.action),
+                            self.statement(node.body))
+        self.scope = self.scope.parent
+        return loop
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        condition_type, condition = self.expression(node.condition)
+        value = constant_value(condition) if is_constant(condition) else None
+        labels = [self.expression(case.condition)[1] for case in node.case_statements]
+        # a case is entered by its value if no case before has a constant label of the same
+        # value, with a constant condition only the first case that may be equal to it is
+        matched = set()
+        cases = []
+        falls_through = False
+        for case, label in zip(node.case_statements, labels):
+            if is_constant(label):
+                label_value = constant_value(label)
+                entered = label_value not in matched and (value is None or label_value == value)
+                matched.add(label_value)
+            else:
+                entered = value is None or value not in matched
+            # a case no value enters and the case before does not fall through into never runs
+            if entered or falls_through:
+                body = self.statement(case.body)
+                cases.append(SwitchCompound(label, body))
+                falls_through = not jumps(body)
+            else:
+                falls_through = False
+        default = node.default_statement
+        if not isinstance(default, NoOp):
+            if value is None or value not in matched or falls_through:
+                default = SwitchCompound(default.condition, self.statement(default.body))
+            else:
+                default = NoOp()
+        if not cases and isinstance(default, NoOp) and condition_type in INTEGRAL and is_pure(condition):
+            return NoOp()
+        return SwitchStatement(condition, cases, default)
+
+
+def optimize(tree: Program) -> Program:
+    """ 'tree' folded and without dead code, see DeadCodeEliminator """
+    return DeadCodeEliminator().eliminate(tree)
@@ -0,0 +1,310 @@
+import math
+import operator
+import re
+from typing import Callable, Iterable, Iterator, Optional
+
+from lexical_analyzer.token_types import *
+from lexical_analyzer.token_types_simple import *
+
+#  Types of values are the type keywords, float runs as double
+#  int wraps at 32 bits, char at 8 bits, bool is a Python bool, double a float, string a str
+TYPE_OF_SPEC = {INTEGER: INTEGER, FLOAT: DOUBLE, DOUBLE: DOUBLE, CHAR: CHAR, BOOL: BOOL, STRING: STRING}
+LITERAL_TYPES = {INTEGER_CONST: INTEGER, FLOAT_CONST: DOUBLE, DOUBLE_CONST: DOUBLE, CHAR_CONST: CHAR,
+                 STRING_CONST: STRING, TRUE: BOOL, FALSE: BOOL}
+INTEGRAL = (INTEGER, CHAR, BOOL)
+NUMERIC = (INTEGER, CHAR, BOOL, DOUBLE)
+DEFAULT_VALUES = {INTEGER: 0, CHAR: 0, BOOL: False, DOUBLE: 0.0, STRING: ""}
+
+INT_MIN = -0x80000000
+INT_MAX = 0x7FFFFFFF
+
+#  Statements return None or one of these to the enclosing statement
+BREAK, CONTINUE, RETURN = range(1, 4)
+
+ARITHMETIC_OPS = (PLUS, MINUS, ASTERIKS, DIVIDE, MOD)
+INTEGER_OPS = (MOD, LEFT_OP, RIGHT_OP, AND_OP, OR_OP, XOR_OP)
+COMPARISON_OPS = (EQUAL, NOT_EQUAL, LESS, GREATER, LE_OP, GE_OP)
+LOGICAL_OPS = (LOG_AND, LOG_OR)
+#  operator applied by every compound assignment
+ASSIGN_BINARY_OPS = {PLUS_ASSIGN: PLUS, MINUS_ASSIGN: MINUS, MUL_ASSIGN: ASTERIKS, DIVIDE_ASSIGN: DIVIDE,
+                     MOD_ASSIGN: MOD, XOR_ASSIGN: XOR_OP}
+INCREMENTS = {INC_OP: 1, DEC_OP: -1}
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '0': '\0', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+ESCAPE = re.compile(r'\\(.)', re.DOTALL)
+
+
+class InterpreterError(Exception):
+    """ Program that can not be run (type errors, undeclared names) or failed while running """
+
+
+def wrap_int(value: int) -> int:
+    return ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000
+
+
+def wrap_char(value: int) -> int:
+    return ((value + 0x80) & 0xFF) - 0x80
+
+
+def double_to_int(value: float) -> int:
+    """ Truncates toward zero, out of range values (and nan) give INT_MIN like x86 does """
+    if -2147483649.0 < value < 2147483648.0:
+        return int(value)
+    return INT_MIN
+
+
+def divide_int(left: int, right: int) -> int:
+    """ Division truncating toward zero """
+    if right == 0:
+        raise InterpreterError("Integer division by zero")
+    quotient = left // right
+    if quotient < 0 and quotient * right != left:
+        quotient += 1
+    return wrap_int(quotient)
+
+
+def mod_int(left: int, right: int) -> int:
+    """ Remainder with the sign of 'left', INT_MIN % -1 is 0 like INT_MIN / -1 wraps to INT_MIN """
+    if right == 0:
+        raise InterpreterError("Integer division by zero")
+    return wrap_int(left - right * divide_int(left, right))
+
+
+def divide_double(left: float, right: float) -> float:
+    if right == 0:
+        if left == 0 or left != left:
+            return math.nan
+        return math.copysign(math.inf, left) * math.copysign(1.0, right)
+    return left / right
+
+
+INT_FUNCTIONS = {
+    PLUS: lambda left, right: wrap_int(left + right),
+    MINUS: lambda left, right: wrap_int(left - right),
+    ASTERIKS: lambda left, right: wrap_int(left * right),
+    DIVIDE: divide_int,
+    MOD: mod_int,
+    LEFT_OP: lambda left, right: wrap_int(left << (right & 31)),
+    RIGHT_OP: lambda left, right: left >> (right & 31),
+    AND_OP: lambda left, right: int(left & right),
+    OR_OP: lambda left, right: int(left | right),
+    XOR_OP: lambda left, right: int(left ^ right),
+}
+DOUBLE_FUNCTIONS = {
+    PLUS: operator.add,
+    MINUS: operator.sub,
+    ASTERIKS: operator.mul,
+    DIVIDE: divide_double,
+}
+COMPARISON_FUNCTIONS = {
+    EQUAL: operator.eq,
+    NOT_EQUAL: operator.ne,
+    LESS: operator.lt,
+    GREATER: operator.gt,
+    LE_OP: operator.le,
+    GE_OP: operator.ge,
+}
+
+
+def promoted(type: str) -> str:
+    """ Type of an operand of arithmetic: char and bool compute as int """
+    return DOUBLE if type == DOUBLE else INTEGER
+
+
+def arithmetic_type(left: str, right: str) -> str:
+    if left == DOUBLE or right == DOUBLE:
+        return DOUBLE
+    return INTEGER
+
+
+def binary_type(op: str, left: str, right: str) -> str:
+    """ Type of 'left op right', InterpreterError if the operands do not fit the operator """
+    if left not in NUMERIC or right not in NUMERIC:
+        raise InterpreterError(f"Invalid operands {left} and {right} of {op}")
+    if op in LOGICAL_OPS or op in COMPARISON_OPS:
+        return BOOL
+    result = arithmetic_type(left, right)
+    if op in INTEGER_OPS and result == DOUBLE:
+        raise InterpreterError(f"Invalid operands {left} and {right} of {op}")
+    return result
+
+
+def binary_function(op: str, left: str, right: str) -> Callable:
+    """ Function computing 'left op right' (not for && and ||, they short-circuit) """
+    if op in COMPARISON_OPS:
+        return COMPARISON_FUNCTIONS[op]
+    if binary_type(op, left, right) == DOUBLE:
+        return DOUBLE_FUNCTIONS[op]
+    return INT_FUNCTIONS[op]
+
+
+def unary_type(op: str, type: str) -> str:
+    if op in TYPE_OF_SPEC:
+        target = TYPE_OF_SPEC[op]
+        if (target == STRING) != (type == STRING):
+            raise InterpreterError(f"Invalid cast from {type} to {target}")
+        return target
+    if op == AND_OP:
+        raise InterpreterError("Address-of operator is not supported")
+    if type not in NUMERIC or op == NOT_OP and type == DOUBLE:
+        raise InterpreterError(f"Invalid operand {type} of {op}")
+    if op == LOG_NOT:
+        return BOOL
+    return promoted(type)
+
+
+def unary_function(op: str, type: str) -> Optional[Callable]:
+    """ Function computing 'op value' for an operand of 'type', None if the value stays as it is """
+    if op in TYPE_OF_SPEC:
+        return converter(TYPE_OF_SPEC[op], type)
+    if op == LOG_NOT:
+        return operator.not_
+    if op == NOT_OP:
+        return operator.invert
+    if op == MINUS:
+        return operator.neg if type == DOUBLE else lambda value: wrap_int(-value)
+    # unary plus, bool becomes an int
+    return int if type == BOOL else None
+
+
+def common_type(first: str, second: str) -> str:
+    """ Type of a ternary operator with branches of types 'first' and 'second' """
+    if first == second:
+        return first
+    if first in NUMERIC and second in NUMERIC:
+        return arithmetic_type(first, second)
+    raise InterpreterError(f"Operands of ?: have different types {first} and {second}")
+
+
+def converter(target: str, source: str) -> Optional[Callable]:
+    """ Function converting a value of 'source' type to 'target' type, None if it stays as it is """
+    if target == STRING or source == STRING:
+        if target != source:
+            raise InterpreterError(f"Can not convert {source} to {target}")
+        return None
+    if target == source:
+        return None
+    if target == DOUBLE:
+        return float
+    if target == BOOL:
+        return bool
+    if target == INTEGER:
+        if source == DOUBLE:
+            return double_to_int
+        return int if source == BOOL else None
+    # char
+    if source == DOUBLE:
+        return lambda value: wrap_char(double_to_int(value))
+    return wrap_char
+
+
+def convert(target: str, source: str, value):
+    function = converter(target, source)
+    return value if function is None else function(value)
+
+
+def counted_range(start: int, stop: int, inclusive: bool) -> Iterable[int]:
+    """
+    Values of i in for (int i = start; i < stop; i++) (i <= stop if 'inclusive') when
+    nothing else changes i or 'stop' (see loops.CountedLoop)
+    Every int is <= INT_MAX, i wraps around and the loop only ends with a break or return
+    """
+    if not inclusive:
+        return range(start, stop)
+    if stop < INT_MAX:
+        return range(start, stop + 1)
+    return wrapping_count(start)
+
+
+def wrapping_count(start: int) -> Iterator[int]:
+    value = start
+    while True:
+        yield value
+        value = wrap_int(value + 1)
+
+
+def counted_sum(start: int, stop: int, term: Callable[[int], int]) -> int:
+    """
+    Sum of term(i) for i in range(start, stop), 'term' being affine in i (a + b * i
+    computed with + - * on ints, see loops.affine): it is called twice, the sum is exact
+    modulo 2 ** 32 like adding the terms one by one with wrapping
+    """
+    count = stop - start
+    if count <= 0:
+        return 0
+    offset = term(0)
+    slope = term(1) - offset
+    return count * offset + slope * (count * start + count * (count - 1) // 2)
+
+
+def increment(type: str, value, delta: int):
+    """ Value of a variable of 'type' after ++ or -- ('delta' 1 or -1, the sum of a prefix chain) """
+    if type == INTEGER:
+        return wrap_int(value + delta)
+    if type == CHAR:
+        return wrap_char(value + delta)
+    if type == BOOL:
+        return value + delta != 0
+    if type == DOUBLE:
+        return value + delta
+    raise InterpreterError(f"Invalid operand {type} of {'++' if delta > 0 else '--'}")
+
+
+def check_condition(type: str) -> None:
+    if type not in NUMERIC:
+        raise InterpreterError(f"Condition of type {type}")
+
+
+def format_double(value: float) -> str:
+    return '%g' % value
+
+
+FORMATTERS = {
+    INTEGER: lambda value: '%d' % value,
+    CHAR: lambda value: chr(value & 0xFF),
+    BOOL: lambda value: '1' if value else '0',
+    DOUBLE: format_double,
+    STRING: str,
+}
+
+
+def formatter(type: str) -> Callable[..., str]:
+    """ Function printing a value of 'type' the way cout does """
+    return FORMATTERS[type]
+
+
+def unescape(text: str) -> str:
+    """ Value of a string literal, escape sequences are kept as written by the lexer """
+    return ESCAPE.sub(lambda match: ESCAPES.get(match.group(1), match.group(1)), text)
+
+
+def literal(type: str, value):
+    """ Value of a constant of 'type' as the lexer gives it """
+    if type == BOOL:
+        return value == TRUE_V
+    if type == STRING:
+        return unescape(value)
+    return value
+
+
+class Scope:
+    """ Names declared in a block, 'parent' is the scope of the enclosing block """
+
+    def __init__(self, parent: Optional['Scope'] = None):
+        self.parent = parent
+        self.names = {}
+
+    def declare(self, name: str, item) -> None:
+        if name in self.names:
+            raise InterpreterError(f"Redeclaration of {name}")
+        self.names[name] = item
+
+    def lookup(self, name: str):
+        """ Item of the innermost declaration of 'name', None if there is none """
+        scope = self
+        while scope is not None:
+            item = scope.names.get(name)
+            if item is not None:
+                return item
+            scope = scope.parent
+        return None
@@ -0,0 +1,557 @@
+import sys
+from contextlib import contextmanager
+from types import CodeType
+from typing import Callable, List, TextIO
+
+from interpreter.loops import CountedLoop, counted_loop
+from interpreter.node_visitor import NodeVisitor
+from interpreter.runtime import *
+from syntax_analyzer.tree import *
+
+#  Bump on any change to the code the transpiler generates, cached code of older versions is ignored
+TRANSPILER_VERSION = 2
+
+HEADER = [
+    '"""',
+    'Generated by interpreter.transpiler, do not edit',
+    '"""',
+    'from interpreter.runtime import (',
+    '    counted_range, counted_sum, divide_double, divide_int, double_to_int, mod_int, wrap_char',
+    ')',
+    '',
+]
+PYTHON_OPERATORS = {
+    PLUS: '+', MINUS: '-', ASTERIKS: '*',
+    EQUAL: '==', NOT_EQUAL: '!=', LESS: '<', GREATER: '>', LE_OP: '<=', GE_OP: '>=',
+    AND_OP: '&', OR_OP: '|', XOR_OP: '^',
+}
+#  % formats printing a value of each type the way cout does, a char is printed from its low byte
+FORMATS = {INTEGER: '%d', BOOL: '%d', DOUBLE: '%g', STRING: '%s', CHAR: '%c'}
+
+
+def wrapped(code: str) -> str:
+    """ Python expression of the int 'code' wrapped at 32 bits """
+    return f"(({code} + 0x80000000 & 0xFFFFFFFF) - 0x80000000)"
+
+
+class Local:
+    """ Python local variable of a declared variable """
+    __slots__ = ('type', 'name')
+
+    def __init__(self, type: str, name: str):
+        self.type = type
+        self.name = name
+
+
+class Loop:
+    """ Loop being transpiled, 'jump' emits the code of a continue statement of the loop """
+    __slots__ = ('jump',)
+
+    def __init__(self, jump: Callable[[], None]):
+        self.jump = jump
+
+
+class Switch:
+    """ Switch being transpiled, 'flag' is set by a continue statement leaving it, None if there is none """
+    __slots__ = ('flag',)
+
+    def __init__(self):
+        self.flag = None
+
+
+class Transpiler(NodeVisitor):
+    """
+    Translates a Program into the source of a Python module with one function,
+    main(write): CPython then runs the program as its own bytecode
+    Semantics come from 'runtime', shared with the tree walking Interpreter
+    Every declaration becomes a local variable of main named after it with a unique
+    number, so block scoping costs nothing; names of temporaries are C++ keywords
+    (switch_1, case_1) and can not clash with them
+    Loops become while loops (a counted for loop, see loops.counted_loop, a for over a
+    range), a switch is a dict (or a chain of comparisons) giving the
+    index of the first case to run and a one-pass while loop breaking out of it
+    Output is collected in a list and written once main returns or fails
+    Expressions are visited into (type, Python expression), statements append lines
+    """
+
+    def __init__(self, output: TextIO = sys.stdout):
+        self.output = output
+        self.scope = Scope()
+        self.lines = []
+        self.constants = []
+        self.depth = 0
+        self.names = 0
+        self.effects = 0
+        self.targets = []
+        self.in_main = False
+
+    def transpile(self, tree: Program) -> str:
+        """ :return: source of the Python module running 'tree' """
+        try:
+            self.visit(tree)
+        except RecursionError:
+            raise InterpreterError("Program nested too deep to transpile")
+        return "\n".join(HEADER + self.constants + ['', ''] + self.lines) + "\n"
+
+    def compile(self, tree: Program, filename: str = "<transpiled>") -> Callable[[], int]:
+        """ :return: function running the program, it returns the value main returns """
+        return self.load(compile_source(self.transpile(tree), filename))
+
+    def load(self, code: CodeType) -> Callable[[], int]:
+        """ :return: function running the program transpiled into 'code' """
+        namespace = {'__name__': 'transpiled'}
+        exec(code, namespace)
+        main = namespace['main']
+        write = self.output.write
+        return lambda: main(write)
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " * self.depth + line)
+
+    @contextmanager
+    def indented(self):
+        """ Lines emitted inside are a block of the line emitted before """
+        self.depth += 1
+        start = len(self.lines)
+        yield
+        if len(self.lines) == start:
+            self.emit("pass")
+        self.depth -= 1
+
+    @contextmanager
+    def loop(self, jump: Callable[[], None]):
+        """ Lines emitted inside are the body of a loop, 'jump' emits its continue statement """
+        self.targets.append(Loop(jump))
+        with self.indented():
+            yield
+        self.targets.pop()
+
+    def lines_of(self, node: AST) -> List[str]:
+        """ Lines of a statement, indented to be emitted anywhere """
+        lines, depth = self.lines, self.depth
+        self.lines, self.depth = [], 0
+        self.statement(node)
+        result = self.lines
+        self.lines, self.depth = lines, depth
+        return result
+
+    def number(self) -> int:
+        self.names += 1
+        return self.names
+
+    def local(self, node: Variable) -> Local:
+        local = self.scope.lookup(node.value)
+        if local is None:
+            raise InterpreterError(f"Undeclared variable {node.value}")
+        return local
+
+    def statement(self, node: AST) -> None:
+        """ Emits a statement, an expression is evaluated for its side effects """
+        if isinstance(node, (PrefixOp, PostfixOp)):
+            # the value is not used, only the variable is updated
+            delta = 0
+            if isinstance(node, PostfixOp):
+                delta, node = INCREMENTS[node.token.type], node.expr
+            while isinstance(node, PrefixOp):
+                delta += INCREMENTS[node.token.type]
+                node = node.expr
+            local = self.local(node)
+            self.emit(f"{local.name} = {self.incremented(local, delta)}")
+            return
+        code = self.visit(node)
+        if isinstance(code, tuple):
+            self.emit(code[1])
+
+    def expression(self, node: AST):
+        result = self.visit(node)
+        if not isinstance(result, tuple):
+            raise InterpreterError(f"{type(node).__name__} is not an expression")
+        return result
+
+    def condition(self, node: AST) -> str:
+        """ Python expression true when 'node' is, && || and ! stay Python boolean operators """
+        if isinstance(node, (BinOp, ConditionLoop)) and node.token.type in LOGICAL_OPS:
+            operator = 'and' if node.token.type == LOG_AND else 'or'
+            return f"({self.condition(node.left)} {operator} {self.condition(node.right)})"
+        if isinstance(node, UnaryOp) and node.token.type == LOG_NOT:
+            return f"(not {self.condition(node.expr)})"
+        type, code = self.expression(node)
+        check_condition(type)
+        return code
+
+    @staticmethod
+    def converted(target: str, source: str, code: str) -> str:
+        if converter(target, source) is None:
+            return code
+        if target == DOUBLE:
+            return f"float({code})"
+        if target == BOOL:
+            return f"({code} != 0)"
+        if target == INTEGER:
+            return f"double_to_int({code})" if source == DOUBLE else f"int({code})"
+        return f"wrap_char(double_to_int({code}))" if source == DOUBLE else f"wrap_char({code})"
+
+    @staticmethod
+    def binary(op: str, left_type: str, left: str, right_type: str, right: str):
+        """ (type, Python expression) of 'left op right' (not for && and ||) """
+        type = binary_type(op, left_type, right_type)
+        if op in COMPARISON_OPS:
+            return type, f"({left} {PYTHON_OPERATORS[op]} {right})"
+        if type == DOUBLE:
+            if op == DIVIDE:
+                return type, f"divide_double({left}, {right})"
+            return type, f"({left} {PYTHON_OPERATORS[op]} {right})"
+        if op == DIVIDE:
+            return type, f"divide_int({left}, {right})"
+        if op == MOD:
+            return type, f"mod_int({left}, {right})"
+        if op == LEFT_OP:
+            return type, wrapped(f"({left} << ({right} & 31))")
+        if op == RIGHT_OP:
+            return type, f"({left} >> ({right} & 31))"
+        code = f"({left} {PYTHON_OPERATORS[op]} {right})"
+        if op in (PLUS, MINUS, ASTERIKS):
+            return type, wrapped(code[1:-1])
+        # & | ^ of two bools is a bool in Python
+        return type, f"int{code}" if left_type == BOOL and right_type == BOOL else code
+
+    def incremented(self, local: Local, delta: int) -> str:
+        """ Python expression of the value of 'local' after ++ or -- ('delta' is their sum) """
+        type, name = local.type, local.name
+        if type == INTEGER:
+            return wrapped(f"{name} + {delta}")[1:-1]
+        check_condition(type)
+        if type == CHAR:
+            return f"wrap_char({name} + {delta})"
+        if type == BOOL:
+            return f"{name} + {delta} != 0"
+        return f"{name} + {delta}"
+
+    # statements
+
+    def visit_program(self, node: Program):
+        self.emit("def main(write):")
+        with self.indented():
+            self.emit("output = []")
+            self.emit("out = output.append")
+            self.emit("try:")
+            with self.indented():
+                for declaration in node.declarations_before:
+                    self.statement(declaration)
+                # main runs after every global is initialised but, as in the Interpreter, does not see
+                # the ones declared after it
+                lines, self.lines = self.lines, []
+                self.in_main = True
+                self.visit(node.main_function)
+                self.in_main = False
+                lines, self.lines = self.lines, lines
+                for declaration in node.declarations_after:
+                    self.statement(declaration)
+                self.lines.extend(lines)
+            self.emit("finally:")
+            with self.indented():
+                self.emit('write("".join(output))')
+            self.emit("return 0")
+
+    def visit_imports(self, node: Imports):
+        pass
+
+    def visit_mainfunction(self, node: MainFunction):
+        self.visit(node.compound_statement)
+
+    def visit_compound(self, node: Compound):
+        self.scope = Scope(self.scope)
+        for child in node.children:
+            self.statement(child)
+        self.scope = self.scope.parent
+
+    def visit_vardecl(self, node: VarDecl):
+        type = TYPE_OF_SPEC[node.type_node.token.type]
+        local = Local(type, f"{node.var_node.value}_{self.number()}")
+        self.scope.declare(node.var_node.value, local)
+        self.emit(f"{local.name} = {DEFAULT_VALUES[type]!r}")
+
+    def visit_assign(self, node: Assign):
+        local = self.local(node.left)
+        effects = self.effects
+        type, right = self.expression(node.right)
+        op = node.op.type
+        if op == ASSIGN:
+            self.emit(f"{local.name} = {self.converted(local.type, type, right)}")
+            return
+        if self.effects != effects:
+            # the right operand is evaluated before the variable is read, it changes variables
+            self.emit(f"value = {right}")
+            right = "value"
+        result, code = self.binary(ASSIGN_BINARY_OPS[op], local.type, local.name, type, right)
+        self.emit(f"{local.name} = {self.converted(local.type, result, code)}")
+
+    def visit_print(self, node: Print):
+        formats = []
+        arguments = []
+        for child in node.children:
+            if isinstance(child, Variable) and child.value == ENDL_V and self.scope.lookup(ENDL_V) is None:
+                formats.append("\n")
+            elif isinstance(child, String):
+                formats.append(literal(STRING, child.value).replace('%', '%%'))
+            else:
+                type, code = self.expression(child)
+                formats.append(FORMATS[type])
+                arguments.append(f"{code} & 255" if type == CHAR else code)
+        text = "".join(formats)
+        if arguments:
+            self.emit(f"out({text!r} % ({', '.join(arguments)},))")
+        else:
+            self.emit(f"out({text.replace('%%', '%')!r})")
+
+    def visit_conditionstatement(self, node: ConditionStatement):
+        self.emit(f"if {self.condition(node.condition)}:")
+        with self.indented():
+            self.statement(node.if_body)
+        while isinstance(node.else_body, ConditionStatement):
+            node = node.else_body
+            self.emit(f"elif {self.condition(node.condition)}:")
+            with self.indented():
+                self.statement(node.if_body)
+        if not isinstance(node.else_body, NoOp):
+            self.emit("else:")
+            with self.indented():
+                self.statement(node.else_body)
+
+    def visit_whilestatement(self, node: WhileStatement):
+        condition = "True" if isinstance(node.condition, NoOp) else self.condition(node.condition)
+        self.emit(f"while {condition}:")
+        with self.loop(lambda: self.emit("continue")):
+            self.statement(node.body)
+
+    def visit_dowhilestatement(self, node: DoWhileStatement):
+        if isinstance(node.condition, NoOp):
+            self.emit("while True:")
+            with self.loop(lambda: self.emit("continue")):
+                self.statement(node.body)
+            return
+        condition = self.condition(node.condition)
+
+        def jump():
+            self.emit(f"if {condition}:")
+            with self.indented():
+                self.emit("continue")
+            self.emit("break")
+
+        self.emit("while True:")
+        with self.loop(jump):
+            self.statement(node.body)
+            self.emit(f"if not {condition}:")
+            with self.indented():
+                self.emit("break")
+
+    def visit_forstatement(self, node: ForStatement):
+        self.scope = Scope(self.scope)
+        if isinstance(node.init, Compound):
+            for declaration in node.init.children:
+                self.statement(declaration)
+        else:
+            self.statement(node.init)
+        condition = "True" if isinstance(node.condition, NoOp) else self.condition(node.condition)
+        # names of the action are resolved here, the body may declare the same ones
+        action = self.lines_of(node.action)
+        counted = counted_loop(node)
+        if counted is not None and self.counted(counted, node.body):
+            self.scope = self.scope.parent
+            return
+
+        def jump():
+            # continue runs the action like the end of the body does
+            for line in action:
+                self.emit(line)
+            self.emit("continue")
+
+        self.emit(f"while {condition}:")
+        with self.loop(jump):
+            self.statement(node.body)
+            for line in action:
+                self.emit(line)
+        self.scope = self.scope.parent
+
+    def counted(self, counted: CountedLoop, node: AST) -> bool:
+        """
+        Emits a loop that is a CountedLoop with body 'node' as a for over a range, or the
+        sum of all the terms added at once, False if the types do not allow it
+        """
+        stop_type, stop = self.expression(counted.stop)
+        local = self.scope.lookup(counted.variable)
+        if stop_type not in INTEGRAL or local.type != INTEGER:
+            return False
+        name = local.name
+        if counted.accumulator is not None:
+            accumulator = self.local(counted.accumulator)
+            term_type, term = self.expression(counted.term)
+            if accumulator.type == INTEGER and term_type == INTEGER:
+                bound = f"{stop} + 1" if counted.inclusive else stop
+                sign = PYTHON_OPERATORS[counted.op]
+                self.emit(f"{accumulator.name} = "
+                          + wrapped(f"{accumulator.name} {sign} counted_sum({name}, {bound}, lambda {name}: {term})")[1:-1])
+                return True
+        if counted.inclusive:
+            self.emit(f"for {name} in counted_range({name}, {stop}, True):")
+        else:
+            self.emit(f"for {name} in range({name}, {stop}):")
+        with self.loop(lambda: self.emit("continue")):
+            self.statement(node)
+        return True
+
+    def visit_switchstatement(self, node: SwitchStatement):
+        type, condition = self.expression(node.condition)
+        if type not in INTEGRAL:
+            raise InterpreterError(f"Switch on {type}")
+        start = len(self.lines)
+        number = self.number()
+        index = f"case_{number}"
+        cases = node.case_statements
+        default = len(cases)
+        if all(isinstance(case.condition, (Num, Bool)) for case in cases):
+            table = {}
+            for position, case in enumerate(cases):
+                table.setdefault(literal(LITERAL_TYPES[case.condition.token.type], case.condition.value), position)
+            self.constants.append(f"switch_{number} = {table!r}")
+            self.emit(f"{index} = switch_{number}.get({condition}, {default})")
+        else:
+            self.emit(f"switch_{number} = {condition}")
+            chain = str(default)
+            for position in reversed(range(len(cases))):
+                label = self.expression(cases[position].condition)[1]
+                chain = f"{position} if switch_{number} == {label} else {chain}"
+            self.emit(f"{index} = {chain}")
+
+        bodies = [case.body for case in cases]
+        if not isinstance(node.default_statement, NoOp):
+            bodies.append(node.default_statement.body)
+        switch = Switch()
+        self.targets.append(switch)
+        self.emit("while True:")
+        with self.indented():
+            # cases fall through: every body from the first matching one on runs until a break
+            for position, body in enumerate(bodies):
+                self.emit(f"if {index} <= {position}:")
+                with self.indented():
+                    self.statement(body)
+            self.emit("break")
+        self.targets.pop()
+
+        if switch.flag is not None:
+            # a continue statement left the switch, pass it on to the loop
+            if isinstance(self.targets[-1], Loop):
+                self.lines.insert(start, "    " * self.depth + f"{switch.flag} = False")
+            self.emit(f"if {switch.flag}:")
+            with self.indented():
+                if isinstance(self.targets[-1], Switch):
+                    self.emit("break")
+                else:
+                    self.targets[-1].jump()
+
+    def visit_breakstatement(self, node: BreakStatement):
+        if not self.targets:
+            raise InterpreterError("break outside of a loop or switch")
+        self.emit("break")
+
+    def visit_continuestatement(self, node: ContinueStatement):
+        switches = []
+        for target in reversed(self.targets):
+            if isinstance(target, Loop):
+                break
+            switches.append(target)
+        else:
+            raise InterpreterError("continue outside of a loop")
+        if not switches:
+            target.jump()
+            return
+        flag = switches[-1].flag or f"continue_{self.number()}"
+        for switch in switches:
+            switch.flag = flag
+        self.emit(f"{flag} = True")
+        self.emit("break")
+
+    def visit_returnstatement(self, node: ReturnStatement):
+        if not self.in_main:
+            raise InterpreterError("return outside of main")
+        if isinstance(node.expr, NoOp):
+            self.emit("return 0")
+            return
+        type, code = self.expression(node.expr)
+        self.emit(f"return {self.converted(INTEGER, type, code)}")
+
+    def visit_noop(self, node: NoOp):
+        pass
+
+    def visit_errornode(self, node: ErrorNode):
+        raise InterpreterError(f"Can not run a program with syntax errors: {node.error}")
+
+    # expressions
+
+    def visit_num(self, node: Num):
+        type = LITERAL_TYPES[node.token.type]
+        return type, repr(literal(type, node.value))
+
+    visit_string = visit_num
+    visit_bool = visit_num
+
+    def visit_variable(self, node: Variable):
+        local = self.local(node)
+        return local.type, local.name
+
+    def visit_binop(self, node: BinOp):
+        op = node.token.type
+        if op in LOGICAL_OPS:
+            return BOOL, f"(True if {self.condition(node)} else False)"
+        left_type, left = self.expression(node.left)
+        right_type, right = self.expression(node.right)
+        return self.binary(op, left_type, left, right_type, right)
+
+    visit_conditionloop = visit_binop
+
+    def visit_unaryop(self, node: UnaryOp):
+        op = node.token.type
+        type, code = self.expression(node.expr)
+        result = unary_type(op, type)
+        if op in TYPE_OF_SPEC:
+            return result, self.converted(result, type, code)
+        if op == LOG_NOT:
+            return result, f"(not {code})"
+        if op == NOT_OP:
+            return result, f"(~int({code}))" if type == BOOL else f"(~{code})"
+        if op == MINUS:
+            return result, f"(-{code})" if result == DOUBLE else f"((0x80000000 - {code} & 0xFFFFFFFF) - 0x80000000)"
+        return result, f"int({code})" if type == BOOL else code
+
+    def visit_prefixop(self, node: PrefixOp):
+        delta = 0
+        while isinstance(node, PrefixOp):
+            delta += INCREMENTS[node.token.type]
+            node = node.expr
+        local = self.local(node)
+        self.effects += 1
+        return local.type, f"({local.name} := {self.incremented(local, delta)})"
+
+    def visit_postfixop(self, node: PostfixOp):
+        local = self.local(node.expr)
+        self.effects += 1
+        incremented = self.incremented(local, INCREMENTS[node.token.type])
+        return local.type, f"({local.name}, ({local.name} := {incremented}))[0]"
+
+    def visit_ternaryop(self, node: TernaryOp):
+        condition = self.condition(node.condition)
+        first_type, first = self.expression(node.first_expr)
+        second_type, second = self.expression(node.second_expr)
+        type = common_type(first_type, second_type)
+        first = self.converted(type, first_type, first)
+        second = self.converted(type, second_type, second)
+        return type, f"({first} if {condition} else {second})"
+
+
+def compile_source(source: str, filename: str = "<transpiled>") -> CodeType:
+    """ Code object of a module made by Transpiler.transpile """
+    try:
+        return compile(source, filename, 'exec')
+    except (SyntaxError, RecursionError, MemoryError) as e:
+        # CPython limits the nesting of blocks, indentation and parentheses
+        raise InterpreterError(f"Program can not be compiled into Python: {e}")
@@ -0,0 +1,312 @@
+import sys
+import time
+from typing import Callable, List, TextIO
+
+from interpreter.bytecode import *
+from interpreter.runtime import *
+
+
+class Profiler:
+    """
+    Counts and times the instructions a VM runs: per opcode, and per instruction
+    (by position in the code) to find the hot ones
+    Timing wraps every instruction, a profiled run is several times slower than a plain one
+    """
+
+    def __init__(self, bytecode: Bytecode):
+        self.bytecode = bytecode
+        self.counts = [0] * len(OPCODE_NAMES)
+        self.times = [0] * len(OPCODE_NAMES)
+        self.hits = [0] * (len(bytecode.code) // WIDTH)
+
+    def report(self, top: int = 10) -> str:
+        total_count = sum(self.counts) or 1
+        total_time = sum(self.times) or 1
+        lines = [f"{'opcode':<14}{'count':>12}{'%':>7}{'ms':>10}{'%':>7}{'ns each':>9}"]
+        for opcode in sorted(range(len(OPCODE_NAMES)), key=lambda opcode: -self.times[opcode]):
+            count = self.counts[opcode]
+            if count:
+                lines.append(f"{OPCODE_NAMES[opcode]:<14}{count:12d}{count / total_count * 100:7.1f}"
+                             f"{self.times[opcode] / 1e6:10.1f}{self.times[opcode] / total_time * 100:7.1f}"
+                             f"{self.times[opcode] / count:9.0f}")
+        lines.append(f"{'total':<14}{total_count:12d}{'':7}{total_time / 1e6:10.1f}")
+        lines.append("")
+        lines.append("hottest instructions:")
+        hottest = sorted(range(len(self.hits)), key=lambda index: -self.hits[index])[:top]
+        for index in hottest:
+            if self.hits[index]:
+                lines.append(f"{self.hits[index]:12d}  {disassemble(self.bytecode, index * WIDTH)}")
+        return "\n".join(lines)
+
+
+class VM:
+    """
+    Runs Bytecode: the register file is a list, every opcode has a handler taking the
+    position of its instruction and returning the position of the next one (negative
+    to stop), the dispatch loop only indexes the handler table
+    Output is collected in a list and written once the program stops or fails
+    """
+
+    def __init__(self, bytecode: Bytecode, output: TextIO = sys.stdout):
+        self.bytecode = bytecode
+        self.output = output
+        self.exit_code = 0
+
+    def run(self) -> int:
+        """ :return: the value main returns """
+        code, handlers, parts = self.load()
+        pc = 0
+        try:
+            while pc >= 0:
+                pc = handlers[code[pc]](pc)
+        finally:
+            self.output.write("".join(parts))
+        return self.exit_code
+
+    def profile(self, profiler: Profiler) -> int:
+        """ run() counting and timing every instruction in 'profiler' """
+        code, handlers, parts = self.load()
+        counts, times, hits = profiler.counts, profiler.times, profiler.hits
+        clock = time.perf_counter_ns
+        pc = 0
+        try:
+            while pc >= 0:
+                opcode = code[pc]
+                counts[opcode] += 1
+                hits[pc // WIDTH] += 1
+                start = clock()
+                pc = handlers[opcode](pc)
+                times[opcode] += clock() - start
+        finally:
+            self.output.write("".join(parts))
+        return self.exit_code
+
+    def load(self):
+        """ (code as a list, handlers bound to a fresh register file, output parts) """
+        bytecode = self.bytecode
+        code = bytecode.code.tolist()
+        r = [0] * bytecode.registers
+        for register, value in zip(bytecode.constant_registers, bytecode.constants):
+            r[register] = value
+        tables = bytecode.tables
+        parts = []
+        write = parts.append
+        formatters = [formatter(type) for type in TYPES]
+
+        def move(pc):
+            r[code[pc + 1]] = r[code[pc + 2]]
+            return pc + 4
+
+        def add_int(pc):
+            r[code[pc + 1]] = (r[code[pc + 2]] + r[code[pc + 3]] + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def sub_int(pc):
+            r[code[pc + 1]] = (r[code[pc + 2]] - r[code[pc + 3]] + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def mul_int(pc):
+            r[code[pc + 1]] = (r[code[pc + 2]] * r[code[pc + 3]] + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def div_int(pc):
+            r[code[pc + 1]] = divide_int(r[code[pc + 2]], r[code[pc + 3]])
+            return pc + 4
+
+        def mod(pc):
+            r[code[pc + 1]] = mod_int(r[code[pc + 2]], r[code[pc + 3]])
+            return pc + 4
+
+        def shl_int(pc):
+            r[code[pc + 1]] = ((r[code[pc + 2]] << (r[code[pc + 3]] & 31)) + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def shr_int(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] >> (r[code[pc + 3]] & 31)
+            return pc + 4
+
+        def and_int(pc):
+            r[code[pc + 1]] = int(r[code[pc + 2]] & r[code[pc + 3]])
+            return pc + 4
+
+        def or_int(pc):
+            r[code[pc + 1]] = int(r[code[pc + 2]] | r[code[pc + 3]])
+            return pc + 4
+
+        def xor_int(pc):
+            r[code[pc + 1]] = int(r[code[pc + 2]] ^ r[code[pc + 3]])
+            return pc + 4
+
+        def neg_int(pc):
+            r[code[pc + 1]] = (0x80000000 - r[code[pc + 2]] & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def inv_int(pc):
+            r[code[pc + 1]] = ~int(r[code[pc + 2]])
+            return pc + 4
+
+        def not_bool(pc):
+            r[code[pc + 1]] = not r[code[pc + 2]]
+            return pc + 4
+
+        def add_double(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] + r[code[pc + 3]]
+            return pc + 4
+
+        def sub_double(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] - r[code[pc + 3]]
+            return pc + 4
+
+        def mul_double(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] * r[code[pc + 3]]
+            return pc + 4
+
+        def div_double(pc):
+            r[code[pc + 1]] = divide_double(r[code[pc + 2]], r[code[pc + 3]])
+            return pc + 4
+
+        def neg_double(pc):
+            r[code[pc + 1]] = -r[code[pc + 2]]
+            return pc + 4
+
+        def test_eq(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] == r[code[pc + 3]]
+            return pc + 4
+
+        def test_ne(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] != r[code[pc + 3]]
+            return pc + 4
+
+        def test_lt(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] < r[code[pc + 3]]
+            return pc + 4
+
+        def test_gt(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] > r[code[pc + 3]]
+            return pc + 4
+
+        def test_le(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] <= r[code[pc + 3]]
+            return pc + 4
+
+        def test_ge(pc):
+            r[code[pc + 1]] = r[code[pc + 2]] >= r[code[pc + 3]]
+            return pc + 4
+
+        def to_double(pc):
+            r[code[pc + 1]] = float(r[code[pc + 2]])
+            return pc + 4
+
+        def to_bool(pc):
+            r[code[pc + 1]] = bool(r[code[pc + 2]])
+            return pc + 4
+
+        def to_int(pc):
+            r[code[pc + 1]] = double_to_int(r[code[pc + 2]])
+            return pc + 4
+
+        def bool_to_int(pc):
+            r[code[pc + 1]] = int(r[code[pc + 2]])
+            return pc + 4
+
+        def to_char(pc):
+            r[code[pc + 1]] = wrap_char(r[code[pc + 2]])
+            return pc + 4
+
+        def double_to_char(pc):
+            r[code[pc + 1]] = wrap_char(double_to_int(r[code[pc + 2]]))
+            return pc + 4
+
+        def inc_int(pc):
+            a = code[pc + 1]
+            r[a] = (r[a] + code[pc + 2] + 0x80000000 & 0xFFFFFFFF) - 0x80000000
+            return pc + 4
+
+        def inc_char(pc):
+            a = code[pc + 1]
+            r[a] = wrap_char(r[a] + code[pc + 2])
+            return pc + 4
+
+        def inc_bool(pc):
+            a = code[pc + 1]
+            r[a] = r[a] + code[pc + 2] != 0
+            return pc + 4
+
+        def inc_double(pc):
+            a = code[pc + 1]
+            r[a] = r[a] + code[pc + 2]
+            return pc + 4
+
+        def jump(pc):
+            return code[pc + 1]
+
+        def jump_if(pc):
+            return code[pc + 2] if r[code[pc + 1]] else pc + 4
+
+        def jump_unless(pc):
+            return pc + 4 if r[code[pc + 1]] else code[pc + 2]
+
+        def jump_eq(pc):
+            return code[pc + 3] if r[code[pc + 1]] == r[code[pc + 2]] else pc + 4
+
+        def jump_ne(pc):
+            return code[pc + 3] if r[code[pc + 1]] != r[code[pc + 2]] else pc + 4
+
+        def jump_lt(pc):
+            return code[pc + 3] if r[code[pc + 1]] < r[code[pc + 2]] else pc + 4
+
+        def jump_gt(pc):
+            return code[pc + 3] if r[code[pc + 1]] > r[code[pc + 2]] else pc + 4
+
+        def jump_le(pc):
+            return code[pc + 3] if r[code[pc + 1]] <= r[code[pc + 2]] else pc + 4
+
+        def jump_ge(pc):
+            return code[pc + 3] if r[code[pc + 1]] >= r[code[pc + 2]] else pc + 4
+
+        def jump_table(pc):
+            return tables[code[pc + 2]].get(r[code[pc + 1]], code[pc + 3])
+
+        def loop_lt(pc):
+            # the counter was below the stop, it can not pass INT_MAX
+            a = code[pc + 1]
+            value = r[a] = r[a] + 1
+            return code[pc + 3] if value < r[code[pc + 2]] else pc + 4
+
+        def loop_le(pc):
+            a = code[pc + 1]
+            value = r[a] = (r[a] + 0x80000001 & 0xFFFFFFFF) - 0x80000000
+            return code[pc + 3] if value <= r[code[pc + 2]] else pc + 4
+
+        def write_value(pc):
+            write(formatters[code[pc + 2]](r[code[pc + 1]]))
+            return pc + 4
+
+        def exit(pc):
+            self.exit_code = r[code[pc + 1]]
+            return -1
+
+        def halt(pc):
+            self.exit_code = 0
+            return -1
+
+        handlers: List[Callable[[int], int]] = [
+            move,
+            add_int, sub_int, mul_int, div_int, mod,
+            shl_int, shr_int, and_int, or_int, xor_int,
+            neg_int, inv_int, not_bool,
+            add_double, sub_double, mul_double, div_double,
+            neg_double,
+            test_eq, test_ne, test_lt, test_gt, test_le, test_ge,
+            to_double, to_bool, to_int, bool_to_int, to_char, double_to_char,
+            inc_int, inc_char, inc_bool, inc_double,
+            jump,
+            jump_if, jump_unless,
+            jump_eq, jump_ne, jump_lt, jump_gt, jump_le, jump_ge,
+            jump_table,
+            loop_lt, loop_le,
+            write_value,
+            exit,
+            halt,
+        ]
+        return code, handlers, parts
@@ -1,15 +1,15 @@
-from typing import Any, Union
+from typing import Any, Union, Tuple
 import os
 
 import os
 import sys
 
-from utils.utils import buffer
-
 path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.append(os.path.join(path))
 
 from lexical_analyzer.token import Token
+from lexical_analyzer.source import MappedSource
+from lexical_analyzer.line_index import LineIndex
 from lexical_analyzer.token_types import *
 import lexical_analyzer.token_types_simple as tokens_simple
 import lexical_analyzer.errors as errors
@@ -44,6 +44,14 @@ RESERVED_KEYWORDS = {
     COUT_V: Token(COUT, COUT_V),
 }
 
+#  Simple tokens: value -> shared Token, looked up by the longest value first
+SIMPLE_TOKENS = {
+    v: Token(k[:-2], v) for k, v in vars(tokens_simple).items() if not k.startswith('__') and k.endswith('_V')
+}
+SIMPLE_TOKEN_MAX_LEN = max(len(v) for v in SIMPLE_TOKENS)
+LEFT_OP_COUT_TOKEN = Token(LEFT_OP_COUT, tokens_simple.LEFT_OP_V)
+EOF_TOKEN = Token(EOF, None)
+
 
 class LexicalError(Exception):
     def __init__(self, line_num: int, column_num: int, message: str = errors.STANDARD_ERROR):
@@ -58,65 +66,98 @@ class Lexer:
     Responsible for turning input string into set of Tokens
     """
 
-    def __init__(self, code: str):
+    def __init__(self, code: Union[str, MappedSource]):
         self.pos = 0
-        self.line_num = 1
-        self.column_num = 0
         self.code = code
-        self.current_char: str = self.code[self.pos]
+        self.length = len(code)
+        self.line_index = LineIndex(code)
+        self.current_char: Union[str, None] = self.code[self.pos] if self.length else None
         self.is_cout_line = False
+        # offset where the last returned token starts
+        self.token_start = 0
+
+    @classmethod
+    def from_path(cls, path) -> 'Lexer':
+        """ Lexer reading the file through mmap instead of loading it as one string, close it when done """
+        return cls(MappedSource(path))
 
-        vars_ = vars(tokens_simple)
-        tokens = {k: v for k, v in vars_.items() if not k.startswith('__')}.items()
-        self.token_names = {k: v for k, v in tokens if not k.endswith('_V')}
-        self.token_values = {k: v for k, v in tokens if k.endswith('_V')}
+    def close(self) -> None:
+        """ Releases the file a Lexer made by 'from_path' reads """
+        if isinstance(self.code, MappedSource):
+            self.code.close()
+
+    @property
+    def line_num(self) -> int:
+        return self.line_index.location(self.pos)[0]
+
+    @property
+    def column_num(self) -> int:
+        return self.line_index.location(self.pos)[1]
 
     def error(self, message) -> None:
-        raise LexicalError(self.line_num, self.column_num, message)
+        raise LexicalError(*self.line_index.location(self.pos), message)
 
     def move(self) -> None:
-        """ Moves pointer and update 'current_char' """
+        """ Moves pointer and update 'current_char', lines and columns come from 'line_index' """
         self.pos += 1
-        if self.pos > len(self.code) - 1:
+        if self.pos > self.length - 1:
             self.current_char = None
         else:
-            self.column_num += 1
-            if self.current_char == '\n':
-                self.line_num += 1
-                self.column_num = 1
             self.current_char = self.code[self.pos]
 
     def peek(self, steps: int = 1) -> Union[str, None]:
         """ Check next character without moving pointer """
         peek_pos = self.pos + steps
-        if peek_pos > len(self.code) - 1:
+        if peek_pos > self.length - 1:
             return None
         else:
             return self.code[peek_pos]
 
-    @buffer
+    def seek(self, pos: int, is_cout_line: bool = False) -> None:
+        """ Continue scanning from offset 'pos' in the given line state """
+        self.pos = pos
+        self.current_char = self.code[pos] if pos < self.length else None
+        self.is_cout_line = is_cout_line
+
+    def mark(self) -> Tuple:
+        """ Snapshot of the scanning state, cheap enough to take on every lookahead """
+        return self.pos, self.current_char, self.is_cout_line, self.token_start
+
+    def reset(self, state: Tuple) -> None:
+        """ Rewind to a state returned by 'mark' """
+        self.pos, self.current_char, self.is_cout_line, self.token_start = state
+
+    def token_location(self) -> Tuple[int, int]:
+        """ Line and column where the last returned token starts """
+        return self.line_index.location(self.token_start)
+
     def is_string(self):
+        state = self.mark()
         token1 = self.get_next_token()
         token2 = self.get_next_token()
+        self.reset(state)
         return True if token1.type == CHAR and token2.type == tokens_simple.ASTERIKS else False
 
-    @buffer
     def is_include(self):
+        state = self.mark()
         self.move()
         token = self._id()
+        self.reset(state)
         return True if token.value == "include" else False
 
     def _id(self) -> Token:
         """ Handle identifiers and reserved keywords """
-        result = ''
+        start = self.pos
         while self.current_char is not None and self.current_char.isalnum() or self.current_char == '_':
-            result += self.current_char
             self.move()
+        result = self.code[start:self.pos]
 
         # handle 'const char *' pattern
         if result == STRING_V[0] and self.is_string():
+            token_start = self.token_start
             token1 = self.get_next_token()
             token2 = self.get_next_token()
+            self.token_start = token_start
             result = " ".join(STRING_V)
 
         token = RESERVED_KEYWORDS.get(result, Token(ID, result))
@@ -154,36 +195,30 @@ class Lexer:
         """ Parsing numbers into Token
         :return: mutlidigit integer, double or float consumed from the input
         """
-        result = ''
+        start = self.pos
         while self.current_char is not None and self.current_char.isdigit():
-            result += self.current_char
             self.move()
 
         # float number
         if self.current_char == '.':
-            result += self.current_char
             self.move()
 
             while self.current_char is not None and self.current_char.isdigit():
-                result += self.current_char
                 self.move()
 
             # scientific notation
             if self.current_char == 'E':
-                result += self.current_char
                 self.move()
                 if self.current_char == tokens_simple.PLUS_V or self.current_char == tokens_simple.MINUS_V:
-                    result += self.current_char
                     self.move()
 
                 while self.current_char is not None and self.current_char.isdigit():
-                    result += self.current_char
                     self.move()
             elif self.current_char == 'f' and self.current_char == 'd':
                 self.move()
-            token = Token(FLOAT_CONST, float(result))
+            token = Token(FLOAT_CONST, float(self.code[start:self.pos]))
         else:
-            token = Token(INTEGER_CONST, int(result))
+            token = Token(INTEGER_CONST, int(self.code[start:self.pos]))
         return token
 
     def string(self) -> Token:
@@ -191,14 +226,13 @@ class Lexer:
         Allows only double quote (")
         :return: Token(STRING_CONST, value)
         """
-        result = ''
-
         self.move()
+        start = self.pos
         while self.current_char != DOUBLE_QUOTE_V:
             if self.current_char is None:
                 self.error(errors.UNCLOSED_DOUBLE_QUOTE)
-            result += self.current_char
             self.move()
+        result = self.code[start:self.pos]
         self.move()
 
         token = Token(STRING_CONST, result)
@@ -222,19 +256,14 @@ class Lexer:
     def simple_token(self) -> Union[Token, None]:
         """ Symbols here will be simply handled as tokens with corresponding content
         No additional behavior is executed
+        Longest match wins, so '<=' is never split into '<' and '='
         """
-        # ФИЧА
-        for name in self.token_names:
-            val = self.token_values.get(name + "_V")
-            if len(val) == 1:
-                if self.current_char == val:
+        for length in range(SIMPLE_TOKEN_MAX_LEN, 0, -1):
+            token = SIMPLE_TOKENS.get(self.code[self.pos:self.pos + length])
+            if token is not None:
+                for _ in range(length):
                     self.move()
-                    return Token(name, val)
-            if len(val) == 2:
-                if self.current_char == val[0] and self.peek() == val[1]:
-                    self.move()
-                    self.move()
-                    return Token(name, val)
+                return token
         return None
 
     def get_next_token(self) -> Token:
@@ -257,6 +286,8 @@ class Lexer:
                 self.skip_multiline_comment()
                 continue
 
+            self.token_start = self.pos
+
             if self.current_char == tokens_simple.HASH_V and self.is_include():
                 self.move()
                 self._id()
@@ -278,18 +309,19 @@ class Lexer:
                 self.move()
                 self.move()
                 if self.is_cout_line:
-                    return Token(LEFT_OP_COUT, tokens_simple.LEFT_OP_V)
+                    return LEFT_OP_COUT_TOKEN
                 else:
-                    return Token(tokens_simple.LEFT_OP, tokens_simple.LEFT_OP_V)
+                    return SIMPLE_TOKENS[tokens_simple.LEFT_OP_V]
 
             if self.current_char == tokens_simple.SEMI_V:
                 self.is_cout_line = False
                 self.move()
-                return Token(tokens_simple.SEMI, tokens_simple.SEMI_V)
+                return SIMPLE_TOKENS[tokens_simple.SEMI_V]
 
             token = self.simple_token()
             if token is None:
                 self.error(f"No such token '{self.current_char}'")
             return token
 
-        return Token(EOF, None)
+        self.token_start = self.pos
+        return EOF_TOKEN
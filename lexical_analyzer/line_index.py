@@ -0,0 +1,41 @@
+from array import array
+from bisect import bisect_right
+from typing import Tuple, Union
+
+from lexical_analyzer.source import MappedSource
+
+
+class LineIndex:
+    """
+    Offsets where every line of the source starts
+    Built in one pass on the first lookup, then offsets map to (line, column) by bisect
+    Lines and columns are counted from 1
+    """
+
+    def __init__(self, code: Union[str, MappedSource]):
+        self.code = code
+        self._starts = None
+
+    @property
+    def starts(self) -> array:
+        if self._starts is None:
+            starts = array('I', [0])
+            find = self.code.find
+            pos = find('\n')
+            while pos != -1:
+                starts.append(pos + 1)
+                pos = find('\n', pos + 1)
+            self._starts = starts
+        return self._starts
+
+    def location(self, offset: int) -> Tuple[int, int]:
+        starts = self.starts
+        line_num = bisect_right(starts, offset)
+        return line_num, offset - starts[line_num - 1] + 1
+
+    def line(self, line_num: int) -> str:
+        """ Text of line 'line_num' without the line break """
+        starts = self.starts
+        start = starts[line_num - 1]
+        end = starts[line_num] - 1 if line_num < len(starts) else len(self.code)
+        return self.code[start:end]
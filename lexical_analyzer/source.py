@@ -0,0 +1,110 @@
+import mmap
+from array import array
+from bisect import bisect_right
+from typing import Union
+
+
+class MappedSource:
+    """
+    Read-only source file accessed through mmap
+    Behaves like the 'code' string the Lexer indexes and slices, but only a window
+    of a few blocks is decoded at a time, so memory stays flat for huge files
+    Offsets are character offsets of the file decoded as utf-8 (invalid bytes become
+    U+FFFD), so tokens, lines and columns are the ones Lexer gets from the decoded text
+    The file is cut into blocks of about BLOCK_SIZE bytes at character boundaries, the
+    character offset of every block is counted in one pass when the file is opened
+    (ASCII blocks are not decoded for that)
+    Close it, or use it in a with statement, to release the file
+    """
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can not be mapped
+            self.data = b''
+        # byte and character offsets where every block starts, then the ones of the end
+        self.byte_starts = array('q', [0])
+        self.char_starts = array('q', [0])
+        data = self.data
+        size = len(data)
+        start = chars = 0
+        while start < size:
+            end = min(start + self.BLOCK_SIZE, size)
+            while end < size and 0x80 <= data[end] < 0xC0:
+                # a block does not start inside a character
+                end += 1
+            block = data[start:end]
+            chars += len(block) if block.isascii() else len(block.decode('utf-8', errors='replace'))
+            self.byte_starts.append(end)
+            self.char_starts.append(chars)
+            start = end
+        self.length = chars
+        self.window = ''
+        self.window_start = 0
+        self.window_end = 0
+
+    def __enter__(self) -> 'MappedSource':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: Union[int, slice]) -> str:
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(self.length)
+            if start >= stop:
+                return ''
+            if not (self.window_start <= start and stop <= self.window_end):
+                first, last = self.block(start), self.block(stop - 1)
+                return self.text(first, last)[start - self.char_starts[first]:stop - self.char_starts[first]]
+            return self.window[start - self.window_start:stop - self.window_start]
+        if not self.window_start <= index < self.window_end:
+            self.load(index)
+        return self.window[index - self.window_start]
+
+    def find(self, sub: str, start: int = 0) -> int:
+        position = max(start, 0)
+        while position < self.length:
+            if not self.window_start <= position < self.window_end:
+                self.load(position)
+            # a match may start near the end of the window and go on past it
+            text = self.window + self[self.window_end:self.window_end + len(sub) - 1]
+            found = text.find(sub, position - self.window_start)
+            if found != -1:
+                return self.window_start + found
+            if self.window_end == self.length:
+                break
+            position = self.window_end
+            self.load(position)
+        return -1
+
+    def block(self, index: int) -> int:
+        """ Number of the block holding character 'index' """
+        return bisect_right(self.char_starts, index) - 1
+
+    def text(self, first: int, last: int) -> str:
+        """ Decoded text of blocks 'first' to 'last' """
+        return self.data[self.byte_starts[first]:self.byte_starts[last + 1]].decode('utf-8', errors='replace')
+
+    def load(self, index: int) -> None:
+        """ Decode the block holding 'index' with the ones around it, lookahead resets stay in the window """
+        if index < 0 or index >= self.length:
+            raise IndexError(index)
+        block = self.block(index)
+        first = max(0, block - 1)
+        last = min(block + 1, len(self.char_starts) - 2)
+        self.window = self.text(first, last)
+        self.window_start = self.char_starts[first]
+        self.window_end = self.char_starts[last + 1]
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
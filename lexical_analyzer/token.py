@@ -8,6 +8,8 @@ class Token:
     :type - type of the token
     :value - value of the token
     """
+    __slots__ = ('__type', '__value')
+
     def __init__(self, type: str, value: Optional[Any]):
         self.__type = type
         self.__value = value
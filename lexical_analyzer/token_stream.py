@@ -0,0 +1,76 @@
+from typing import List, Tuple, Union
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token import Token
+from lexical_analyzer.token_table import TokenTable
+from lexical_analyzer.token_types import EOF
+
+
+class TokenStream:
+    """Buffered token stream over a Lexer
+    Tokens are pulled from the lexer (or a TokenTable) on demand and kept only while
+    a mark can still rewind to them, so lookahead and speculative scanning are O(1)
+    :cursor - absolute index of the current token
+    """
+
+    def __init__(self, lexer: Union[Lexer, TokenTable]):
+        self.lexer = lexer
+        self.buffer: List[Token] = []
+        self.starts: List[int] = []
+        self.offset = 0
+        self.cursor = 0
+        self.marks = 0
+
+    def fill(self, index: int) -> None:
+        """ Make sure the token with absolute 'index' is buffered """
+        while self.offset + len(self.buffer) <= index:
+            if self.buffer and self.buffer[-1].type == EOF:
+                self.buffer.append(self.buffer[-1])
+                self.starts.append(self.starts[-1])
+            else:
+                self.buffer.append(self.lexer.get_next_token())
+                self.starts.append(self.lexer.token_start)
+
+    def peek(self, k: int = 0) -> Token:
+        """ Token 'k' positions after the current one without consuming anything """
+        index = self.cursor + k
+        if index - self.offset >= len(self.buffer):
+            self.fill(index)
+        return self.buffer[index - self.offset]
+
+    def get_next_token(self) -> Token:
+        """ Consume and return the current token """
+        token = self.peek()
+        self.cursor += 1
+        if not self.marks and self.cursor - self.offset > 64:
+            del self.buffer[:self.cursor - self.offset]
+            del self.starts[:self.cursor - self.offset]
+            self.offset = self.cursor
+        return token
+
+    def advance(self) -> Token:
+        """ Consume the current token and return the next one """
+        self.get_next_token()
+        index = self.cursor - self.offset
+        if index >= len(self.buffer):
+            self.fill(self.cursor)
+        return self.buffer[index]
+
+    def token_location(self, k: int = 0) -> Tuple[int, int]:
+        """ Line and column where token 'k' positions after the current one starts """
+        self.peek(k)
+        return self.lexer.line_index.location(self.starts[self.cursor + k - self.offset])
+
+    def mark(self) -> int:
+        """ Remember the current position, tokens from here on are kept until released """
+        self.marks += 1
+        return self.cursor
+
+    def reset(self, mark: int) -> None:
+        """ Rewind to 'mark' and release it """
+        self.cursor = mark
+        self.release(mark)
+
+    def release(self, mark: int) -> None:
+        """ Drop 'mark' without rewinding """
+        self.marks -= 1
@@ -0,0 +1,219 @@
+from array import array
+from typing import Tuple, Union
+
+from lexical_analyzer.lexer import Lexer, RESERVED_KEYWORDS, SIMPLE_TOKENS, LEFT_OP_COUT_TOKEN, EOF_TOKEN
+from lexical_analyzer.source import MappedSource
+from lexical_analyzer.line_index import LineIndex
+from lexical_analyzer.token import Token
+from lexical_analyzer.token_types import *
+import lexical_analyzer.token_types as token_types
+import lexical_analyzer.token_types_simple as tokens_simple
+
+
+#  Token types as small ints, position in this list is the id
+TOKEN_TYPES = list(dict.fromkeys(
+    k for module in (token_types, tokens_simple) for k, v in vars(module).items() if isinstance(v, str) and k == v
+))
+TOKEN_TYPE_IDS = {name: i for i, name in enumerate(TOKEN_TYPES)}
+
+#  Keywords and punctuation always have the same value, one shared Token per type id
+SHARED_TOKENS = {
+    TOKEN_TYPE_IDS[token.type]: token
+    for token in (*RESERVED_KEYWORDS.values(), *SIMPLE_TOKENS.values(), LEFT_OP_COUT_TOKEN, EOF_TOKEN)
+}
+
+ID_ID = TOKEN_TYPE_IDS[ID]
+INTEGER_CONST_ID = TOKEN_TYPE_IDS[INTEGER_CONST]
+FLOAT_CONST_ID = TOKEN_TYPE_IDS[FLOAT_CONST]
+CHAR_CONST_ID = TOKEN_TYPE_IDS[CHAR_CONST]
+STRING_CONST_ID = TOKEN_TYPE_IDS[STRING_CONST]
+
+
+class TokenTable:
+    """
+    Columnar token buffer
+    Every token is a type id and a [start, end) span into the source, values of
+    identifiers and constants are decoded from the source only when asked for,
+    lines and columns only when a location is asked for
+    Also works as a token source for the Parser, either pulled through 'get_next_token'
+    like a Lexer or read in place through 'peek'/'advance' like a TokenStream
+    'couts' keeps the lexer 'is_cout_line' state each token was scanned in, so
+    lexing can restart at any token after an edit
+
+    Spans of tokens from 'shift_from' on are stored without the pending 'shift',
+    an edit only moves the spans between itself and the previous edit
+    """
+
+    def __init__(self, code: Union[str, MappedSource], line_index: LineIndex = None):
+        self.code = code
+        self.line_index = line_index or LineIndex(code)
+        self.types = array('B')
+        self.couts = array('B')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.shift_from = 0
+        self.shift = 0
+        self.cursor = 0
+        self.last = 0
+
+    @classmethod
+    def from_lexer(cls, lexer: Lexer) -> 'TokenTable':
+        """ Lex everything the lexer has left into a new table """
+        table = cls(lexer.code, lexer.line_index)
+        table.extend(lexer)
+        return table
+
+    def extend(self, lexer: Lexer) -> None:
+        while True:
+            is_cout_line = lexer.is_cout_line
+            token = lexer.get_next_token()
+            self.append(token.type, lexer.token_start, lexer.pos, is_cout_line)
+            if token.type == EOF:
+                return
+
+    def append(self, type: str, start: int, end: int, is_cout_line: bool = False) -> None:
+        self.types.append(TOKEN_TYPE_IDS[type])
+        self.couts.append(is_cout_line)
+        self.starts.append(start - self.shift if len(self.starts) >= self.shift_from else start)
+        self.ends.append(end - self.shift if len(self.ends) >= self.shift_from else end)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, index: int) -> Token:
+        type_id = self.types[index]
+        token = SHARED_TOKENS.get(type_id)
+        if token is None:
+            token = Token(TOKEN_TYPES[type_id], self.value(index))
+        return token
+
+    def value(self, index: int):
+        """ Decode the value of token 'index' from its source span """
+        type_id = self.types[index]
+        if type_id in SHARED_TOKENS:
+            return SHARED_TOKENS[type_id].value
+        start, end = self.span(index)
+        text = self.code[start:end]
+        if type_id == ID_ID:
+            return text
+        if type_id == INTEGER_CONST_ID:
+            return int(text)
+        if type_id == FLOAT_CONST_ID:
+            return float(text)
+        if type_id == CHAR_CONST_ID:
+            return ord(text[1])
+        if type_id == STRING_CONST_ID:
+            return text[1:-1]
+        raise ValueError(f"Token type {TOKEN_TYPES[type_id]} has no value")
+
+    def span(self, index: int) -> Tuple[int, int]:
+        if index >= self.shift_from:
+            return self.starts[index] + self.shift, self.ends[index] + self.shift
+        return self.starts[index], self.ends[index]
+
+    def location(self, index: int) -> Tuple[int, int]:
+        """ Line and column where token 'index' starts """
+        return self.line_index.location(self.span(index)[0])
+
+    def get_next_token(self) -> Token:
+        """ Token under the cursor, the cursor then moves on (and stays at EOF) """
+        self.last = self.cursor
+        if self.cursor < len(self.types) - 1:
+            self.cursor += 1
+        return self[self.last]
+
+    @property
+    def token_start(self) -> int:
+        """ Offset of the token last returned by 'get_next_token' """
+        return self.span(self.last)[0]
+
+    def peek(self, k: int = 0) -> Token:
+        """ Token 'k' positions after the cursor, EOF past the end """
+        return self[min(self.cursor + k, len(self.types) - 1)]
+
+    def advance(self) -> Token:
+        """ Move the cursor on and return the token under it """
+        self.last = self.cursor
+        if self.cursor < len(self.types) - 1:
+            self.cursor += 1
+        return self[self.cursor]
+
+    def token_location(self, k: int = 0) -> Tuple[int, int]:
+        """ Location of the token 'k' positions after the cursor """
+        return self.location(min(self.cursor + k, len(self.types) - 1))
+
+    def relex(self, offset: int, removed: int, inserted: str) -> Tuple[int, int, int]:
+        """
+        Apply an edit to the source and relex only the damaged tokens
+        Lexing restarts two tokens before the edit ('const char *' looks two tokens ahead)
+        and stops at the first token after the edit that starts where an old token
+        started, in the same 'is_cout_line' state, from there on the old tokens are kept
+        On LexicalError the table is left as it was
+        :return: (first, old_stop, new_stop) - tokens [first, old_stop) were replaced by [first, new_stop)
+        """
+        code = self.code[:offset] + inserted + self.code[offset + removed:]
+        delta = len(inserted) - removed
+        count = len(self.types)
+
+        # first token reaching the edit, lexing restarts two tokens earlier
+        low, high = 0, count - 1
+        while low < high:
+            middle = (low + high) // 2
+            if self.span(middle)[1] < offset:
+                low = middle + 1
+            else:
+                high = middle
+        first = max(0, low - 2)
+
+        lexer = Lexer(code)
+        lexer.seek(min(self.span(first)[0], offset), bool(self.couts[first]))
+        new = TokenTable(code)
+        old_stop = count
+        old = low
+        while True:
+            is_cout_line = lexer.is_cout_line
+            token = lexer.get_next_token()
+            start = lexer.token_start
+            if start >= offset + len(inserted):
+                while old < count and self.span(old)[0] < start - delta:
+                    old += 1
+                if old < count and self.span(old)[0] == start - delta and self.couts[old] == is_cout_line:
+                    old_stop = old
+                    break
+            new.append(token.type, start, lexer.pos, is_cout_line)
+            if token.type == EOF:
+                break
+
+        # tokens lexed again before the edit usually come out as they were, keep them
+        same = 0
+        while same < len(new) and first + same < old_stop and new.ends[same] <= offset \
+                and new.types[same] == self.types[first + same] and new.couts[same] == self.couts[first + same] \
+                and (new.starts[same], new.ends[same]) == self.span(first + same):
+            same += 1
+        if same:
+            first += same
+            for column in (new.types, new.couts, new.starts, new.ends):
+                del column[:same]
+
+        self.splice(first, old_stop, new, delta)
+        self.code = code
+        self.line_index = LineIndex(code)
+        self.cursor = self.last = 0
+        return first, old_stop, first + len(new)
+
+    def splice(self, first: int, old_stop: int, new: 'TokenTable', delta: int) -> None:
+        """ Replace tokens [first, old_stop) with 'new', tokens after them move by 'delta' """
+        # settle spans whose pending shift is not the one the tail ends up with
+        if self.shift:
+            for index in range(self.shift_from, first):
+                self.starts[index] += self.shift
+                self.ends[index] += self.shift
+            for index in range(old_stop, self.shift_from):
+                self.starts[index] -= self.shift
+                self.ends[index] -= self.shift
+        self.types[first:old_stop] = new.types
+        self.couts[first:old_stop] = new.couts
+        self.starts[first:old_stop] = new.starts
+        self.ends[first:old_stop] = new.ends
+        self.shift_from = first + len(new)
+        self.shift += delta
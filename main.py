@@ -2,7 +2,10 @@ import argparse
 from pathlib import Path
 
 from syntax_analyzer.parser import Parser, SyntaxError
+from syntax_analyzer.ast_cache import ASTCache
 from lexical_analyzer.lexer import Lexer, LexicalError
+from lexical_analyzer.line_index import LineIndex
+from lexical_analyzer.source import MappedSource
 
 import os
 import sys
@@ -13,36 +16,47 @@ path = os.path.abspath(os.path.join(os.path.dirname(__file__)))
 # sys.path.append(os.path.join(path))
 
 
-def main():
-    # parser = argparse.ArgumentParser()
-    # parser.add_argument("path")
-    # args = parser.parse_args()
-    file_path = Path(path + "/tests/test_parser.cpp")
-    with open(file_path, 'r') as f:
-        code_lines = f.readlines()
-        code = ''.join(code_lines)
+def print_error(line_index: LineIndex, e) -> None:
+    print()
+    print(line_index.line(e.line_num))
+    print('~^~'.rjust(e.column_num+1))
+    print(e)
+
+
+def parse(source: MappedSource):
+    """ Print the tokens and parse, None after printing every error """
     try:
-        lexer = Lexer(code)
         from tests.print_tokens import PrintTokens
-        print_tokens = PrintTokens(Lexer(code))
+        print_tokens = PrintTokens(Lexer(source))
         print_tokens.print()
     except LexicalError as e:
-        print()
-        code_line = code_lines[e.line_num-1][:-1]
-        print(code_line)
-        print('~^~'.rjust(e.column_num+1))
-        print(e)
-        return
-    parser = Parser(lexer)
+        print_error(print_tokens.lexer.line_index, e)
+        return None
+    lexer = Lexer(source)
+    parser = Parser(lexer, recover=True)
     try:
         tree = parser.parse()
     except SyntaxError as e:
-        print()
-        code_line = code_lines[e.line_num-1][:-1]
-        print(code_line)
-        print('~^~'.rjust(e.column_num+1))
-        print(e)
-        return
+        parser.diagnostics.append(e)
+    for e in parser.diagnostics:
+        print_error(lexer.line_index, e)
+    return None if parser.diagnostics else tree
+
+
+def main():
+    # parser = argparse.ArgumentParser()
+    # parser.add_argument("path")
+    # args = parser.parse_args()
+    file_path = Path(path + "/tests/test_parser.cpp")
+    cache = ASTCache()
+    with MappedSource(file_path) as source:
+        key = cache.key(source)
+        tree = cache.get(key)
+        if tree is None:
+            tree = parse(source)
+            if tree is None:
+                return
+            cache.put(key, tree)
 
     from tests.print_tree import GraphTree
     graphic_tree = GraphTree(tree)
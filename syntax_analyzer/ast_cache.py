@@ -0,0 +1,143 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional, Union
+
+from lexical_analyzer.source import MappedSource
+from syntax_analyzer import ast_format
+from syntax_analyzer.ast_format import FormatError
+from syntax_analyzer.flat_tree import lazy
+from syntax_analyzer.parser import GRAMMAR_VERSION
+from syntax_analyzer.tree import Program
+
+DEFAULT_DIRECTORY = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "pythoncpp", "ast",
+)
+DEFAULT_MAX_SIZE = 64 << 20
+
+
+class FileCache:
+    """
+    Directory of cache entries, one or more files named after the key of each, the
+    subclasses define the keys and what 'get' and 'put' read and write
+    Safe for several processes sharing a directory:
+        files are written to a temporary file and renamed into place, readers see
+        either no file or a complete one
+        the modification time of a file is its last use, 'get' touches it and 'put'
+        evicts the least recently used files once the directory outgrows 'max_size'
+        a file (or a temporary file) removed by another process is a miss, never an error
+    """
+    SUFFIX = ""
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def write(self, path: str, data: bytes) -> bool:
+        """ Write 'data' to 'path' at once, :return: False on disk errors """
+        fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            self.remove(temporary)
+            return False
+        return True
+
+    def evict(self) -> None:
+        """ Remove the least recently used files until the directory fits in 'max_size' """
+        entries = []
+        total = 0
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        except FileNotFoundError:
+            return
+        if total <= self.max_size:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_size:
+                break
+            self.remove(path)
+            total -= size
+
+    def clear(self) -> None:
+        for entry in os.scandir(self.directory):
+            self.remove(entry.path)
+
+    @staticmethod
+    def remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class ASTCache(FileCache):
+    """
+    On-disk cache of parsed Program trees
+    Entries are content addressed: the file name is a hash of the grammar version and the
+    source text, so an edited source or a changed grammar simply misses
+    Entries are in the binary format of 'ast_format', a hit maps the file and returns a
+    lazy tree (see flat_tree.lazy): nodes are made as they are visited
+    Files are written, touched and evicted as FileCache describes
+    """
+    SUFFIX = ".ast"
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_size: int = DEFAULT_MAX_SIZE):
+        super().__init__(directory, max_size)
+
+    @staticmethod
+    def key(code: Union[str, bytes, MappedSource]) -> str:
+        """ Cache key of a source text """
+        if isinstance(code, MappedSource):
+            code = code.data
+        elif isinstance(code, str):
+            code = code.encode('utf-8')
+        digest = hashlib.sha256(f"grammar {GRAMMAR_VERSION}\n".encode())
+        digest.update(code)
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Program]:
+        """ Cached tree for 'key', None on a miss """
+        path = self.path(key)
+        try:
+            tree = lazy(ast_format.load(path))
+        except FileNotFoundError:
+            return None
+        except (OSError, FormatError):
+            # unreadable, corrupt (see ast_format.loads) or written by an incompatible version, drop it
+            self.remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return tree
+
+    def put(self, key: str, tree: Program) -> bool:
+        """
+        Store 'tree' under 'key'
+        :return: False if the tree could not be stored (constants the format has no tag for, disk errors)
+        """
+        try:
+            data = ast_format.dumps(tree)
+        except TypeError:
+            return False
+        if not self.write(self.path(key), data):
+            return False
+        self.evict()
+        return True
@@ -0,0 +1,202 @@
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from typing import List, Union
+
+from syntax_analyzer.flat_tree import FlatTree, to_flat
+from syntax_analyzer.parser import GRAMMAR_VERSION, SyntaxError
+from syntax_analyzer.tree import AST
+
+#  Binary format of a tree, all numbers little-endian, every section starts 4-byte aligned:
+#      header          HEADER
+#      kinds           u8 per node
+#      ops             i16 per node
+#      values          i32 per node
+#      spans           2 x i32 per node
+#      starts          u32 per node
+#      edges           i32 per edge
+#      pool offsets    u32 per pool entry and one for the end of the pool, from the pool start
+#      pool            token types, then constants, see 'encode'
+#  The sections are the arrays of FlatTree, the header holds the CRC-32 of all of them
+MAGIC = b"PCAT"
+FORMAT_VERSION = 2
+#  magic, format version, grammar version, nodes, edges, token types, constants, checksum
+HEADER = struct.Struct("<4sHHIIIII")
+
+#  Tags of pool entries
+STR, INT, LONG, FLOAT, TRUE, FALSE, NONE, ERROR = b"SILDTFNE"
+INT64 = struct.Struct("<q")
+DOUBLE = struct.Struct("<d")
+LOCATION = struct.Struct("<ii")
+
+LITTLE_ENDIAN = sys.byteorder == "little"
+UNDECODED = object()
+
+
+class FormatError(Exception):
+    """ Data that is not a tree in this format (or written for another grammar) """
+
+
+def encode(value) -> bytes:
+    if value is True:
+        return bytes((TRUE,))
+    if value is False:
+        return bytes((FALSE,))
+    if value is None:
+        return bytes((NONE,))
+    if isinstance(value, str):
+        return bytes((STR,)) + value.encode('utf-8')
+    if isinstance(value, int):
+        try:
+            return bytes((INT,)) + INT64.pack(value)
+        except struct.error:
+            return bytes((LONG,)) + str(value).encode()
+    if isinstance(value, float):
+        return bytes((FLOAT,)) + DOUBLE.pack(value)
+    if isinstance(value, SyntaxError):
+        return bytes((ERROR,)) + LOCATION.pack(value.line_num, value.column_num) + value.message.encode('utf-8')
+    raise TypeError(f"Can not store a constant of type {type(value).__name__}")
+
+
+def decode(data: memoryview):
+    try:
+        return decode_entry(data)
+    except (IndexError, ValueError, struct.error) as e:
+        # UnicodeDecodeError is a ValueError
+        raise FormatError(f"Bad pool entry: {e}") from e
+
+
+def decode_entry(data: memoryview):
+    tag = data[0]
+    if tag == STR:
+        return str(data[1:], 'utf-8')
+    if tag == INT:
+        return INT64.unpack_from(data, 1)[0]
+    if tag == LONG:
+        return int(str(data[1:], 'ascii'))
+    if tag == FLOAT:
+        return DOUBLE.unpack_from(data, 1)[0]
+    if tag == TRUE:
+        return True
+    if tag == FALSE:
+        return False
+    if tag == NONE:
+        return None
+    if tag == ERROR:
+        error = SyntaxError.__new__(SyntaxError)
+        error.line_num, error.column_num = LOCATION.unpack_from(data, 1)
+        error.message = str(data[1 + LOCATION.size:], 'utf-8')
+        error.args = (error.message,)
+        return error
+    raise FormatError(f"Unknown pool entry {tag}")
+
+
+class Pool:
+    """ Constants decoded from the pool on first use """
+    __slots__ = ('data', 'offsets', 'first', 'decoded')
+
+    def __init__(self, data: memoryview, offsets, first: int, count: int):
+        self.data = data
+        self.offsets = offsets
+        self.first = first
+        self.decoded = [UNDECODED] * count
+
+    def __len__(self):
+        return len(self.decoded)
+
+    def __getitem__(self, index: int):
+        value = self.decoded[index]
+        if value is UNDECODED:
+            entry = self.first + index
+            value = self.decoded[index] = decode(self.data[self.offsets[entry]:self.offsets[entry + 1]])
+        return value
+
+
+def padding(size: int) -> bytes:
+    return bytes(-size % 4)
+
+
+def dumps(tree: Union[AST, FlatTree]) -> bytes:
+    flat = tree if isinstance(tree, FlatTree) else to_flat(tree)
+    parts: List[bytes] = []
+    for values in (flat.kinds, flat.ops, flat.values, flat.spans, flat.starts, flat.edges):
+        if not LITTLE_ENDIAN:
+            values = array(values.typecode, values)
+            values.byteswap()
+        data = values.tobytes()
+        parts.append(data)
+        parts.append(padding(len(data)))
+    entries = [encode(value) for value in flat.token_types]
+    entries.extend(encode(value) for value in flat.constants)
+    offsets = array('I', [0])
+    for entry in entries:
+        offsets.append(offsets[-1] + len(entry))
+    if not LITTLE_ENDIAN:
+        offsets.byteswap()
+    parts.append(offsets.tobytes())
+    parts.extend(entries)
+    body = b"".join(parts)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, GRAMMAR_VERSION, len(flat.kinds), len(flat.edges),
+                         len(flat.token_types), len(flat.constants), zlib.crc32(body))
+    return header + body
+
+
+def loads(data) -> FlatTree:
+    """
+    FlatTree over bytes-like 'data' without copying it: the arrays are memoryviews into
+    'data' (copies on big-endian machines) and constants are decoded when first asked for
+    The checksum is verified first, corrupt data raises FormatError here rather than
+    failing (or running a different program) when the tree is visited
+    """
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise FormatError("Truncated header")
+    magic, version, grammar, nodes, edges, types, constants, checksum = HEADER.unpack_from(view)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise FormatError("Not a tree file of this format version")
+    if grammar != GRAMMAR_VERSION:
+        raise FormatError(f"Tree written for grammar {grammar}, this is grammar {GRAMMAR_VERSION}")
+    if zlib.crc32(view[HEADER.size:]) != checksum:
+        raise FormatError("Checksum mismatch, the data is corrupt")
+
+    position = HEADER.size
+
+    def section(typecode: str, count: int):
+        nonlocal position
+        size = array(typecode).itemsize * count
+        if position + size > len(view):
+            raise FormatError("Truncated data")
+        values = view[position:position + size].cast(typecode)
+        position += size + -size % 4
+        if not LITTLE_ENDIAN:
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    flat = FlatTree.__new__(FlatTree)
+    flat.kinds = section('B', nodes)
+    flat.ops = section('h', nodes)
+    flat.values = section('i', nodes)
+    flat.spans = section('i', 2 * nodes)
+    flat.starts = section('I', nodes)
+    flat.edges = section('i', edges)
+    offsets = section('I', types + constants + 1)
+    pool = view[position:]
+    if len(pool) != offsets[-1]:
+        raise FormatError("Truncated pool")
+    flat.token_types = [decode(pool[offsets[entry]:offsets[entry + 1]]) for entry in range(types)]
+    flat.constants = Pool(pool, offsets, types, constants)
+    return flat
+
+
+def load(path: str) -> FlatTree:
+    """ FlatTree of file 'path', mapped into memory, pages are read as the tree is visited """
+    with open(path, 'rb') as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty file
+            raise FormatError("Truncated header")
+    return loads(data)
@@ -4,3 +4,7 @@ STANDARD_ERROR = "Invalid construction"
 
 def NOT_EXPECTED_TOKEN(expected_token: str, current_token: str):
     return f"Expected token {expected_token} but found {current_token}"
+
+
+def NESTING_TOO_DEEP(what: str, limit: int):
+    return f"{what} are nested deeper than {limit}"
@@ -0,0 +1,284 @@
+from array import array
+from typing import Iterator, List
+
+from lexical_analyzer.token import Token
+from syntax_analyzer.tree import *
+
+NODE = 0
+LIST = 1
+
+#  attributes of every node class holding other nodes, in the order they are visited
+FIELDS = {
+    BinOp: (('left', NODE), ('right', NODE)),
+    UnaryOp: (('expr', NODE),),
+    PostfixOp: (('expr', NODE),),
+    PrefixOp: (('expr', NODE),),
+    Variable: (),
+    ConditionLoop: (('left', NODE), ('right', NODE)),
+    Num: (),
+    String: (),
+    Bool: (),
+    Compound: (('children', LIST),),
+    MainFunction: (('name_node', NODE), ('compound_statement', NODE)),
+    Imports: (('include_nodes', LIST), ('using_nodes', LIST)),
+    ErrorNode: (),
+    NoOp: (),
+    Type: (),
+    Assign: (('left', NODE), ('right', NODE)),
+    VarDecl: (('var_node', NODE), ('type_node', NODE)),
+    Print: (('children', LIST),),
+    TernaryOp: (('condition', NODE), ('first_expr', NODE), ('second_expr', NODE)),
+    Program: (('imports_node', NODE), ('declarations_before', LIST), ('main_function', NODE),
+              ('declarations_after', LIST)),
+    ConditionStatement: (('condition', NODE), ('if_body', NODE), ('else_body', NODE)),
+    ForStatement: (('init', NODE), ('condition', NODE), ('action', NODE), ('body', NODE)),
+    WhileStatement: (('condition', NODE), ('body', NODE)),
+    DoWhileStatement: (('condition', NODE), ('body', NODE)),
+    BreakStatement: (),
+    ContinueStatement: (),
+    ReturnStatement: (('expr', NODE),),
+    SwitchCompound: (('condition', NODE), ('body', NODE)),
+    SwitchStatement: (('condition', NODE), ('case_statements', LIST), ('default_statement', NODE)),
+}
+#  attribute holding the token of the classes that have one
+TOKEN_FIELDS = {
+    BinOp: 'token', UnaryOp: 'token', PostfixOp: 'token', PrefixOp: 'token', Variable: 'token',
+    ConditionLoop: 'token', Num: 'token', String: 'token', Bool: 'token', Type: 'token', Assign: 'op',
+}
+
+KINDS = tuple(FIELDS)
+KIND_IDS = {cls: kind for kind, cls in enumerate(KINDS)}
+KIND_NAMES = tuple(cls.__name__.lower() for cls in KINDS)
+#  position of every attribute among the edges of its node
+FIELD_POSITIONS = tuple({name: position for position, (name, _) in enumerate(fields)} for fields in FIELDS.values())
+
+NONE = -1
+
+
+class FlatTree:
+    """
+    Structure of arrays holding a whole tree, node i is described by
+    kinds[i] - index of its class in KINDS
+    ops[i] - index of the type of its token in 'token_types' (NONE if it has no token)
+    values[i] - index of the value of its token in 'constants' (of the SyntaxError for ErrorNode)
+    spans[2i], spans[2i + 1] - its span (NONE, NONE if it has none)
+    edges[starts[i]:] - one entry per FIELDS attribute, index of the child node (NONE for None)
+    or, for a list, position in 'edges' of its length followed by the indexes of its items
+    Nodes are numbered in pre-order, the root is 0; a node with several parents (the
+    var_node a VarDecl shares with its Assign, leaves interned by the parser) is stored
+    once, where it is first reached, the edges of its other parents point back to it
+    """
+    __slots__ = ('kinds', 'ops', 'values', 'spans', 'starts', 'edges', 'token_types', 'constants')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.ops = array('h')
+        self.values = array('i')
+        self.spans = array('i')
+        self.starts = array('I')
+        self.edges = array('i')
+        self.token_types: List[str] = []
+        self.constants: List = []
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def kind(self, index: int) -> type:
+        return KINDS[self.kinds[index]]
+
+    def child(self, index: int, name: str) -> int:
+        """ Index of the node in attribute 'name' of node 'index', NONE for None """
+        return self.edges[self.starts[index] + FIELD_POSITIONS[self.kinds[index]][name]]
+
+    def children(self, index: int, name: str) -> array:
+        """ Indexes of the nodes in list attribute 'name' of node 'index' """
+        position = self.child(index, name)
+        return self.edges[position + 1:position + 1 + self.edges[position]]
+
+    def token(self, index: int) -> Token:
+        return Token(self.token_types[self.ops[index]], self.constants[self.values[index]])
+
+    def value(self, index: int):
+        """ Value of the token of node 'index', the SyntaxError of an ErrorNode """
+        return self.constants[self.values[index]]
+
+    def op(self, index: int) -> str:
+        """ Type of the token of node 'index' """
+        return self.token_types[self.ops[index]]
+
+    def span(self, index: int):
+        start = self.spans[2 * index]
+        if start == NONE:
+            return None
+        return start, self.spans[2 * index + 1]
+
+    def walk(self) -> Iterator[int]:
+        """ Indexes of all nodes in pre-order """
+        return iter(range(len(self.kinds)))
+
+
+def to_flat(tree: AST) -> FlatTree:
+    flat = FlatTree()
+    kinds, ops, values, spans, starts, edges = flat.kinds, flat.ops, flat.values, flat.spans, flat.starts, flat.edges
+    op_ids, constant_ids = {}, {}
+
+    def intern(value) -> int:
+        try:
+            key = (type(value), value)
+            constant = constant_ids.get(key)
+        except TypeError:
+            key = constant = None
+        if constant is None:
+            constant = len(flat.constants)
+            flat.constants.append(value)
+            if key is not None:
+                constant_ids[key] = constant
+        return constant
+
+    #  id of every node stored -> its index
+    indexes = {}
+    #  (node, position in 'edges' waiting for its index)
+    stack = [(tree, NONE)]
+    while stack:
+        node, slot = stack.pop()
+        index = indexes.get(id(node))
+        if index is not None:
+            edges[slot] = index
+            continue
+        index = indexes[id(node)] = len(kinds)
+        if slot != NONE:
+            edges[slot] = index
+        cls = type(node)
+        kinds.append(KIND_IDS[cls])
+        token_field = TOKEN_FIELDS.get(cls)
+        if token_field is not None:
+            token = getattr(node, token_field)
+            op = op_ids.get(token.type)
+            if op is None:
+                op = op_ids[token.type] = len(flat.token_types)
+                flat.token_types.append(token.type)
+            ops.append(op)
+            values.append(intern(token.value))
+        elif cls is ErrorNode:
+            ops.append(NONE)
+            values.append(intern(node.error))
+        else:
+            ops.append(NONE)
+            values.append(NONE)
+        span = node.span
+        if span is None:
+            spans.extend((NONE, NONE))
+        else:
+            spans.extend(span)
+
+        fields = FIELDS[cls]
+        start = len(edges)
+        starts.append(start)
+        edges.extend([NONE] * len(fields))
+        pending = []
+        for position, (name, shape) in enumerate(fields):
+            value = getattr(node, name)
+            if shape == LIST:
+                edges[start + position] = len(edges)
+                edges.append(len(value))
+                for item in value:
+                    pending.append((item, len(edges)))
+                    edges.append(NONE)
+            elif value is not None:
+                pending.append((value, start + position))
+        stack.extend(reversed(pending))
+    return flat
+
+
+def from_flat(flat: FlatTree) -> AST:
+    """
+    Object tree equal to the one 'flat' was made from, nodes shared there are shared
+    here (and leaves frozen, see Leaf), tokens of the same type and value are shared
+    """
+    kinds, ops, values, starts, edges = flat.kinds, flat.ops, flat.values, flat.starts, flat.edges
+    tokens = {}
+    #  every node is made before any is linked, an edge may point back to an earlier node
+    nodes = [KINDS[kind].__new__(KINDS[kind]) for kind in kinds]
+    linked, shared = set(), set()
+
+    def link(edge: int) -> AST:
+        if edge in linked:
+            shared.add(edge)
+        linked.add(edge)
+        return nodes[edge]
+    for index, node in enumerate(nodes):
+        cls = type(node)
+        token_field = TOKEN_FIELDS.get(cls)
+        if token_field is not None:
+            key = (ops[index], values[index])
+            token = tokens.get(key)
+            if token is None:
+                token = tokens[key] = Token(flat.token_types[key[0]], flat.constants[key[1]])
+            setattr(node, token_field, token)
+        elif cls is ErrorNode:
+            node.error = flat.constants[values[index]]
+        span = flat.span(index)
+        if span is not None:
+            node.span = span
+        start = starts[index]
+        for position, (name, shape) in enumerate(FIELDS[cls]):
+            edge = edges[start + position]
+            if shape == LIST:
+                setattr(node, name, [link(item) for item in edges[edge + 1:edge + 1 + edges[edge]]])
+            else:
+                setattr(node, name, None if edge == NONE else link(edge))
+    for index in shared:
+        if isinstance(nodes[index], Leaf):
+            nodes[index].freeze()
+    return nodes[0]
+
+
+class LazyNode:
+    """
+    Base of the node classes made by 'lazy': a node of the class it replaces (same name,
+    so NodeVisitor dispatches it the same way) standing for node '_index' of '_flat'
+    Attributes are read from '_flat' on first access, so child nodes and tokens are only
+    made for the parts of the tree that are visited; a node with several parents is made
+    once per parent that reads it, use from_flat where identity matters
+    """
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        #  only called for slots not filled yet
+        if name in ('_flat', '_index', '_frozen'):
+            raise AttributeError(name)
+        flat, index = self._flat, self._index
+        kind = flat.kinds[index]
+        cls = KINDS[kind]
+        if name == '_span':
+            value = flat.span(index)
+            if value is None:
+                raise AttributeError(name)
+        elif name == TOKEN_FIELDS.get(cls):
+            value = flat.token(index)
+        elif name == 'error' and cls is ErrorNode:
+            value = flat.value(index)
+        else:
+            position = FIELD_POSITIONS[kind].get(name)
+            if position is None:
+                raise AttributeError(f"'{cls.__name__}' object has no attribute '{name}'")
+            if FIELDS[cls][position][1] == LIST:
+                value = [lazy(flat, item) for item in flat.children(index, name)]
+            else:
+                edge = flat.child(index, name)
+                value = None if edge == NONE else lazy(flat, edge)
+        setattr(self, name, value)
+        return value
+
+
+LAZY_KINDS = tuple(type(cls.__name__, (cls, LazyNode), {'__slots__': ('_flat', '_index'), '__module__': __name__})
+                   for cls in KINDS)
+
+
+def lazy(flat: FlatTree, index: int = 0) -> AST:
+    """ Node 'index' of 'flat' (the root by default), its subtree is made as it is visited """
+    cls = LAZY_KINDS[flat.kinds[index]]
+    node = cls.__new__(cls)
+    node._flat = flat
+    node._index = index
+    return node
@@ -0,0 +1,206 @@
+from typing import Callable, List, Iterator, Tuple
+
+from lexical_analyzer.token_table import TokenTable
+from lexical_analyzer.token_types import *
+from lexical_analyzer.token_types_simple import *
+from syntax_analyzer.parser import Parser, TYPE_SPECS
+from syntax_analyzer.tree import *
+
+
+def blocks(node: AST) -> Iterator[Compound]:
+    """ Blocks nested in statement 'node' with no other block in between ('node' itself if it is one) """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Compound):
+            yield node
+        elif isinstance(node, ConditionStatement):
+            stack.append(node.else_body)
+            stack.append(node.if_body)
+        elif isinstance(node, (WhileStatement, DoWhileStatement, ForStatement, SwitchCompound)):
+            stack.append(node.body)
+        elif isinstance(node, SwitchStatement):
+            stack.append(node.default_statement)
+            stack.extend(reversed(node.case_statements))
+
+
+def shift(node: AST, delta: int) -> None:
+    start, stop = node.span
+    node.span = (start + delta, stop + delta)
+
+
+def grow(node: AST, delta: int) -> None:
+    start, stop = node.span
+    node.span = (start, stop + delta)
+
+
+class IncrementalParser:
+    """
+    Brings a Program up to date after TokenTable.relex by parsing again only the block
+    items (statements and declaration lists) that the replaced tokens touch, every other
+    subtree of the old tree is kept as it is
+    Items are parsed again from the last untouched item before the edit until the parse
+    lands exactly on the start of an old item after it, like 'relex' resyncs on tokens
+    If the innermost block can not absorb the edit (a brace was added or removed), the
+    enclosing block is tried, then the top-level declarations, then the whole program
+    Statements parse the same wherever they start, so the result is the tree a full
+    parse would build, a full parse would also fail with the same SyntaxError
+    """
+
+    def __init__(self, table: TokenTable):
+        self.table = table
+        self.parser = Parser(table)
+
+    def reparse(self, tree: Program, first: int, old_stop: int, new_stop: int) -> Program:
+        """
+        :param tree: Program parsed from the table before the edit, updated in place
+        :param first, old_stop, new_stop: as returned by TokenTable.relex
+        :return: the updated tree (a new one if everything had to be parsed again)
+        """
+        delta = new_stop - old_stop
+        main = tree.main_function
+        if main is None:
+            return self.parse()
+        main_start, main_stop = main.span
+
+        if first >= main_stop:
+            end = len(self.table) - 1 - delta
+            if self.splice(tree.declarations_after, 0, main_stop, end, self.more_declarations, first, old_stop, delta):
+                return tree
+            return self.parse()
+
+        if old_stop <= main_start:
+            if self.splice(tree.declarations_before, 0, 0, main_start, self.more_declarations, first, old_stop, delta):
+                shift(main, delta)
+                for node in tree.declarations_after:
+                    shift(node, delta)
+                return tree
+            return self.parse()
+
+        # innermost block around the edit, 'path' has the item holding each block
+        block = main.compound_statement
+        block_start = main_start + block.span[0]
+        if not (block_start < first and old_stop < main_start + block.span[1]):
+            return self.parse()
+        levels = [(block, block_start)]
+        path = []
+        while True:
+            block, block_start = levels[-1]
+            items = block.children
+            index = self.find(items, block_start, first)
+            if index == len(items):
+                break
+            item = items[index]
+            item_start = block_start + item.span[0]
+            if not (item_start <= first and old_stop <= block_start + item.span[1]):
+                break
+            for nested in blocks(item):
+                nested_start = item_start if nested is item else item_start + nested.span[0]
+                if nested_start < first and old_stop < nested_start + nested.span[1] - nested.span[0]:
+                    path.append((items, index))
+                    levels.append((nested, nested_start))
+                    break
+            else:
+                break
+
+        for depth in reversed(range(len(levels))):
+            block, block_start = levels[depth]
+            block_stop = block_start + block.span[1] - block.span[0]
+            if self.splice(block.children, block_start, block_start + 1, block_stop - 1, self.more_statements,
+                           first, old_stop, delta):
+                self.resize(tree, levels, path, depth, delta)
+                return tree
+        return self.parse()
+
+    def parse(self) -> Program:
+        self.parser = Parser(self.table)
+        self.parser.seek(0)
+        return self.parser.parse()
+
+    def more_statements(self) -> bool:
+        return self.parser.current_token.type != RBRACKET
+
+    def more_declarations(self) -> bool:
+        return self.parser.current_token.type in TYPE_SPECS and not self.parser.is_main()
+
+    @staticmethod
+    def find(items: List[AST], base: int, first: int) -> int:
+        """
+        First item in 'items' (spans relative to 'base') that ends at token 'first' or later
+        An item ending right at 'first' counts too, it may have looked at the token after
+        it ('if' without 'else' does)
+        """
+        low, high = 0, len(items)
+        while low < high:
+            middle = (low + high) // 2
+            if base + items[middle].span[1] < first:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    @staticmethod
+    def find_start(items: List[AST], base: int, position: int) -> int:
+        """ First item in 'items' (spans relative to 'base') that starts at token 'position' or later """
+        low, high = 0, len(items)
+        while low < high:
+            middle = (low + high) // 2
+            if base + items[middle].span[0] < position:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def splice(self, items: List[AST], base: int, low: int, high: int, more: Callable[[], bool],
+               first: int, old_stop: int, delta: int) -> bool:
+        """
+        Parse the items touched by the edit again and put them in place of the old ones
+        :param items: block items, spans relative to 'base'
+        :param low, high: tokens [low, high) the items of the block cover, before the edit
+        :param more: True while the parser would parse another item
+        :return: False (and 'items' untouched) if the new items do not end where old ones started
+        """
+        parser = self.parser
+        index = self.find(items, base, first)
+        parse_start = base + items[index - 1].span[1] if index else low
+        parser.seek(parse_start)
+
+        new_items = []
+        new_stop = old_stop + delta
+        while more():
+            new_items.extend(parser.run(parser.block_items(base)))
+            position = parser.tokens.cursor
+            if position >= new_stop:
+                resync = self.find_start(items, base, position - delta)
+                if resync < len(items) and base + items[resync].span[0] == position - delta:
+                    items[index:resync] = new_items
+                    for following in range(index + len(new_items), len(items)):
+                        shift(items[following], delta)
+                    return True
+
+        position = parser.tokens.cursor
+        if position >= new_stop and position - delta == high:
+            items[index:] = new_items
+            return True
+        return False
+
+    @staticmethod
+    def resize(tree: Program, levels: List[Tuple[Compound, int]], path: List[Tuple[List[AST], int]],
+               depth: int, delta: int) -> None:
+        """ Block 'levels[depth]' changed size by 'delta', move the spans after it in the enclosing nodes """
+        grow(levels[depth][0], delta)
+        for level in reversed(range(depth)):
+            items, index = path[level]
+            item = items[index]
+            inner = levels[level + 1][0]
+            if item is not inner:
+                for nested in blocks(item):
+                    if nested.span[0] > inner.span[0]:
+                        shift(nested, delta)
+                grow(item, delta)
+            for following in range(index + 1, len(items)):
+                shift(items[following], delta)
+            grow(levels[level][0], delta)
+        grow(tree.main_function, delta)
+        for node in tree.declarations_after:
+            shift(node, delta)
@@ -1,15 +1,62 @@
-from typing import Optional, TypeVar, List
+from collections import Counter
+from functools import wraps
+from typing import Callable, Generator, Iterator, Optional, Tuple, TypeVar, List
 
 from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from lexical_analyzer.token_stream import TokenStream
 from lexical_analyzer.token_types import *
 from lexical_analyzer.token_types_simple import *
 from lexical_analyzer.token import Token
 import syntax_analyzer.errors as errors
 from syntax_analyzer.tree import *
-from utils.utils import buffer
 
 ASTNode = TypeVar("ASTNode", bound=AST)
 
+#  Bump on any change to the trees the parser builds, cached trees of older versions are ignored
+GRAMMAR_VERSION = 4
+
+TYPE_SPECS = [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]
+ASSIGN_OPS = [ASSIGN, PLUS_ASSIGN, MINUS_ASSIGN, MUL_ASSIGN, DIVIDE_ASSIGN, MOD_ASSIGN, XOR_ASSIGN]
+
+UNARY_OPS = [PLUS, MINUS, LOG_NOT, NOT_OP, AND_OP]
+CONSTANTS = [INTEGER_CONST, FLOAT_CONST, CHAR_CONST, STRING_CONST, TRUE, FALSE]
+CAST_STARTS = [LPAREN, *TYPE_SPECS]
+
+#  Binary operators from the loosest to the tightest binding
+#  (assignments are statements in this grammar, so they are not listed)
+TERNARY_PRECEDENCE = 0
+BINARY_PRECEDENCE = {
+    LOG_OR: 1,
+    LOG_AND: 2,
+    OR_OP: 3,
+    XOR_OP: 4,
+    AND_OP: 5,
+    EQUAL: 6, NOT_EQUAL: 6,
+    LESS: 7, GREATER: 7, LE_OP: 7, GE_OP: 7,
+    LEFT_OP: 8, RIGHT_OP: 8,
+    PLUS: 9, MINUS: 9,
+    ASTERIKS: 10, DIVIDE: 10, MOD: 10,
+}
+
+#  Frames of the explicit expression stack in 'Parser.expr'
+UNARY, CAST_CALL, PAREN, BINARY, TERNARY_FIRST, TERNARY_SECOND = range(6)
+
+#  Sections of Parser.iter_program, named after the fields of Program the nodes go to
+USING_NODES = "using_nodes"
+INCLUDE_NODES = "include_nodes"
+DECLARATIONS_BEFORE = "declarations_before"
+MAIN_FUNCTION = "main_function"
+MAIN_STATEMENTS = "main_statements"
+DECLARATIONS_AFTER = "declarations_after"
+
+#  Default nesting limits, deeper input is rejected with a SyntaxError
+MAX_STATEMENT_DEPTH = 100_000
+MAX_EXPRESSION_DEPTH = 100_000
+
+#  Leaf nodes shared by every occurrence of the same constant or type keyword
+SHARED_LEAVES = (Num, String, Bool, Type)
+
 
 class SyntaxError(Exception):
     def __init__(self, line_num: int, column_num: int, message: str = errors.STANDARD_ERROR):
@@ -19,52 +66,207 @@ class SyntaxError(Exception):
         super().__init__(self.message)
 
 
+def speculative(predicate: Callable[['Parser'], bool]) -> Callable[['Parser'], bool]:
+    """
+    Memoize a lookahead predicate in Parser.memo by (rule, token index)
+    Predicates only ever look ahead of the cursor, so once the cursor moves on the old
+    entries can not be asked for again and are dropped, the memo never outgrows the
+    handful of predicates asked at one position
+    """
+    rule = predicate.__name__
+
+    @wraps(predicate)
+    def check(self: 'Parser') -> bool:
+        index = self.tokens.cursor
+        if index != self.memo_index:
+            self.memo.clear()
+            self.memo_index = index
+        key = (rule, index)
+        result = self.memo.get(key)
+        if result is None:
+            self.memo_misses[rule] += 1
+            result = self.memo[key] = predicate(self)
+        else:
+            self.memo_hits[rule] += 1
+        return result
+    return check
+
+
 class Parser:
     """
     Parsing AST
+    Speculative checks look ahead through 'peek_token' and never consume tokens; is_main,
+    asked again at the same token by the top-level loop, is memoized per token index
+    ('speculative'), 'memo_hits'/'memo_misses' count its lookups
+    Nothing recurses on nesting depth: expressions keep pending operators on an explicit
+    stack, statements are generators driven by 'run', so nesting is bounded by
+    'max_statement_depth' and 'max_expression_depth' and not by the Python stack
+    The statement depth counts every statement from main's body down to the innermost
+    one, the expression depth the operators and parentheses still waiting for an operand
+
+    Top-level declarations, main, blocks and block items get a token 'span' (see AST),
+    relative to the start of the nearest enclosing node that has one ('span_base'),
+    so an edit only moves the spans of the nodes after it in the same blocks
+
+    With 'recover' a broken block item does not stop parsing: the error goes to
+    'diagnostics', the item becomes an ErrorNode and parsing goes on after the next SEMI
+    or before the RBRACKET closing the block, so one pass reports every error
+
+    Num, String, Bool and Type nodes are interned in 'leaves' by token type and value,
+    equal constants and type keywords are one shared node, frozen (see Leaf)
     """
-    def __init__(self, lexer: Lexer):
+    def __init__(self, lexer: Union[Lexer, TokenTable],
+                 max_statement_depth: int = MAX_STATEMENT_DEPTH, max_expression_depth: int = MAX_EXPRESSION_DEPTH,
+                 recover: bool = False):
         self.lexer = lexer
-        self.current_token: Optional[Token] = self.lexer.get_next_token()
+        self.recover = recover
+        self.diagnostics: List[SyntaxError] = []
+        self.error_position = -1
+        self.memo = {}
+        self.memo_index = -1
+        self.memo_hits = Counter()
+        self.memo_misses = Counter()
+        self.leaves = {}
+        self.max_statement_depth = max_statement_depth
+        self.max_expression_depth = max_expression_depth
+        self.tokens = lexer if isinstance(lexer, TokenTable) else TokenStream(lexer)
+        self.current_token: Optional[Token] = self.tokens.peek()
+        self.span_base = 0
 
     def error(self, message):
-        raise SyntaxError(self.lexer.line_num, self.lexer.column_num-1, message)
+        line_num, column_num = self.tokens.token_location()
+        raise SyntaxError(line_num, column_num, message)
+
+    def recovered(self, error: SyntaxError, outermost: bool = False) -> ErrorNode:
+        """
+        Record 'error' and skip the rest of the broken item (recovery mode only)
+        An error where the previous one was means skipping did not get anywhere, it goes on
+        to the enclosing block unless this is the top level
+        """
+        if not self.recover:
+            raise error
+        if self.tokens.cursor != self.error_position:
+            self.diagnostics.append(error)
+            self.error_position = self.tokens.cursor
+        elif not outermost:
+            raise error
+        self.synchronize()
+        return ErrorNode(error)
+
+    def synchronize(self) -> None:
+        """ Skip past the next SEMI or a whole block, stop before an RBRACKET closing the current block """
+        depth = 0
+        while True:
+            token_type = self.current_token.type
+            if token_type == EOF:
+                return
+            elif token_type == SEMI and not depth:
+                self.current_token = self.tokens.advance()
+                return
+            elif token_type == LBRACKET:
+                depth += 1
+            elif token_type == RBRACKET:
+                if not depth:
+                    return
+                depth -= 1
+                if not depth:
+                    self.current_token = self.tokens.advance()
+                    return
+            self.current_token = self.tokens.advance()
+
+    def peek_token(self, k: int = 1) -> Token:
+        """ Token 'k' positions after the current one """
+        return self.tokens.peek(k)
 
     def eat(self, token_type: str) -> None:
         if self.current_token.type == token_type:
-            self.current_token = self.lexer.get_next_token()
+            self.current_token = self.tokens.advance()
         else:
             self.error(errors.NOT_EXPECTED_TOKEN(token_type, self.current_token.type))
 
-    @buffer
+    def seek(self, index: int) -> None:
+        """ Continue parsing at token 'index' of the TokenTable, any rule can be entered there """
+        self.tokens.cursor = self.tokens.last = index
+        self.current_token = self.tokens.peek()
+        self.memo.clear()
+
+    @speculative
     def is_main(self):
-        self.eat(self.current_token.type)
-        if self.current_token.type != ID:
-            return False
-        self.eat(ID)
-        return self.current_token.type == LPAREN
+        return self.peek_token(1).type == ID and self.peek_token(2).type == LPAREN
 
     def program(self) -> Program:
         """ program : (imports | main_function | statement)* """
-        declarations_before = []
-        declarations_after = []
-        imports_node = Imports()
-        while self.current_token.type in [USING, INCLUDE, INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL] and not self.is_main():
-            if self.current_token.type == USING:
-                imports_node.using_nodes.append(self.imports_using())
-            elif self.current_token.type == INCLUDE:
-                imports_node.include_nodes.append(self.imports_include())
+        program = Program(imports=Imports(), declarations_before=[], main_function=None, declarations_after=[])
+        for section, node in self.program_items():
+            if section == MAIN_STATEMENTS:
+                program.main_function.compound_statement.children.append(node)
+            elif section == MAIN_FUNCTION:
+                program.main_function = node
+            elif section in (USING_NODES, INCLUDE_NODES):
+                getattr(program.imports_node, section).append(node)
             else:
-                declarations_before.extend(self.declaration_list())
+                getattr(program, section).append(node)
+        return program
 
-        main_function = None
-        if self.is_main():
-            main_function = self.main_function()
+    def iter_program(self) -> Iterator[Tuple[str, ASTNode]]:
+        """
+        Parse the whole input like 'parse', but hand out the program one node at a time
+        as (section, node), section being where 'program' would put the node:
+            USING_NODES, INCLUDE_NODES          - imports
+            DECLARATIONS_BEFORE                 - VarDecl/Assign before main
+            MAIN_FUNCTION                       - main, its block is left empty
+            MAIN_STATEMENTS                     - statements and declarations of main, in order
+            DECLARATIONS_AFTER                  - VarDecl/Assign after main
+        Nothing is kept once yielded, so memory does not grow with the length of the program
+        (with a Lexer, tokens are not kept either)
+        A SyntaxError is raised where it is found, after the nodes before it were yielded
+        """
+        yield from self.program_items()
+        if self.current_token.type != EOF:
+            self.error(errors.NOT_EXPECTED_TOKEN(EOF, self.current_token.type))
 
-        while self.current_token.type in [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]:
-            declarations_after.extend(self.declaration_list())
+    def program_items(self) -> Iterator[Tuple[str, ASTNode]]:
+        while self.current_token.type in [USING, INCLUDE, INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL] and not self.is_main():
+            try:
+                if self.current_token.type == USING:
+                    section, nodes = USING_NODES, [self.imports_using()]
+                elif self.current_token.type == INCLUDE:
+                    section, nodes = INCLUDE_NODES, [self.imports_include()]
+                else:
+                    section, nodes = DECLARATIONS_BEFORE, self.run(self.block_items(0))
+            except SyntaxError as e:
+                section, nodes = DECLARATIONS_BEFORE, [self.recovered(e, outermost=True)]
+            for node in nodes:
+                yield section, node
 
-        return Program(imports=imports_node, declarations_before=declarations_before, main_function=main_function, declarations_after=declarations_after)
+        if self.is_main():
+            start = self.span_base = self.tokens.cursor
+            section = DECLARATIONS_BEFORE
+            try:
+                main_function = self.main_function()
+                yield MAIN_FUNCTION, main_function
+                section = MAIN_STATEMENTS
+                for node in self.main_statements(main_function, start):
+                    yield MAIN_STATEMENTS, node
+                main_function.span = (start, self.tokens.cursor)
+            except SyntaxError as e:
+                yield section, self.recovered(e, outermost=True)
+            self.span_base = 0
+
+        while True:
+            while self.current_token.type in [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]:
+                for node in self.run(self.block_items(0)):
+                    yield DECLARATIONS_AFTER, node
+
+            # anything else left is an error, recovery goes on with the declarations after it
+            if not self.recover or self.current_token.type == EOF:
+                return
+            try:
+                self.error(errors.NOT_EXPECTED_TOKEN(EOF, self.current_token.type))
+            except SyntaxError as e:
+                yield DECLARATIONS_AFTER, self.recovered(e, outermost=True)
+            if self.current_token.type == RBRACKET:
+                self.current_token = self.tokens.advance()
 
     def imports_using(self):
         self.eat(USING)
@@ -81,14 +283,60 @@ class Parser:
         return token
 
     def main_function(self) -> MainFunction:
+        """ main_function : INTEGER variable LPAREN RPAREN compound_statement, up to the block """
         self.eat(INTEGER)
         name_node = self.variable()
         self.eat(LPAREN)
         self.eat(RPAREN)
-        compound_statement = self.compound_statement()
-        return MainFunction(compound_statement=compound_statement, name_node=name_node)
+        return MainFunction(compound_statement=Compound(), name_node=name_node)
+
+    def main_statements(self, main_function: MainFunction, main_start: int) -> Iterator[ASTNode]:
+        """ The block of main like compound_statement, but the items are yielded instead of kept """
+        start = self.tokens.cursor
+        self.eat(LBRACKET)
+        while self.current_token.type != RBRACKET:
+            yield from self.run(self.block_items(start))
+        self.eat(RBRACKET)
+        main_function.compound_statement.span = (start - main_start, self.tokens.cursor - main_start)
 
-    def statement(self) -> ASTNode:
+    def run(self, steps: Generator) -> ASTNode:
+        """
+        Drive a statement generator to its node
+        A statement that needs a nested statement yields the nested generator instead of
+        calling it, the nested one goes on an explicit stack, so nesting costs heap and
+        not Python frames
+        A SyntaxError in a nested statement is thrown into its parent, like it would be
+        raised into the caller
+        """
+        stack = [steps]
+        node = None
+        error = None
+        while True:
+            try:
+                if error is None:
+                    nested = stack[-1].send(node)
+                else:
+                    thrown, error = error, None
+                    nested = stack[-1].throw(thrown)
+            except StopIteration as stop:
+                stack.pop()
+                node = stop.value
+                if not stack:
+                    return node
+                continue
+            except SyntaxError as e:
+                stack.pop()
+                if not stack:
+                    raise
+                error = e
+                continue
+            # 'nested' would be one level below the whole stack, main's body is level 1
+            if len(stack) >= self.max_statement_depth:
+                self.error(errors.NESTING_TOO_DEEP("Statements", self.max_statement_depth))
+            stack.append(nested)
+            node = None
+
+    def statement(self) -> Generator:
         """
         **statement**               : assign_statement
                                     | declaration_statement
@@ -99,40 +347,64 @@ class Parser:
                                     | switch_statement
                                     | print_statement
                                     | empty
+        Statement rules are generators run by 'run', nested statements are yielded
         """
         # if self.current_token.type == ID:
         #     node = self.assign_statement()
         if self.current_token.type == IF:
-            node = self.if_statement()
+            node = yield from self.if_statement()
         elif self.current_token.type == LBRACKET:
-            node = self.compound_statement()
+            node = yield from self.compound_statement()
         elif self.current_token.type in [WHILE, DO, FOR]:
-            node = self.loop_statement()
+            node = yield from self.loop_statement()
         elif self.current_token.type in [RETURN, BREAK, CONTINUE]:
             node = self.jump_statement()
         elif self.current_token.type == SWITCH:
-            node = self.switch_statement()
+            node = yield from self.switch_statement()
         elif self.current_token.type == COUT:
             node = self.print_statement()
         else:
             node = self.expr_statement()
         return node
 
-    def compound_statement(self) -> Compound:
+    def compound_statement(self) -> Generator:
         """ compound_statement      : LBRACKET statement* RBRACKET """
         result = []
         compound = Compound()
+        base = self.span_base
+        start = self.tokens.cursor
         self.eat(LBRACKET)
         while self.current_token.type != RBRACKET:
-            if self.current_token.type in [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]:
-                result.extend(self.declaration_list())
-            else:
-                result.append(self.statement())
+            result.extend((yield from self.block_items(start)))
         self.eat(RBRACKET)
         for child in result:
             compound.children.append(child)
+        compound.span = (start - base, self.tokens.cursor - base)
+        self.span_base = base
         return compound
 
+    def block_items(self, block_start: int) -> Generator:
+        """
+        One declaration_list or statement, the nodes get its span relative to 'block_start'
+        (every node of a declaration_list shares the span)
+        """
+        start = self.span_base = self.tokens.cursor
+        try:
+            if self.current_token.type in [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]:
+                nodes = self.declaration_list()
+            else:
+                node = yield self.statement()
+                if type(node) in SHARED_LEAVES:
+                    #  a bare constant statement gets a node of its own, shared leaves never carry a span
+                    node = type(node)(node.token)
+                nodes = [node]
+        except SyntaxError as e:
+            nodes = [self.recovered(e)]
+        span = (start - block_start, self.tokens.cursor - block_start)
+        for node in nodes:
+            node.span = span
+        return nodes
+
     def jump_statement(self):
         if self.current_token.type == RETURN:
             self.eat(RETURN)
@@ -150,19 +422,19 @@ class Parser:
             self.eat(SEMI)
             return ContinueStatement()
 
-    def if_statement(self):
+    def if_statement(self) -> Generator:
         self.eat(IF)
         self.eat(LPAREN)
         condition = self.expr()
         self.eat(RPAREN)
-        if_body = self.statement()
+        if_body = yield self.statement()
         else_body = self.empty()
         if self.current_token.type == ELSE:
             self.eat(ELSE)
-            else_body = self.statement()
+            else_body = yield self.statement()
         return ConditionStatement(condition=condition, if_body=if_body, else_body=else_body)
 
-    def switch_statement(self):
+    def switch_statement(self) -> Generator:
         self.eat(SWITCH)
         self.eat(LPAREN)
         condition = self.expr()
@@ -171,13 +443,13 @@ class Parser:
         case_statements = []
         default_statement = self.empty()
         while self.current_token.type == CASE:
-            case_statements.append(self.case_statement())
+            case_statements.append((yield from self.case_statement()))
         if self.current_token.type == DEFAULT:
-            default_statement = self.default_statement()
+            default_statement = yield from self.default_statement()
         self.eat(RBRACKET)
         return SwitchStatement(condition=condition, case_statements=case_statements, default_statement=default_statement)
 
-    def case_statement(self):
+    def case_statement(self) -> Generator:
         self.eat(CASE)
         condition = self.empty()
         if self.current_token.type == ID:
@@ -185,26 +457,26 @@ class Parser:
         else:
             condition = self.constant()
         self.eat(COLON)
-        body = self.statement()
+        body = yield self.statement()
         return SwitchCompound(condition=condition, body=body)
 
-    def default_statement(self):
+    def default_statement(self) -> Generator:
         self.eat(DEFAULT)
         self.eat(COLON)
-        body = self.statement()
+        body = yield self.statement()
         return SwitchCompound(condition=self.empty(), body=body)
 
-    def loop_statement(self):
+    def loop_statement(self) -> Generator:
         if self.current_token.type == WHILE:
             self.eat(WHILE)
             self.eat(LPAREN)
             condition = self.expr()
             self.eat(RPAREN)
-            body = self.statement()
+            body = yield self.statement()
             return WhileStatement(condition=condition, body=body)
         elif self.current_token.type == DO:
             self.eat(DO)
-            body = self.statement()
+            body = yield self.statement()
             self.eat(WHILE)
             self.eat(LPAREN)
             condition = self.expr()
@@ -214,9 +486,10 @@ class Parser:
         else:
             self.eat(FOR)
             self.eat(LPAREN)
-            print(self.current_token.type)
-            if self.current_token.type in [INTEGER, FLOAT, CHAR, STRING, BOOL]:
-                init = self.declaration_list()[0]
+            if self.current_token.type in TYPE_SPECS:
+                # every declaration of the list belongs to the loop, not to a block of its own
+                init = Compound()
+                init.children = self.declaration_list()
             else:
                 init = self.expr_statement()
             condition = self.expr_statement()
@@ -225,7 +498,7 @@ class Parser:
             else:
                 action = self.expr()
             self.eat(RPAREN)
-            body = self.statement()
+            body = yield self.statement()
             return ForStatement(init=init, condition=condition, action=action, body=body)
 
     # def init_loop_statement(self):
@@ -332,16 +605,107 @@ class Parser:
         [print_node.children.append(node) for node in result]
         return print_node
 
-    def expr(self):
-        node = self.ternary_operator()
-        return node
+    def expr(self, min_precedence: int = TERNARY_PRECEDENCE) -> ASTNode:
+        """
+        Precedence climbing over BINARY_PRECEDENCE
+        expr                    : cast_operator ((binary_op expr) | (QUESTION_MARK expr COLON expr))*
+        cast_operator           : LPAREN type_spec RPAREN cast_operator
+                                | type_spec LPAREN cast_operator RPAREN
+                                | unary_operator
+        unary_operator          : (PLUS | MINUS | LOG_NOT | NOT_OP | AND_OP) cast_operator
+                                | prefix_operator_rep
+                                | factor
+        factor                  : (LPAREN expr RPAREN | constant | variable) (INC_OP | DEC_OP)?
+        Binary operators are left associative, the ternary operator is right associative
+        and binds loosest
+
+        All of these rules run in this one loop, every operator still waiting for its
+        operand is a frame on an explicit stack:
+            (UNARY, op)                                     unary operator or (type) cast
+            (CAST_CALL, op)                                 type( cast, RPAREN follows the operand
+            (PAREN, min_precedence)                         LPAREN expr RPAREN
+            (BINARY, left, op, min_precedence)
+            (TERNARY_FIRST, condition, min_precedence)
+            (TERNARY_SECOND, condition, first_expr, min_precedence)
+        """
+        stack = []
+        while True:
+            if len(stack) > self.max_expression_depth:
+                self.error(errors.NESTING_TOO_DEEP("Expressions", self.max_expression_depth))
+
+            # operand: prefixes go on the stack until a constant or a variable is reached
+            token = self.current_token
+            token_type = token.type
+            if token_type in UNARY_OPS:
+                self.eat(token_type)
+                stack.append((UNARY, token))
+                continue
+            elif token_type in [INC_OP, DEC_OP]:
+                node = self.prefix_operator_rep()
+            elif token_type not in CAST_STARTS:
+                node = self.factor()
+            elif self.check_cast_expression_pre():
+                self.eat(LPAREN)
+                type_node = self.type_spec()
+                self.eat(RPAREN)
+                stack.append((UNARY, type_node.token))
+                continue
+            elif self.check_cast_expression_post():
+                type_node = self.type_spec()
+                self.eat(LPAREN)
+                stack.append((CAST_CALL, type_node.token))
+                continue
+            elif token_type == LPAREN:
+                self.eat(LPAREN)
+                stack.append((PAREN, min_precedence))
+                min_precedence = TERNARY_PRECEDENCE
+                continue
+            else:
+                node = self.factor()
+
+            # operators: reduce the stack until one of them needs another operand
+            while True:
+                while stack and stack[-1][0] in (UNARY, CAST_CALL):
+                    kind, op = stack.pop()
+                    if kind == CAST_CALL:
+                        self.eat(RPAREN)
+                    node = UnaryOp(op=op, expr=node)
+
+                token = self.current_token
+                precedence = BINARY_PRECEDENCE.get(token.type)
+                if precedence is not None and precedence >= min_precedence:
+                    self.eat(token.type)
+                    stack.append((BINARY, node, token, min_precedence))
+                    min_precedence = precedence + 1
+                    break
+                if token.type == QUESTION_MARK and min_precedence <= TERNARY_PRECEDENCE:
+                    self.eat(QUESTION_MARK)
+                    stack.append((TERNARY_FIRST, node, min_precedence))
+                    min_precedence = TERNARY_PRECEDENCE
+                    break
+
+                if not stack:
+                    return node
+                frame = stack.pop()
+                kind = frame[0]
+                if kind == BINARY:
+                    node = BinOp(left=frame[1], op=frame[2], right=node)
+                    min_precedence = frame[3]
+                elif kind == TERNARY_FIRST:
+                    self.eat(COLON)
+                    stack.append((TERNARY_SECOND, frame[1], node, frame[2]))
+                    min_precedence = TERNARY_PRECEDENCE
+                    break
+                elif kind == TERNARY_SECOND:
+                    node = TernaryOp(condition=frame[1], first_expr=frame[2], second_expr=node)
+                    min_precedence = frame[3]
+                else:
+                    self.eat(RPAREN)
+                    node = self.postfix_operator(node)
+                    min_precedence = frame[1]
 
-    @buffer
     def check_assign_statement(self):
-        if self.current_token.type != ID:
-            return False
-        self.eat(self.current_token.type)
-        return self.current_token.type in [ASSIGN, PLUS_ASSIGN, MINUS_ASSIGN, MUL_ASSIGN, DIVIDE_ASSIGN, MOD_ASSIGN, XOR_ASSIGN]
+        return self.current_token.type == ID and self.peek_token(1).type in ASSIGN_OPS
 
     def expr_statement(self):
         node = self.empty()
@@ -354,201 +718,68 @@ class Parser:
         self.eat(SEMI)
         return node
 
-    def ternary_operator(self) -> ASTNode:
-        node = self.logical_or()
-        if self.current_token.type == QUESTION_MARK:
-            self.eat(QUESTION_MARK)
-            expr = self.expr()
-            self.eat(COLON)
-            return TernaryOp(condition=node, first_expr=expr, second_expr=self.ternary_operator())
-        return node
-
-    def logical_or(self):
-        node = self.logical_and()
-        while self.current_token.type == LOG_OR:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.logical_and())
-        return node
-
-    def logical_and(self):
-        node = self.bitwise_or()
-        while self.current_token.type == LOG_AND:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.bitwise_or())
-        return node
-
-    def bitwise_or(self):
-        node = self.bitwise_xor()
-        while self.current_token.type == OR_OP:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.bitwise_xor())
-        return node
-
-    def bitwise_xor(self):
-        node = self.bitwise_and()
-        while self.current_token.type == XOR_OP:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.bitwise_and())
-        return node
-
-    def bitwise_and(self):
-        node = self.equality_ops()
-        while self.current_token.type == XOR_OP:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.equality_ops())
-        return node
-
-    def equality_ops(self):
-        node = self.comparison_ops()
-        while self.current_token.type in [EQUAL, NOT_EQUAL]:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.comparison_ops())
-        return node
-
-    def comparison_ops(self):
-        node = self.left_right_ops()
-        while self.current_token.type in [EQUAL, NOT_EQUAL]:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.left_right_ops())
-        return node
-
-    def left_right_ops(self):
-        node = self.add_sub_ops()
-        while self.current_token.type in [LEFT_OP, RIGHT_OP]:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.add_sub_ops())
-        return node
-
-    def add_sub_ops(self):
-        """add_sub_ops             : mul_div_mod_ops ((PLUS | MINUS) mul_div_mod_ops)*"""
-        node = self.mul_div_mod_ops()
-        while self.current_token.type in [PLUS, MINUS]:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.mul_div_mod_ops())
-        return node
-
-    def mul_div_mod_ops(self):
-        """mul_div_mod_ops         : cast_operator ((MUL | DIV | MOD) cast_operator)*"""
-        node = self.cast_operator()
-        while self.current_token.type in [ASTERIKS, DIVIDE, MOD]:
-            token = self.current_token
-            self.eat(token.type)
-            node = BinOp(left=node, op=token, right=self.cast_operator())
-        return node
-
-    @buffer
     def check_cast_expression_pre(self):
-        if self.current_token.type == LPAREN:
-            self.eat(LPAREN)
-            if self.current_token.type in [INTEGER, DOUBLE, FLOAT, CHAR, STRING, BOOL]:
-                self.eat(self.current_token.type)
-                return self.current_token.type == RPAREN
-        return False
+        return self.current_token.type == LPAREN \
+            and self.peek_token(1).type in TYPE_SPECS \
+            and self.peek_token(2).type == RPAREN
 
-    @buffer
     def check_cast_expression_post(self):
-        if self.current_token.type in [INTEGER, DOUBLE, FLOAT, CHAR, STRING, BOOL]:
-            self.eat(self.current_token.type)
-            return self.current_token.type == LPAREN
-        return False
-
-    def cast_operator(self) -> ASTNode:
-        if self.check_cast_expression_pre():
-            self.eat(LPAREN)
-            type_node = self.type_spec()
-            self.eat(RPAREN)
-            expr = self.cast_operator()
-            return UnaryOp(op=type_node.token, expr=expr)
-
-        elif self.check_cast_expression_post():
-            type_node = self.type_spec()
-            self.eat(LPAREN)
-            expr = self.cast_operator()
-            self.eat(RPAREN)
-            return UnaryOp(op=type_node.token, expr=expr)
-
-        return self.unary_operator()
-
-    def unary_operator(self) -> ASTNode:
-        if self.current_token.type in [INC_OP, DEC_OP]:
-            return self.prefix_operator_rep()
-        elif self.current_token.type in [PLUS, MINUS, LOG_NOT, NOT_OP, AND_OP]:
-            token = self.current_token
-            self.eat(token.type)
-            expr = self.cast_operator()
-            return UnaryOp(op=token, expr=expr)
-        return self.postfix_operator()
+        return self.current_token.type in TYPE_SPECS and self.peek_token(1).type == LPAREN
 
     def prefix_operator_rep(self) -> ASTNode:
-        if self.current_token.type in [INC_OP, DEC_OP]:
-            token = self.current_token
-            self.eat(token.type)
-            expr = self.prefix_operator_rep()
-            return PrefixOp(op=token, expr=expr)
-        else:
-            return self.variable()
-
-    # def postfix_operator_rep(self, var: Variable) -> ASTNode:
-    #     if self.current_token.type in [INC_OP, DEC_OP]:
-    #         token = self.current_token
-    #         self.eat(token.type)
-    #         node = self.postfix_operator_rep(var)
-    #         return PostfixOp(op=token, expr=node)
-    #     else:
-    #         return var
+        """ prefix_operator_rep     : (INC_OP | DEC_OP)* variable """
+        tokens = []
+        while self.current_token.type in [INC_OP, DEC_OP]:
+            tokens.append(self.current_token)
+            self.eat(self.current_token.type)
+        if len(tokens) > self.max_expression_depth:
+            self.error(errors.NESTING_TOO_DEEP("Expressions", self.max_expression_depth))
+        node = self.variable()
+        for token in reversed(tokens):
+            node = PrefixOp(op=token, expr=node)
+        return node
 
-    def postfix_operator(self) -> ASTNode:
-        node = self.factor()
+    def factor(self) -> ASTNode:
+        """ Constant or variable, parenthesized expressions are handled by 'expr' """
+        if self.current_token.type in CONSTANTS:
+            return self.postfix_operator(self.constant())
+        return self.postfix_operator(self.variable())
+
+    def postfix_operator(self, node: ASTNode) -> ASTNode:
+        """ Postfix operators are only allowed on variables """
         if self.current_token.type in [INC_OP, DEC_OP]:
             if not isinstance(node, Variable):
                 self.error("Left value should be variable")
             token = self.current_token
             self.eat(token.type)
             return PostfixOp(op=token, expr=node)
-            # if self.current_token.type in [INC_OP, DEC_OP]:
-            #     return PostfixOp(op=token, expr=self.postfix_operator_rep(node))
-            # else:
-            #     return PostfixOp(op=token, expr=node)
         return node
 
-    def factor(self) -> ASTNode:
-        token = self.current_token
-        if token.type == LPAREN:
-            self.eat(LPAREN)
-            expr = self.expr()
-            self.eat(RPAREN)
-            return expr
-        elif token.type in [INTEGER_CONST, FLOAT_CONST, CHAR_CONST, STRING_CONST, TRUE, FALSE]:
-            return self.constant()
-        else:
-            return self.variable()
-
     def constant(self) -> Union[Num, String, Bool]:
         token = self.current_token
         if token.type in [INTEGER_CONST, FLOAT_CONST, DOUBLE_CONST, CHAR_CONST]:
             self.eat(token.type)
-            return Num(token)
+            return self.leaf(Num, token)
         elif token.type == STRING_CONST:
             self.eat(token.type)
-            return String(token)
+            return self.leaf(String, token)
         elif token.type in [TRUE, FALSE]:
             self.eat(token.type)
-            return Bool(token)
+            return self.leaf(Bool, token)
 
     def type_spec(self) -> Type:
         token = self.current_token
         if token.type in [INTEGER, FLOAT, DOUBLE, CHAR, STRING, BOOL]:
             self.eat(token.type)
-            return Type(token)
+            return self.leaf(Type, token)
+
+    def leaf(self, cls, token: Token) -> ASTNode:
+        """ The shared 'cls' node of constants or type keywords equal to 'token' """
+        key = (token.type, token.value)
+        node = self.leaves.get(key)
+        if node is None:
+            node = self.leaves[key] = cls(token).freeze()
+        return node
 
     def variable(self) -> Variable:
         node = Variable(token=self.current_token)
@@ -560,7 +791,6 @@ class Parser:
 
     def parse(self) -> ASTNode:
         node = self.program()
-        print(node)
         if self.current_token.type != EOF:
             self.error(errors.NOT_EXPECTED_TOKEN(EOF, self.current_token.type))
 
@@ -1,111 +1,200 @@
-from typing import Sequence, Union, TypeVar, Optional
+from typing import Iterator, Sequence, Union, TypeVar, Optional
 
 from lexical_analyzer.token import Token
 
 
 class AST:
-    pass
+    """
+    Nodes are slotted, attributes are listed in '__slots__' of every class
+    span - [start, stop) token indexes of the node, relative to the start of the nearest
+    enclosing node with a span, set by the Parser on top-level declarations, main,
+    blocks and block items only (None elsewhere)
+    """
+    __slots__ = ('_span',)
+
+    @property
+    def span(self):
+        try:
+            return self._span
+        except AttributeError:
+            return None
+
+    @span.setter
+    def span(self, span):
+        self._span = span
 
 
 ASTNode = TypeVar("ASTNode", bound=AST)
 
 
 class BinOp(AST):
+    __slots__ = ('left', 'token', 'right')
+
     def __init__(self, left: ASTNode, op: Token, right: ASTNode):
         self.left = left
-        self.token = self.op = op
+        self.token = op
         self.right = right
 
+    @property
+    def op(self) -> Token:
+        return self.token
+
 
 class UnaryOp(AST):
+    __slots__ = ('token', 'expr')
+
     def __init__(self, op: Token, expr: ASTNode):
-        self.token = self.op = op
+        self.token = op
         self.expr = expr
 
+    @property
+    def op(self) -> Token:
+        return self.token
+
 
 class PostfixOp(AST):
+    __slots__ = ('token', 'expr')
+
     def __init__(self, op: Token, expr: ASTNode):
-        self.token = self.op = op
+        self.token = op
         self.expr = expr
 
+    @property
+    def op(self) -> Token:
+        return self.token
+
 
 class PrefixOp(AST):
+    __slots__ = ('token', 'expr')
+
     def __init__(self, op: Token, expr: ASTNode):
-        self.token = self.op = op
+        self.token = op
         self.expr = expr
 
+    @property
+    def op(self) -> Token:
+        return self.token
+
 
 class Variable(AST):
     """
     value - name of variable
     """
+    __slots__ = ('token',)
+
     def __init__(self, token: Token):
         self.token = token
-        self.value = self.token.value
+
+    @property
+    def value(self):
+        return self.token.value
 
 
 class ConditionLoop(AST):
+    __slots__ = ('left', 'token', 'right')
+
     def __init__(self, left, token: Token, right):
         self.left = left
         self.token = token
         self.right = right
 
 
-class Num(AST):
+class Leaf(AST):
     """
-    value - value of num
+    Node of a single constant or type keyword token: Num, String, Bool and Type
+    The Parser shares one leaf between equal tokens (see Parser.leaf) and freezes it,
+    setting an attribute of a frozen leaf raises AttributeError: a change to one
+    occurrence would change every other one
     """
+    __slots__ = ('token', '_frozen')
+
     def __init__(self, token: Token):
         self.token = token
-        self.value = self.token.value
+
+    def __setattr__(self, name, value):
+        try:
+            frozen = self._frozen
+        except AttributeError:
+            frozen = False
+        if frozen:
+            raise AttributeError(f"{type(self).__name__} node is shared, '{name}' can not be set")
+        object.__setattr__(self, name, value)
+
+    def freeze(self) -> 'Leaf':
+        self._frozen = True
+        return self
+
+    @property
+    def value(self):
+        return self.token.value
 
 
-class String(AST):
+class Num(Leaf):
+    """
+    value - value of num
+    """
+    __slots__ = ()
+
+
+class String(Leaf):
     """
     value - value of string
     """
-    def __init__(self, token: Token):
-        self.token = token
-        self.value = self.token.value
+    __slots__ = ()
 
 
-class Bool(AST):
+class Bool(Leaf):
     """
     value - value of bool
     """
-    def __init__(self, token: Token):
-        self.token = token
-        self.value = self.token.value
+    __slots__ = ()
 
 
 class Compound(AST):
+    __slots__ = ('children',)
+
     def __init__(self):
         self.children = []
 
 
 class MainFunction(AST):
+    __slots__ = ('name_node', 'compound_statement')
+
     def __init__(self, compound_statement: Compound, name_node):
         self.name_node = name_node
         self.compound_statement = compound_statement
 
 
 class Imports(AST):
+    __slots__ = ('include_nodes', 'using_nodes')
+
     def __init__(self):
         self.include_nodes = []
         self.using_nodes = []
 
 
+class ErrorNode(AST):
+    """
+    Block item that failed to parse in recovery mode
+    error - the SyntaxError, also in Parser.diagnostics
+    """
+    __slots__ = ('error',)
+
+    def __init__(self, error):
+        self.error = error
+
+
 class NoOp(AST):
-    pass
+    __slots__ = ()
 
 
-class Type(AST):
-    def __init__(self, token: Token):
-        self.token = token
-        self.value = token.value
+class Type(Leaf):
+    __slots__ = ()
 
 
 class Assign(AST):
+    __slots__ = ('left', 'op', 'right')
+
     def __init__(self, left: Variable, op: Token, right):
         self.left = left
         self.op = op
@@ -113,17 +202,23 @@ class Assign(AST):
 
 
 class VarDecl(AST):
+    __slots__ = ('var_node', 'type_node')
+
     def __init__(self, var_node: Variable, type_node: Type):
         self.var_node = var_node
         self.type_node = type_node
 
 
 class Print(AST):
+    __slots__ = ('children',)
+
     def __init__(self):
         self.children = []
 
 
 class TernaryOp(AST):
+    __slots__ = ('condition', 'first_expr', 'second_expr')
+
     def __init__(self, condition, first_expr, second_expr):
         self.condition = condition
         self.first_expr = first_expr
@@ -131,6 +226,8 @@ class TernaryOp(AST):
 
 
 class Program(AST):
+    __slots__ = ('imports_node', 'declarations_before', 'main_function', 'declarations_after')
+
     def __init__(self, imports: Imports, declarations_before: Sequence[ASTNode], main_function: MainFunction, declarations_after: Sequence[ASTNode]):
         self.imports_node = imports
         self.declarations_before = declarations_before
@@ -139,6 +236,8 @@ class Program(AST):
 
 
 class ConditionStatement(AST):
+    __slots__ = ('condition', 'if_body', 'else_body')
+
     def __init__(self, condition, if_body, else_body):
         self.condition = condition
         self.if_body = if_body
@@ -146,6 +245,8 @@ class ConditionStatement(AST):
 
 
 class ForStatement(AST):
+    __slots__ = ('init', 'condition', 'action', 'body')
+
     def __init__(self, init, condition, action, body):
         self.init = init
         self.condition = condition
@@ -154,38 +255,81 @@ class ForStatement(AST):
 
 
 class WhileStatement(AST):
+    """
+    condition - NoOp for a loop only a break or return ends (see interpreter.optimizer)
+    """
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
 class DoWhileStatement(AST):
+    """
+    condition - NoOp for a loop only a break or return ends (see interpreter.optimizer)
+    """
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
 class BreakStatement(AST):
-    pass
+    __slots__ = ()
 
 
 class ContinueStatement(AST):
-    pass
+    __slots__ = ()
 
 
 class ReturnStatement(AST):
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
         self.expr = expr
 
 
 class SwitchCompound(AST):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
 
 
 class SwitchStatement(AST):
+    __slots__ = ('condition', 'case_statements', 'default_statement')
+
     def __init__(self, condition, case_statements, default_statement):
         self.condition = condition
         self.case_statements = case_statements
         self.default_statement = default_statement
+
+
+#  names of the attributes of every node class that may hold nodes, by class
+_NODE_ATTRIBUTES = {}
+
+
+def children(node: AST) -> Iterator[AST]:
+    """
+    Nodes right below 'node', in the order of its attributes
+    Works on any subclass of the node classes too, nodes made by flat_tree.lazy load
+    the children asked for
+    """
+    cls = type(node)
+    names = _NODE_ATTRIBUTES.get(cls)
+    if names is None:
+        # private slots (span, frozen flag, where a lazy node comes from) hold no nodes
+        names = _NODE_ATTRIBUTES[cls] = tuple(
+            name for base in reversed(cls.__mro__) for name in getattr(base, '__slots__', ())
+            if not name.startswith('_'))
+    for name in names:
+        value = getattr(node, name)
+        if isinstance(value, AST):
+            yield value
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                if isinstance(item, AST):
+                    yield item
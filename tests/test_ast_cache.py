@@ -0,0 +1,100 @@
+"""
+ASTCache: a stored tree is a hit and comes back equal, an edited source, a changed
+grammar or a corrupt entry misses, the least recently used entries go first once the
+directory outgrows 'max_size'
+"""
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from syntax_analyzer import ast_cache
+from syntax_analyzer.ast_cache import ASTCache
+from syntax_analyzer.ast_format import HEADER
+from tests.test_backends import parse
+from tests.test_incremental import dump
+
+CODES = ['int main() { int x = %d; cout << x << endl; return 0; }' % number for number in range(4)]
+
+
+class ASTCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ASTCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit(self):
+        key = self.cache.key(CODES[0])
+        self.assertIsNone(self.cache.get(key))
+        self.assertTrue(self.cache.put(key, parse(CODES[0])))
+        self.assertEqual(dump(self.cache.get(key)), dump(parse(CODES[0])))
+        self.assertIsNone(self.cache.get(self.cache.key(CODES[0] + " ")))
+
+    def test_key(self):
+        self.assertEqual(self.cache.key(CODES[0]), self.cache.key(CODES[0].encode()))
+        self.assertNotEqual(self.cache.key(CODES[0]), self.cache.key(CODES[1]))
+
+    def test_grammar_version(self):
+        key = self.cache.key(CODES[0])
+        self.cache.put(key, parse(CODES[0]))
+        with mock.patch.object(ast_cache, 'GRAMMAR_VERSION', ast_cache.GRAMMAR_VERSION + 1):
+            other = self.cache.key(CODES[0])
+        self.assertNotEqual(other, key)
+        self.assertIsNone(self.cache.get(other))
+
+    def test_other_grammar_entry(self):
+        # an entry another version wrote under the same key is dropped
+        key = self.cache.key(CODES[0])
+        self.cache.put(key, parse(CODES[0]))
+        with open(self.cache.path(key), 'r+b') as file:
+            fields = list(HEADER.unpack(file.read(HEADER.size)))
+            fields[2] += 1
+            file.seek(0)
+            file.write(HEADER.pack(*fields))
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.path(key)))
+
+    def test_corrupt_entry(self):
+        key = self.cache.key(CODES[0])
+        self.cache.put(key, parse(CODES[0]))
+        with open(self.cache.path(key), 'r+b') as file:
+            file.seek(HEADER.size + 4)
+            byte = file.read(1)
+            file.seek(-1, os.SEEK_CUR)
+            file.write(bytes([byte[0] ^ 0xff]))
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.path(key)))
+        # and the next put stores it again
+        self.assertTrue(self.cache.put(key, parse(CODES[0])))
+        self.assertIsNotNone(self.cache.get(key))
+
+    def test_eviction(self):
+        keys = [self.cache.key(code) for code in CODES]
+        for time, (key, code) in enumerate(zip(keys[:3], CODES)):
+            self.cache.put(key, parse(code))
+            os.utime(self.cache.path(key), (time, time))
+        size = os.path.getsize(self.cache.path(keys[0]))
+        # room for three entries, the first one is used again, the second is the least recently used
+        self.cache.max_size = 3 * size + size // 2
+        self.assertIsNotNone(self.cache.get(keys[0]))
+        self.cache.put(keys[3], parse(CODES[3]))
+        self.assertEqual([os.path.exists(self.cache.path(key)) for key in keys], [True, False, True, True])
+        self.assertLessEqual(sum(entry.stat().st_size for entry in os.scandir(self.directory.name)),
+                             self.cache.max_size)
+
+    def test_clear(self):
+        for code in CODES:
+            self.cache.put(self.cache.key(code), parse(code))
+        self.cache.clear()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Trees written by ast_format.dumps load back as they were, through 'loads' and through a
+mapped file, data that is not a complete tree of this format raises FormatError
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer import ast_format
+from syntax_analyzer.ast_format import FormatError, HEADER
+from syntax_analyzer.flat_tree import from_flat, lazy
+from syntax_analyzer.parser import Parser
+from tests.test_incremental import dump
+from tests.test_recovery import sample_programs
+
+#  constants of every type the format has a tag for, and a syntax error
+CONSTANTS = """
+int main() {
+    int big = 2147483647;
+    double d = 2.5e-3;
+    char c = 'z';
+    bool t = true, f = false;
+    const char * s = "text with \\"quotes\\"";
+    cout << big << d << c << t << f << s << endl;
+    x = ;
+    return 0;
+}
+"""
+
+
+def parse(code: str):
+    return Parser(TokenTable.from_lexer(Lexer(code)), recover=True).parse()
+
+
+class FormatTest(unittest.TestCase):
+
+    def setUp(self):
+        self.trees = [parse(code) for code in sample_programs() + [CONSTANTS]]
+
+    def test_loads(self):
+        for tree in self.trees:
+            data = ast_format.dumps(tree)
+            flat = ast_format.loads(data)
+            self.assertEqual(dump(from_flat(flat)), dump(tree))
+            self.assertEqual(ast_format.dumps(flat), data)
+
+    def test_load_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for index, tree in enumerate(self.trees):
+                file_path = os.path.join(directory, f"{index}.ast")
+                with open(file_path, 'wb') as file:
+                    file.write(ast_format.dumps(tree))
+                self.assertEqual(dump(lazy(ast_format.load(file_path))), dump(tree))
+
+    def test_every_bit_flipped(self):
+        data = ast_format.dumps(parse(CONSTANTS))
+        for bit in range(len(data) * 8):
+            corrupt = bytearray(data)
+            corrupt[bit // 8] ^= 1 << bit % 8
+            with self.subTest(bit=bit), self.assertRaises(FormatError):
+                ast_format.loads(bytes(corrupt))
+
+    def test_truncated(self):
+        data = ast_format.dumps(parse(CONSTANTS))
+        for size in range(len(data)):
+            with self.subTest(size=size), self.assertRaises(FormatError):
+                ast_format.loads(data[:size])
+
+    def test_other_grammar(self):
+        data = bytearray(ast_format.dumps(parse(CONSTANTS)))
+        fields = list(HEADER.unpack_from(data))
+        fields[2] += 1
+        HEADER.pack_into(data, 0, *fields)
+        with self.assertRaisesRegex(FormatError, "grammar"):
+            ast_format.loads(bytes(data))
+
+    def test_empty_file(self):
+        with tempfile.NamedTemporaryFile() as file:
+            with self.assertRaises(FormatError):
+                ast_format.load(file.name)
+
+
+if __name__ == '__main__':
+    unittest.main()
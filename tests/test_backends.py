@@ -0,0 +1,258 @@
+"""
+Every backend runs a program the way the walking Interpreter does: same output, same
+exit code, same error
+"""
+import io
+import os
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.bytecode import BytecodeCompiler
+from interpreter.compiler import Compiler
+from interpreter.interpreter import Interpreter
+from interpreter.runtime import InterpreterError
+from interpreter.transpiler import Transpiler
+from interpreter.vm import VM
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser
+from syntax_analyzer.tree import Program
+
+BACKENDS = {
+    "compiler": lambda tree, output: Compiler(output).compile(tree)(),
+    "transpiler": lambda tree, output: Transpiler(output).compile(tree)(),
+    "vm": lambda tree, output: VM(BytecodeCompiler().compile(tree), output).run(),
+}
+
+
+def parse(code: str) -> Program:
+    return Parser(TokenTable.from_lexer(Lexer(code))).parse()
+
+
+def run(backend, tree: Program):
+    """ :return: (output, exit code, error message) """
+    output = io.StringIO()
+    try:
+        exit_code = backend(tree, output)
+    except InterpreterError as error:
+        return output.getvalue(), None, str(error)
+    return output.getvalue(), exit_code, None
+
+
+def interpret(tree: Program, output) -> int:
+    return Interpreter(output).interpret(tree)
+
+
+PROGRAMS = {
+    "globals": """
+int a = 2;
+int main() {
+    a += 3;
+    cout << a << endl;
+    return a;
+}
+""",
+    "global after main": """
+int main() {
+    cout << g << endl;
+    return 0;
+}
+int g = 5;
+""",
+    "global after main in a nested scope": """
+int main() {
+    {
+        g = 1;
+    }
+    return 0;
+}
+int g;
+""",
+    "globals after main are initialised first": """
+int main() {
+    cout << g << endl;
+    return 0;
+}
+int g = 5 / 0;
+""",
+    "undeclared in code that never runs": """
+int main() {
+    cout << "ran" << endl;
+    if (0) {
+        cout << undeclared;
+    }
+    return 0;
+}
+""",
+    "bad condition in code that never runs": """
+int main() {
+    const char * s = "a";
+    cout << "ran" << endl;
+    while (0) {
+        if (s) { }
+    }
+    return 0;
+}
+""",
+    "untaken logical operand": """
+int main() {
+    const char * s = "a";
+    cout << (0 && s) << endl;
+    return 0;
+}
+""",
+    "bad conversion after output": """
+int main() {
+    cout << "ran" << endl;
+    int x = 1;
+    x = "text";
+    return 0;
+}
+""",
+    "break outside of a loop": """
+int main() {
+    cout << "ran" << endl;
+    break;
+    return 0;
+}
+""",
+    "continue in a switch": """
+int main() {
+    switch (1) {
+        case 1:
+            continue;
+    }
+    return 0;
+}
+""",
+    "redeclaration": """
+int main() {
+    int x = 1;
+    int x = 2;
+    return 0;
+}
+""",
+    "redeclared global": """
+int x;
+int main() {
+    return 0;
+}
+int x;
+""",
+    "switch on a double": """
+int main() {
+    switch (1.5) {
+    }
+    return 0;
+}
+""",
+    "INT_MIN by -1": """
+int main() {
+    int m = -2147483647 - 1;
+    int k = -1;
+    cout << m / k << " " << m % k << endl;
+    m %= k;
+    return m;
+}
+""",
+    "counted loop writing its variable": """
+int main() {
+    int sum = 0;
+    for (int i = 0; i < 10; i++) {
+        if (i == 3) {
+            i = 7;
+        }
+        sum += i;
+    }
+    cout << sum << endl;
+    return 0;
+}
+""",
+    "counted loop changing its bound": """
+int main() {
+    int sum = 0;
+    int n = 10;
+    for (int i = 0; i < n; i++) {
+        n--;
+        sum += i;
+    }
+    cout << sum << " " << n << endl;
+    return 0;
+}
+""",
+    "counted loop up to INT_MAX": """
+int main() {
+    int count = 0;
+    for (int i = 2147483645; i <= 2147483647; i++) {
+        count++;
+        if (count > 5) {
+            break;
+        }
+        cout << i << endl;
+    }
+    return 0;
+}
+""",
+    "counted loop variable read after it": """
+int main() {
+    int sum = 0;
+    int i;
+    for (i = 0; i < 5; i++) {
+        sum += i;
+    }
+    cout << sum << " " << i << endl;
+    return 0;
+}
+""",
+    "counted sum wrapping": """
+int main() {
+    int sum = 0;
+    for (int i = 0; i < 100000; i++) {
+        sum += i * 100000 - 7;
+    }
+    cout << sum << endl;
+    return 0;
+}
+""",
+    "division by zero": """
+int main() {
+    int x = 0;
+    cout << "before" << endl;
+    cout << 1 / x << endl;
+    return 0;
+}
+""",
+}
+
+
+class BackendsTest(unittest.TestCase):
+
+    def test_programs(self):
+        for name, code in PROGRAMS.items():
+            tree = parse(code)
+            expected = run(interpret, tree)
+            for backend, function in BACKENDS.items():
+                with self.subTest(program=name, backend=backend):
+                    self.assertEqual(run(function, tree), expected)
+
+    def test_global_after_main(self):
+        output, exit_code, error = run(interpret, parse(PROGRAMS["global after main"]))
+        self.assertEqual(error, "Undeclared variable g")
+
+    def test_int_min_by_minus_one(self):
+        self.assertEqual(run(interpret, parse(PROGRAMS["INT_MIN by -1"])), ("-2147483648 0\n", 0, None))
+
+    def test_counted_loop_up_to_int_max(self):
+        output = "2147483645\n2147483646\n2147483647\n-2147483648\n-2147483647\n"
+        self.assertEqual(run(interpret, parse(PROGRAMS["counted loop up to INT_MAX"])), (output, 0, None))
+
+    def test_checked_before_running(self):
+        output, exit_code, error = run(interpret, parse(PROGRAMS["undeclared in code that never runs"]))
+        self.assertEqual((output, error), ("", "Undeclared variable undeclared"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+CodeCache stores transpiled programs next to their generated source, a hit runs like
+the program transpiled again
+"""
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.code_cache import CodeCache
+from interpreter.transpiler import Transpiler
+from syntax_analyzer.ast_cache import ASTCache
+from tests.test_backends import parse
+
+CODE = 'int main() { int x = 6; cout << x * 7 << endl; return 3; }'
+
+
+class CodeCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = CodeCache(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_hit(self):
+        key = self.cache.key(CODE)
+        self.assertIsNone(self.cache.get(key))
+        self.assertTrue(self.cache.put(key, Transpiler().transpile(parse(CODE))))
+        code = self.cache.get(key)
+        # tracebacks point at the generated module
+        self.assertEqual(code.co_filename, self.cache.source_path(key))
+        self.assertTrue(os.path.exists(code.co_filename))
+        output = io.StringIO()
+        self.assertEqual(Transpiler(output).load(code)(), 3)
+        self.assertEqual(output.getvalue(), "42\n")
+
+    def test_keys(self):
+        # a source cached as a tree and as code gets different entries
+        self.assertNotEqual(self.cache.key(CODE), ASTCache.key(CODE))
+        self.assertNotEqual(self.cache.key(CODE), self.cache.key(CODE + " "))
+
+    def test_corrupt_entry(self):
+        key = self.cache.key(CODE)
+        self.cache.put(key, Transpiler().transpile(parse(CODE)))
+        with open(self.cache.path(key), 'r+b') as file:
+            file.write(b'\0\0\0\0')
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(os.path.exists(self.cache.path(key)))
+
+
+if __name__ == '__main__':
+    unittest.main()
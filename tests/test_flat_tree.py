@@ -0,0 +1,68 @@
+"""
+A tree stored by to_flat comes back equal through from_flat and through lazy, nodes the
+parser shares (interned leaves, the var_node of a VarDecl and its Assign) are still
+shared after from_flat and the leaves still frozen
+"""
+import os
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.loops import walk
+from syntax_analyzer.flat_tree import from_flat, lazy, to_flat
+from syntax_analyzer.tree import *
+from tests.test_backends import BACKENDS, PROGRAMS, interpret, parse, run
+from tests.test_incremental import dump
+from tests.test_recovery import sample_programs
+
+SHARED = 'int main() { int a = 1; int b = 1; a = 1 + b; return 0; }'
+
+
+class FlatTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.trees = [parse(code) for code in sample_programs() + list(PROGRAMS.values())]
+
+    def test_from_flat(self):
+        for tree in self.trees:
+            flat = to_flat(tree)
+            restored = from_flat(flat)
+            self.assertEqual(dump(restored), dump(tree))
+            self.assertEqual(tuple(to_flat(restored).edges), tuple(flat.edges))
+
+    def test_lazy(self):
+        for tree in self.trees:
+            self.assertEqual(dump(lazy(to_flat(tree))), dump(tree))
+
+    def test_lazy_runs(self):
+        for name, code in PROGRAMS.items():
+            expected = run(interpret, parse(code))
+            for backend_name, backend in [("interpreter", interpret)] + list(BACKENDS.items()):
+                with self.subTest(program=name, backend=backend_name):
+                    self.assertEqual(run(backend, lazy(to_flat(parse(code)))), expected)
+
+    def test_shared_nodes(self):
+        tree = from_flat(to_flat(parse(SHARED)))
+        first_decl, first_assign, second_decl, second_assign, assign, _ = tree.main_function.compound_statement.children
+        self.assertIs(first_decl.var_node, first_assign.left)
+        self.assertIs(second_decl.var_node, second_assign.left)
+        self.assertIs(first_decl.type_node, second_decl.type_node)
+        one = first_assign.right
+        self.assertIsInstance(one, Num)
+        self.assertIs(second_assign.right, one)
+        self.assertIs(assign.right.left, one)
+        with self.assertRaises(AttributeError):
+            one.token = None
+
+    def test_leaves_of_one_parent(self):
+        # a leaf reached once is not frozen, the optimizer may rewrite it
+        tree = from_flat(to_flat(parse('int main() { return 7; }')))
+        seven = tree.main_function.compound_statement.children[0].expr
+        seven.token = seven.token
+        self.assertFalse(any(getattr(node, '_frozen', False) for node in walk(tree)))
+
+
+if __name__ == '__main__':
+    unittest.main()
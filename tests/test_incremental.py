@@ -0,0 +1,129 @@
+"""
+IncrementalParser.reparse gives, after every edit, the tree a full parse of the edited
+source gives, spans included, or fails with the same SyntaxError: random edits over
+generated programs, braces added and removed among them
+"""
+import os
+import random
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer, LexicalError
+from lexical_analyzer.token import Token
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.incremental import IncrementalParser
+from syntax_analyzer.parser import Parser, SyntaxError
+from syntax_analyzer.tree import *
+
+#  slots that are not part of the tree: the span is compared through the property, lazy
+#  nodes keep where they come from
+HIDDEN_SLOTS = ('_span', '_frozen', '_flat', '_index')
+STATEMENTS = ['x = 1;', 'y = x + 2;', 'int a = 3, b;', 'if (x) { y = 1; } else { y = 2; }', 'while (x) { x = x - 1; }',
+              'for (int i = 0; i < 3; i++) { y = i; }', '{ x = 2; { y = 3; } }', 'cout << x << endl;',
+              'switch (x) { case 1: { y = 1; break; } default: y = 2; }', 'do { x++; } while (x < 3);',
+              'if (a) if (b) { c = 1; } else { d = 2; }']
+PIECES = ['x', '1', ';', '{', '}', '+', 'y = 2;', 'if (x) ', 'else ', 'int q;', ' ', '(', ')', 'while (a) { b = 1; }',
+          'cout << ', '<<', 'case 2: ', '"s"']
+PROGRAMS = 30
+EDITS = 40
+
+
+def node_class(node: AST) -> type:
+    """ Class of the tree 'node' is, a lazy node stands for its first base """
+    return next(cls for cls in type(node).__mro__ if cls.__module__ == AST.__module__)
+
+
+def dump(node):
+    """ Nested tuples with the class, spans, tokens and children of every node of a tree """
+    if isinstance(node, (list, tuple)):
+        return tuple(dump(item) for item in node)
+    if isinstance(node, Token):
+        return node.type, node.value
+    if not isinstance(node, AST):
+        return str(node) if isinstance(node, Exception) else node
+    names = [name for cls in type(node).__mro__ for name in getattr(cls, '__slots__', ())
+             if name not in HIDDEN_SLOTS]
+    return (node_class(node).__name__, node.span) + tuple((name, dump(getattr(node, name))) for name in names)
+
+
+def statements(generator: random.Random, depth: int = 0) -> str:
+    items = []
+    for _ in range(generator.randrange(1, 6)):
+        if depth < 3 and generator.random() < 0.3:
+            items.append('while (x) { ' + statements(generator, depth + 1) + ' }')
+        else:
+            items.append(generator.choice(STATEMENTS))
+    return ' '.join(items)
+
+
+def random_edit(generator: random.Random, code: str):
+    """ (offset, removed, inserted): a statement added, a name or number changed, or any text anywhere """
+    choice = generator.random()
+    if choice < 0.4:
+        offset = generator.choice([index + 1 for index, char in enumerate(code) if char in ';{}'])
+        return offset, 0, ' ' + generator.choice(STATEMENTS)
+    if choice < 0.6:
+        offset = generator.choice([index for index, char in enumerate(code) if char in '0123456789xy'])
+        return offset, 1, generator.choice(['7', 'x', 'yy', '12'])
+    offset = generator.randrange(len(code) + 1)
+    removed = min(generator.choice([0, 0, 1, 2, 6]), len(code) - offset)
+    return offset, removed, generator.choice(PIECES) if generator.random() < 0.8 else ''
+
+
+def full_parse(code: str):
+    """ dump of the tree a full parse builds, ('error', message) if it fails """
+    try:
+        return dump(Parser(TokenTable.from_lexer(Lexer(code))).parse())
+    except SyntaxError as error:
+        return 'error', error.message
+
+
+class IncrementalParserTest(unittest.TestCase):
+
+    def reparse(self, table: TokenTable, tree: Program, offset: int, removed: int, inserted: str):
+        """ Apply the edit, :return: the reparsed tree, None if it failed like a full parse """
+        first, old_stop, new_stop = table.relex(offset, removed, inserted)
+        expected = full_parse(table.code)
+        try:
+            tree = IncrementalParser(table).reparse(tree, first, old_stop, new_stop)
+        except SyntaxError as error:
+            self.assertEqual(('error', error.message), expected)
+            return None
+        self.assertEqual(dump(tree), expected)
+        return tree
+
+    def test_random_edits(self):
+        for seed in range(PROGRAMS):
+            generator = random.Random(seed)
+            original = ('int g = 1; using namespace std; ' + 'int h; ' * generator.randrange(2) + 'int main() { '
+                        + statements(generator) + ' } ' + 'int z = 2; ' * generator.randrange(3))
+            table = TokenTable.from_lexer(Lexer(original))
+            tree = Parser(table).parse()
+            for step in range(EDITS):
+                edit = random_edit(generator, table.code)
+                with self.subTest(seed=seed, step=step, code=table.code, edit=edit):
+                    try:
+                        tree = self.reparse(table, tree, *edit)
+                    except LexicalError:
+                        continue
+                if tree is None:
+                    # the edit broke the program, go on from one that parses
+                    table = TokenTable.from_lexer(Lexer(original))
+                    tree = Parser(table).parse()
+
+    def test_braces(self):
+        code = 'int main() { x = 1; while (x) { y = 2; if (y) { z = 3; } } w = 4; } int g;'
+        for index, char in enumerate(code):
+            if char not in '{}':
+                continue
+            for edit in ((index, 1, ''), (index, 0, char), (index, 0, '{' if char == '}' else '}')):
+                with self.subTest(edit=edit):
+                    table = TokenTable.from_lexer(Lexer(code))
+                    self.reparse(table, Parser(table).parse(), *edit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""
+LineIndex maps offsets to lines and columns counted from 1, the first line included,
+and the locations LexicalError and SyntaxError report come from it
+"""
+import os
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import LexicalError
+from lexical_analyzer.line_index import LineIndex
+from syntax_analyzer.parser import SyntaxError
+from tests.test_backends import parse
+
+CODE = 'ab\ncde\n\nf'
+#  program -> (error class, line, column, message)
+ERRORS = {
+    '$': (LexicalError, 1, 1, "Lexical Error: No such token '$':1:1"),
+    'int x = 1;\n  $': (LexicalError, 2, 3, "Lexical Error: No such token '$':2:3"),
+    'int main() {\n\tx = @;\n}': (LexicalError, 2, 6, "Lexical Error: No such token '@':2:6"),
+    'int main() { s = "abc }': (LexicalError, 1, 24, "Lexical Error: Unclosed double quote:1:24"),
+    'int main() { x = ; }': (SyntaxError, 1, 18, "Syntax Error: Expected token ID but found SEMI:1:18"),
+    'int main() {\n  x = 1;\n  y = ;\n}': (SyntaxError, 3, 7, "Syntax Error: Expected token ID but found SEMI:3:7"),
+    'int main() {\n  x = 1;': (SyntaxError, 2, 9, "Syntax Error: Expected token ID but found EOF:2:9"),
+    'int main() { x = 1; }\n}': (SyntaxError, 2, 1, "Syntax Error: Expected token EOF but found RBRACKET:2:1"),
+    # columns count characters, not bytes
+    'int main() { const char * s = "é"; x = ; }': (SyntaxError, 1, 40,
+                                                   "Syntax Error: Expected token ID but found SEMI:1:40"),
+}
+
+
+def location(code: str, offset: int):
+    """ (line, column) counted by hand """
+    before = code[:offset]
+    return before.count('\n') + 1, offset - (before.rfind('\n') + 1) + 1
+
+
+class LineIndexTest(unittest.TestCase):
+
+    def test_first_line(self):
+        index = LineIndex(CODE)
+        self.assertEqual(index.location(0), (1, 1))
+        self.assertEqual(index.location(1), (1, 2))
+        # the line break belongs to the line it ends
+        self.assertEqual(index.location(2), (1, 3))
+
+    def test_line_starts(self):
+        index = LineIndex(CODE)
+        self.assertEqual(index.location(3), (2, 1))
+        # an empty line
+        self.assertEqual(index.location(7), (3, 1))
+        self.assertEqual(index.location(8), (4, 1))
+
+    def test_last_line(self):
+        # no line break at the end, the end offset is right after the last character
+        index = LineIndex(CODE)
+        self.assertEqual(index.location(len(CODE)), (4, 2))
+        self.assertEqual(index.line(4), 'f')
+        self.assertEqual(LineIndex(CODE + '\n').location(len(CODE) + 1), (5, 1))
+
+    def test_lines(self):
+        index = LineIndex(CODE)
+        self.assertEqual([index.line(number) for number in range(1, 5)], ['ab', 'cde', '', 'f'])
+
+    def test_every_offset(self):
+        for code in (CODE, '\n\nx\n', '', 'one line'):
+            index = LineIndex(code)
+            for offset in range(len(code) + 1):
+                with self.subTest(code=code, offset=offset):
+                    self.assertEqual(index.location(offset), location(code, offset))
+
+    def test_errors(self):
+        for code, (error_class, line_num, column_num, message) in ERRORS.items():
+            with self.subTest(code=code):
+                with self.assertRaises(error_class) as error:
+                    parse(code)
+                self.assertEqual((error.exception.line_num, error.exception.column_num), (line_num, column_num))
+                self.assertEqual(error.exception.message, message)
+
+
+if __name__ == '__main__':
+    unittest.main()
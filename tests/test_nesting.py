@@ -0,0 +1,54 @@
+"""
+Code nested exactly as deep as the default limits of the Parser parses, one level
+more is a SyntaxError naming the limit
+"""
+import os
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import MAX_EXPRESSION_DEPTH, MAX_STATEMENT_DEPTH, Parser, SyntaxError
+from syntax_analyzer.tree import *
+
+
+def parse(code: str) -> Program:
+    return Parser(TokenTable.from_lexer(Lexer(code))).parse()
+
+
+def parentheses(depth: int) -> str:
+    return "int main() { x = " + "(" * depth + "a" + ")" * depth + "; }"
+
+
+def blocks(depth: int) -> str:
+    return "int main() " + "{" * depth + "}" * depth
+
+
+def ifs(depth: int) -> str:
+    # main's body and the assignment are statement levels too
+    return "int main() { " + "if (a) " * (depth - 2) + "x = 1; }"
+
+
+class NestingTest(unittest.TestCase):
+
+    def assert_limit(self, shape, limit: int, what: str):
+        self.assertIsInstance(parse(shape(limit)), Program)
+        with self.assertRaises(SyntaxError) as context:
+            parse(shape(limit + 1))
+        self.assertIn(f"{what} are nested deeper than {limit}", context.exception.message)
+
+    def test_parentheses(self):
+        self.assert_limit(parentheses, MAX_EXPRESSION_DEPTH, "Expressions")
+
+    def test_blocks(self):
+        self.assert_limit(blocks, MAX_STATEMENT_DEPTH, "Statements")
+
+    def test_if(self):
+        self.assert_limit(ifs, MAX_STATEMENT_DEPTH, "Statements")
+
+
+if __name__ == '__main__':
+    unittest.main()
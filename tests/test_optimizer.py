@@ -0,0 +1,274 @@
+"""
+optimize() does not change how a program runs: every backend gives the same output,
+exit code and error for a program and for the program optimised, generated expressions
+cover the corners of 'runtime' the folding has to keep
+"""
+import os
+import random
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from interpreter.loops import walk
+from interpreter.optimizer import ConstantFolder, constant_value, optimize
+from lexical_analyzer.token_types_simple import PLUS
+from syntax_analyzer.tree import *
+from tests.test_backends import BACKENDS, interpret, parse, run
+
+#  variables every generated program declares, the values the folding gets wrong most easily
+DECLARATIONS = """
+    int i = 5;
+    int m = -2147483647 - 1;
+    int k = -1;
+    char c = 'a';
+    bool t = true;
+    double z = -0.0;
+    double n = 0.0 / 0.0;
+    double d = 2.5;
+    double r = 0.0;
+"""
+ATOMS = ['0', '1', '-1', '2', '31', '32', '-33', '2147483647', '(-2147483647 - 1)', "'a'", '(char)(0)', '(char)(300)',
+         'true', 'false', '0.0', '-0.0', '1.5', '(0.0 / 0.0)', '(1.0 / 0.0)', 'i', 'm', 'k', 'c', 't', 'z', 'n', 'd']
+OPERATORS = ['+', '-', '*', '/', '==', '!=', '<', '>', '<=', '>=', '&&', '||']
+INTEGER_OPERATORS = ['%', '<<', '>>', '&', '|', '^']
+UNARY = ['-', '+', '!', '~(int)', '(int)', '(char)', '(bool)', '(double)']
+PROGRAMS = 300
+#  conditions of the statements of generated programs, most of them constant
+CONDITIONS = ['0', '1', 'false', 'true', '2 > 3', '1 + 1 == 2', "'a'", '0.0', 'x > 2', 'y']
+STATEMENT_PROGRAMS = 150
+
+#  programs that fail, before running or while running, possibly in code the optimiser removes
+ERRORS = {
+    "division by zero": 'int x = 0; cout << "a" << endl; cout << 1 / x << endl;',
+    "constant division by zero": 'cout << "a" << endl; cout << 1 / 0 << endl;',
+    "constant remainder by zero": 'cout << 5 % 0 << endl;',
+    "unread division by zero": 'int unused = 7 / 0; cout << "a" << endl;',
+    "undeclared in a dead branch": 'cout << "a" << endl; if (0) { cout << undeclared; }',
+    "conversion in a dead loop": 'int x = 1; while (false) { x = "text"; }',
+    "condition in a dead loop": 'for (int j = 0; 0; j++) { if ("s") { } }',
+    "redeclaration": 'int x = 1; int x = 2; cout << "ran" << endl;',
+    "unread redeclaration": 'int x; { int y = 1; int y = 2; }',
+    "break in a dead branch": 'if (1) { } else { break; }',
+    "after a return": 'return 0; cout << undeclared;',
+    "loop counter out of its loop": 'for (int j = 0; j < 3; j++) { cout << j; } cout << j;',
+    "switch on a double": 'switch (1.5) { case 1: break; }',
+    "invalid operand": 'cout << (true ? 1 : 2) << endl; cout << ~1.5 << endl;',
+}
+
+
+def expression(generator: random.Random, depth: int) -> str:
+    choice = generator.random()
+    if depth == 0 or choice < 0.25:
+        return generator.choice(ATOMS)
+    if choice < 0.55:
+        return f"({expression(generator, depth - 1)} {generator.choice(OPERATORS)} {expression(generator, depth - 1)})"
+    if choice < 0.7:
+        left, right = expression(generator, depth - 1), expression(generator, depth - 1)
+        return f"((int)({left}) {generator.choice(INTEGER_OPERATORS)} (int)({right}))"
+    if choice < 0.9:
+        return f"{generator.choice(UNARY)}({expression(generator, depth - 1)})"
+    return (f"({expression(generator, depth - 1)} ? {expression(generator, depth - 1)}"
+            f" : {expression(generator, depth - 1)})")
+
+
+def program(seed: int) -> str:
+    generator = random.Random(seed)
+    lines = []
+    for _ in range(3):
+        value = expression(generator, 4)
+        # cout would take << for one of its own
+        if "<<" not in value:
+            lines.append(f"cout << {value} << endl;")
+        lines.append(f"r = {value};")
+        lines.append("cout << r << endl;")
+    lines.append(f"return {expression(generator, 3)};")
+    return "int main() {" + DECLARATIONS + "    " + "\n    ".join(lines) + "\n}\n"
+
+
+def folded(expression: str) -> AST:
+    """ 'expression' printed by a program with int x and bool b, folded """
+    tree = parse("int main() { int x = 1; bool b = true; cout << " + expression + "; return 0; }")
+    statements = ConstantFolder().fold(tree).main_function.compound_statement.children
+    return statements[-2].children[0]
+
+
+def block(generator: random.Random, depth: int, in_loop: bool = False) -> str:
+    """ Statements of a block, with constant conditions, dead cases and code after jumps """
+    items = []
+    for _ in range(generator.randrange(1, 4)):
+        items.append(statement(generator, depth, in_loop))
+    if generator.random() < 0.2:
+        # the rest of the block never runs
+        items.append(generator.choice(['break;', 'continue;'] if in_loop else ['return x;']))
+        items.append(statement(generator, depth, in_loop))
+    return " ".join(items)
+
+
+def statement(generator: random.Random, depth: int, in_loop: bool) -> str:
+    choice = generator.random()
+    condition = generator.choice(CONDITIONS)
+    if depth == 0 or choice < 0.3:
+        return generator.choice(['x = x + 3;', 'y += x;', 'x++;', 'cout << x << " " << y << endl;',
+                                 f'int u{generator.randrange(1000)} = x * 2;', 'y = y % 7;'])
+    inner = depth - 1
+    if choice < 0.45:
+        if_body, else_body = block(generator, inner, in_loop), block(generator, inner, in_loop)
+        return f"if ({condition}) {{ {if_body} }} else {{ {else_body} }}"
+    if choice < 0.55:
+        # while (true) and do ... while (true) only run again to a break
+        return f"while ({condition}) {{ {block(generator, inner)} break; }}"
+    if choice < 0.65:
+        return f"do {{ {block(generator, inner)} break; }} while ({condition});"
+    if choice < 0.75:
+        return f"for (int j = 0; j < 3 && {condition}; j++) {{ {block(generator, inner, True)} }}"
+    if choice < 0.85:
+        value = generator.choice(['1', '2', '3', 'x % 4'])
+        cases = " ".join(f"case {label}: {{ {block(generator, inner, in_loop)}"
+                         f"{' break;' if generator.random() < 0.5 else ''} }}" for label in (1, 2, 3))
+        return f"switch ({value}) {{ {cases} default: {{ {block(generator, inner, in_loop)} }} }}"
+    return f"{{ {block(generator, inner, in_loop)} }}"
+
+
+def statement_program(seed: int) -> str:
+    generator = random.Random(seed)
+    return ("int main() { int x = 1; int y = 2; int unused = x + y; " + block(generator, 3)
+            + ' cout << x << " " << y << endl; return 0; }')
+
+
+def size(tree: AST) -> int:
+    """ Number of nodes in 'tree' """
+    return sum(1 for _ in walk(tree))
+
+
+def optimised_statements(code: str) -> list:
+    """ Statements 'code' turns into in main, optimised, after x and y are declared """
+    tree = optimize(parse("int main() { int x = 1; int y = 2; " + code + " cout << x << y; return 0; }"))
+    return tree.main_function.compound_statement.children[4:-2]
+
+
+class DeadCodeTest(unittest.TestCase):
+
+    def assert_classes(self, code: str, *classes: type):
+        self.assertEqual([type(node) for node in optimised_statements(code)], list(classes))
+
+    def test_constant_conditions(self):
+        self.assert_classes("if (0) { x = 1; } else { y = 2; }", Assign)
+        self.assert_classes("if (1 > 2) { x = 1; }")
+        self.assert_classes("while (false) { x = 1; }")
+        self.assert_classes("do { x = 3; } while (0);", Assign)
+        # only the init of a for loop that never runs is left
+        [init] = optimised_statements("for (int j = 0; 1 > 2; j++) { x = j; }")
+        self.assertIsInstance(init, Compound)
+        self.assertFalse(any(isinstance(node, Assign) and node.left.value == 'x' for node in walk(init)))
+
+    def test_infinite_loop(self):
+        [loop] = optimised_statements("while (1) { x++; break; x = 5; }")
+        self.assertIsInstance(loop.condition, NoOp)
+        self.assertEqual([type(node) for node in loop.body.children], [PostfixOp, BreakStatement])
+
+    def test_after_a_jump(self):
+        tree = optimize(parse("int main() { int x = 1; x++; return x; x = 2; cout << x; }"))
+        statements = tree.main_function.compound_statement.children
+        self.assertEqual([type(node) for node in statements], [VarDecl, Assign, PostfixOp, ReturnStatement])
+
+    def test_switch(self):
+        code = "switch (2) { case 1: x = 1; case 2: y = 2; case 3: { x = 3; break; } case 4: x = 4; default: x = 9; }"
+        [switch] = optimised_statements(code)
+        # case 2 is entered, case 3 is fallen into, nothing reaches the others
+        self.assertEqual([constant_value(case.condition) for case in switch.case_statements], [2, 3])
+        self.assertIsInstance(switch.default_statement, NoOp)
+
+    def test_unread_variables(self):
+        self.assert_classes("int unused = x + 1; unused = 3;")
+        # an initialiser that may fail stays
+        self.assert_classes("int unused = x / 0;", VarDecl, Assign)
+
+
+class FoldTest(unittest.TestCase):
+
+    def assert_constant(self, expression: str, cls: type, value):
+        node = folded(expression)
+        self.assertIsInstance(node, cls)
+        self.assertEqual(constant_value(node), value)
+
+    def assert_variable(self, expression: str, name: str):
+        node = folded(expression)
+        self.assertIsInstance(node, Variable)
+        self.assertEqual(node.value, name)
+
+    def test_constants(self):
+        self.assert_constant("7 / 2 * 1.5", Num, 4.5)
+        # char and bool operands are promoted to int
+        self.assert_constant("'a' + true", Num, 98)
+        self.assert_constant("1 < 2", Bool, True)
+
+    def test_partly_constant(self):
+        node = folded("2 * 3 + x * 1")
+        self.assertIsInstance(node, BinOp)
+        self.assertEqual(node.token.type, PLUS)
+        self.assertEqual((type(node.left), node.left.value), (Num, 6))
+        self.assertEqual((type(node.right), node.right.value), (Variable, 'x'))
+
+    def test_identities(self):
+        self.assert_variable("!!b", 'b')
+        self.assert_variable("-(-x)", 'x')
+        self.assert_variable("(int)(x)", 'x')
+
+    def test_ternaries(self):
+        self.assert_variable("(1 ? x : 2)", 'x')
+        self.assert_constant("(0 ? x : 2)", Num, 2)
+        self.assert_constant("(x ? 4 : 4)", Num, 4)
+
+    def test_not_folded(self):
+        # a division by zero fails when it runs
+        self.assertIsInstance(folded("1 / 0"), BinOp)
+        self.assertIsInstance(folded("!x"), UnaryOp)
+
+
+class OptimizerTest(unittest.TestCase):
+
+    def assert_unchanged(self, code: str):
+        """ :return: (output, exit code, error) of the program, False if optimize() gave it back as it is """
+        tree = parse(code)
+        optimised = optimize(tree)
+        expected = run(interpret, tree)
+        self.assertEqual(run(interpret, optimised), expected)
+        for backend, function in BACKENDS.items():
+            with self.subTest(backend=backend):
+                self.assertEqual(run(function, tree), expected)
+                self.assertEqual(run(function, optimised), expected)
+        return expected, optimised is not tree
+
+    def test_generated(self):
+        failed = rewritten = 0
+        for seed in range(PROGRAMS):
+            code = program(seed)
+            with self.subTest(seed=seed, code=code):
+                expected, changed = self.assert_unchanged(code)
+                failed += expected[2] is not None
+                rewritten += changed
+        # the generated programs are not all failing ones, and they do get folded
+        self.assertLess(failed, PROGRAMS // 2)
+        self.assertGreater(rewritten, PROGRAMS // 2)
+
+    def test_generated_statements(self):
+        for seed in range(STATEMENT_PROGRAMS):
+            code = statement_program(seed)
+            with self.subTest(seed=seed, code=code):
+                (output, exit_code, error), _ = self.assert_unchanged(code)
+                self.assertIsNone(error)
+                # every program has dead code, at least a variable nothing reads
+                tree = parse(code)
+                self.assertLess(size(optimize(tree)), size(tree))
+
+    def test_errors(self):
+        for name, statements in ERRORS.items():
+            with self.subTest(program=name):
+                (output, exit_code, error), _ = self.assert_unchanged("int main() { " + statements + " return 0; }")
+                self.assertIsNotNone(error)
+
+
+if __name__ == '__main__':
+    unittest.main()
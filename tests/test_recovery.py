@@ -0,0 +1,114 @@
+"""
+Parser with 'recover': broken items become ErrorNodes and every error goes to
+'diagnostics', the first one is the SyntaxError a parse without recovery raises; a
+program without errors parses the same with or without recovery
+"""
+import glob
+import os
+import random
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer, LexicalError
+from lexical_analyzer.token_table import TokenTable
+from syntax_analyzer.parser import Parser, SyntaxError
+from syntax_analyzer.tree import *
+from tests.test_incremental import dump
+
+#  name -> (program, number of errors, classes of the statements of main)
+CORPUS = {
+    "broken statements": ('int main() { x = ; y = 2; z = (; w = 3; }', 2, [ErrorNode, Assign, ErrorNode, Assign]),
+    "broken nested statement": ('int main() { if (x) { y = ; } z = 1; }', 1, [ConditionStatement, Assign]),
+    "broken globals": ('int g = ; int main() { x = 1; } int h = ;', 2, [Assign]),
+    "unclosed main": ('int main() { x = 1; ', 1, [Assign, ErrorNode, ErrorNode]),
+    "extra brace": ('int main() { x = 1; } }', 1, [Assign]),
+    "broken expressions": ('int main() {\n  x = 1 +;\n  cout << << endl;\n  while () { }\n  y = 2;\n}', 3,
+                           [ErrorNode, ErrorNode, ErrorNode, Assign]),
+}
+#  text mutations insert
+PIECES = [';', '{', '}', '(', ')', '=', '+', 'int', 'x', 'if', 'else', '<<', 'case 1:', '"s"', '']
+MUTANTS = 300
+
+
+def sample_programs():
+    """ Programs of tests/*.cpp that parse """
+    programs = []
+    for source in sorted(glob.glob(os.path.join(path, "tests", "*.cpp"))):
+        with open(source) as file:
+            code = file.read()
+        try:
+            Parser(TokenTable.from_lexer(Lexer(code))).parse()
+        except (LexicalError, SyntaxError):
+            continue
+        programs.append(code)
+    return programs
+
+
+def parse(code: str, recover: bool):
+    """ (tree, diagnostics), the tree is the SyntaxError raised if parsing failed anyway """
+    parser = Parser(TokenTable.from_lexer(Lexer(code)), recover=recover)
+    try:
+        return parser.parse(), parser.diagnostics
+    except SyntaxError as error:
+        return error, parser.diagnostics
+
+
+def walk(node: AST):
+    """ 'node' and every node below it """
+    yield node
+    for child in children(node):
+        yield from walk(child)
+
+
+class RecoveryTest(unittest.TestCase):
+
+    def test_corpus(self):
+        for name, (code, count, classes) in CORPUS.items():
+            with self.subTest(program=name):
+                tree, diagnostics = parse(code, recover=True)
+                self.assertIsInstance(tree, Program)
+                self.assertEqual(len(diagnostics), count)
+                self.assertEqual([type(node) for node in tree.main_function.compound_statement.children], classes)
+                error, _ = parse(code, recover=False)
+                self.assertEqual(diagnostics[0].message, error.message)
+
+    def test_clean_programs(self):
+        for code in sample_programs():
+            tree, diagnostics = parse(code, recover=True)
+            self.assertEqual(diagnostics, [])
+            self.assertEqual(dump(tree), dump(parse(code, recover=False)[0]))
+
+    def test_mutants(self):
+        generator = random.Random(0)
+        programs = sample_programs()
+        broken = 0
+        for index in range(MUTANTS):
+            code = generator.choice(programs)
+            offset = generator.randrange(len(code))
+            removed = generator.choice([0, 1, 3, 8])
+            code = code[:offset] + generator.choice(PIECES) + code[offset + removed:]
+            with self.subTest(mutant=index, code=code):
+                try:
+                    expected, _ = parse(code, recover=False)
+                except LexicalError:
+                    continue
+                tree, diagnostics = parse(code, recover=True)
+                if isinstance(expected, Program):
+                    self.assertEqual(diagnostics, [])
+                    self.assertEqual(dump(tree), dump(expected))
+                    continue
+                broken += 1
+                # the error recovery gives up on is the first one if it was not recorded
+                first = diagnostics[0] if diagnostics else tree
+                self.assertIsInstance(first, SyntaxError)
+                self.assertEqual(first.message, expected.message)
+                if isinstance(tree, Program):
+                    self.assertTrue(any(isinstance(node, ErrorNode) for node in walk(tree)))
+        self.assertGreater(broken, MUTANTS // 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
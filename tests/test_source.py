@@ -0,0 +1,101 @@
+"""
+MappedSource reads a file as the text it decodes to: length, characters, slices, 'find'
+and the tokens, lines and columns the Lexer gets from it are the ones of the decoded
+string, with blocks small enough that multi-byte characters fall on every boundary
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer, LexicalError
+from lexical_analyzer.source import MappedSource
+from lexical_analyzer.token_table import TokenTable
+
+#  characters of 1 to 4 bytes in strings, comments and on cout lines
+CODE = """// Привет, 世界 🎉
+int main() {
+    const char * s = "é中🎉x";
+    // ∑ 𝄞
+    int n = 1; // ü
+    cout << "ñ" << n << "漢字" << endl;
+    // 🎉🎉🎉
+    return 0;
+}"""
+#  bytes that are not utf-8: a lone continuation byte, a truncated sequence, an invalid byte
+INVALID = b'int main() { // \x80 x \xe4\xb8 y \xff\n return 1; }\n'
+BLOCK_SIZES = [1, 2, 3, 4, 5, 7, 16, MappedSource.BLOCK_SIZE]
+
+
+def mapped(path: str, block_size: int) -> MappedSource:
+    return type('SmallBlocks', (MappedSource,), {'BLOCK_SIZE': block_size})(path)
+
+
+def tokens(code):
+    """ (type, value, span, location) of every token of 'code' """
+    table = TokenTable.from_lexer(Lexer(code))
+    return [(token.type, token.value, table.span(index), table.location(index))
+            for index, token in enumerate(table)]
+
+
+class MappedSourceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, data: bytes) -> str:
+        file_path = os.path.join(self.directory.name, "source.cpp")
+        with open(file_path, 'wb') as file:
+            file.write(data)
+        return file_path
+
+    def check(self, data: bytes):
+        text = data.decode('utf-8', errors='replace')
+        file_path = self.write(data)
+        for block_size in BLOCK_SIZES:
+            with self.subTest(block_size=block_size), mapped(file_path, block_size) as source:
+                self.assertEqual(len(source), len(text))
+                self.assertEqual(''.join(source[index] for index in range(len(text))), text)
+                # backwards, every lookup away from the window
+                self.assertEqual(''.join(source[index] for index in reversed(range(len(text)))), text[::-1])
+                for start in range(0, len(text), 3):
+                    for stop in (start + 1, start + 5, start + 40):
+                        self.assertEqual(source[start:stop], text[start:stop])
+                for sub in ('\n', '🎉', '中', 'endl', '// ü', 'x �', 'absent'):
+                    for start in range(0, len(text), 7):
+                        self.assertEqual(source.find(sub, start), text.find(sub, start))
+                self.assertEqual(tokens(source), tokens(text))
+
+    def test_multi_byte(self):
+        self.check(CODE.encode('utf-8'))
+
+    def test_invalid_utf8(self):
+        self.check(INVALID)
+
+    def test_empty(self):
+        with mapped(self.write(b''), 4) as source:
+            self.assertEqual(len(source), 0)
+            self.assertEqual(source[0:3], '')
+            self.assertEqual(source.find('x'), -1)
+
+    def test_lexical_error(self):
+        # the error is reported at the same place
+        data = CODE.replace('return 0;', 'return 0; $').encode('utf-8')
+        file_path = self.write(data)
+        with self.assertRaises(LexicalError) as expected:
+            TokenTable.from_lexer(Lexer(data.decode()))
+        for block_size in BLOCK_SIZES:
+            with self.subTest(block_size=block_size), mapped(file_path, block_size) as source:
+                with self.assertRaises(LexicalError) as error:
+                    TokenTable.from_lexer(Lexer(source))
+                self.assertEqual(error.exception.message, expected.exception.message)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""
+TokenTable.relex gives, after every edit, the tokens lexing the edited source from
+scratch gives: random edits over the sample programs, many of them inside comments,
+strings and cout lines
+"""
+import glob
+import os
+import random
+import sys
+import unittest
+
+path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(path)
+
+from lexical_analyzer.lexer import Lexer, LexicalError
+from lexical_analyzer.token_table import TokenTable
+
+#  sample programs the lexer accepts
+SOURCES = [source for source in sorted(glob.glob(os.path.join(path, "tests", "*.cpp")))
+           if not source.endswith("rules.cpp")]
+#  text edits insert, the ones that change how the text around them is lexed first
+PIECES = ['/*', '*/', '"', "'", '//', '\n', 'cout << ', '<<', ';', 'x', ' ', '1.5', 'const char * s', '{', '}',
+          '"text"', '/* comment */', 'endl', 'a << b', '++']
+#  text edits land in, or at the start of
+ANCHORS = ['/*', '*/', '"', '//', 'cout', '<<', 'endl', ';', '\n', 'const']
+EDITS = 200
+
+
+def snapshot(table: TokenTable):
+    """ (type, span, is_cout_line) of every token """
+    return [(table.types[index], table.span(index), table.couts[index]) for index in range(len(table))]
+
+
+def random_edit(generator: random.Random, code: str):
+    """ (offset, removed, inserted) """
+    anchors = [index for anchor in ANCHORS for index in range(len(code)) if code.startswith(anchor, index)]
+    if anchors and generator.random() < 0.7:
+        offset = generator.choice(anchors) + generator.randrange(3)
+    else:
+        offset = generator.randrange(len(code) + 1)
+    offset = min(offset, len(code))
+    removed = min(generator.choice([0, 0, 1, 2, 5]), len(code) - offset)
+    inserted = generator.choice(PIECES) if generator.random() < 0.85 else ''
+    return offset, removed, inserted
+
+
+class RelexTest(unittest.TestCase):
+
+    def test_random_edits(self):
+        for seed, source in enumerate(SOURCES):
+            generator = random.Random(seed)
+            with open(source) as file:
+                original = file.read()
+            table = TokenTable.from_lexer(Lexer(original))
+            for step in range(EDITS):
+                code = table.code
+                offset, removed, inserted = random_edit(generator, code)
+                edited = code[:offset] + inserted + code[offset + removed:]
+                with self.subTest(source=os.path.basename(source), step=step, edit=(offset, removed, inserted)):
+                    try:
+                        expected = snapshot(TokenTable.from_lexer(Lexer(edited)))
+                    except LexicalError:
+                        before = snapshot(table)
+                        with self.assertRaises(LexicalError):
+                            table.relex(offset, removed, inserted)
+                        # the table is left as it was
+                        self.assertEqual(table.code, code)
+                        self.assertEqual(snapshot(table), before)
+                        continue
+                    table.relex(offset, removed, inserted)
+                    self.assertEqual(table.code, edited)
+                    self.assertEqual(snapshot(table), expected)
+
+    def test_edit_opening_a_comment(self):
+        table = TokenTable.from_lexer(Lexer('int a = 1;\nint b = 2;\nint c = 3;\n'))
+        table.relex(11, 0, '/*')
+        table.relex(table.code.index('int c'), 0, '*/')
+        self.assertEqual(snapshot(table), snapshot(TokenTable.from_lexer(Lexer(table.code))))
+
+    def test_edit_on_a_cout_line(self):
+        table = TokenTable.from_lexer(Lexer('int main() {\n    cout << a << b;\n    x = a << b;\n}\n'))
+        table.relex(table.code.index('cout'), 4, 'cot')
+        self.assertEqual(snapshot(table), snapshot(TokenTable.from_lexer(Lexer(table.code))))
+
+
+if __name__ == '__main__':
+    unittest.main()